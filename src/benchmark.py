@@ -0,0 +1,294 @@
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from src.generate_data import build_campus
+    from src.graph_model import build_graph, compile_graph
+    from src.pathfinding import (
+        SPT_CACHE, SearchStats, dijkstra_path, astar_path, alt_path,
+        bidirectional_dijkstra_path, bidirectional_astar_path,
+    )
+    from src.contraction import ch_path
+    from src.hierarchy import hier_path
+    from src.routing import ALGORITHMS, prepare
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/benchmark.py
+    from generate_data import build_campus
+    from graph_model import build_graph, compile_graph
+    from pathfinding import (
+        SPT_CACHE, SearchStats, dijkstra_path, astar_path, alt_path,
+        bidirectional_dijkstra_path, bidirectional_astar_path,
+    )
+    from contraction import ch_path
+    from hierarchy import hier_path
+    from routing import ALGORITHMS, prepare
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Бенчмарк алгоритмів пошуку: кампуси зростаючого розміру (generate_data.build_campus),
+# фіксоване зерном навантаження з випадкових пар (start, end), для кожного
+# алгоритму - перцентилі затримки, пропускна здатність, пік пам'яті та кількість
+# остаточно визначених вузлів. Результат - JSON; з --baseline порівнюється
+# зі збереженим прогоном і повідомляє про регресії (код виходу 1).
+#
+#   python src/benchmark.py --sizes 1000,5000,20000 --out bench.json
+#   python src/benchmark.py --out new.json --baseline bench.json
+
+# шукаємо без кешу дерев і таблиці всіх пар - міряється саме ядро пошуку;
+# "cached" - Дейкстра так, як її викликає routing.route (через SPT_CACHE),
+# щоб було видно, у що кеш дерев обходиться запитам від різних точок
+ENGINES = {
+    "dijkstra":   dijkstra_path,
+    "cached":     ALGORITHMS["dijkstra"][1],
+    "astar":      astar_path,
+    "alt":        alt_path,
+    "ch":         ch_path,
+    "bidijkstra": bidirectional_dijkstra_path,
+    "biastar":    bidirectional_astar_path,
+    "hier":       hier_path,
+}
+
+# метрика -> (чи краще більше значення, вид): час порівнюється з допуском
+# --tolerance, детерміновані лічильники - з --effort-tolerance, пік пам'яті -
+# з --memory-tolerance (tracemalloc залежить від версії Python і збирача сміття)
+METRICS = {
+    "p50_ms": (False, "time"),
+    "p95_ms": (False, "time"),
+    "p99_ms": (False, "time"),
+    "throughput_qps": (True, "time"),
+    "settled_mean": (False, "effort"),
+    "peak_kb": (False, "memory"),
+}
+
+# кампус із параметрів за замовчуванням: 4 поверхи x 2 коридори x 20 аудиторій
+FLOORS, CORRIDORS, ROOMS, STAIRWELLS, ELEVATORS = 4, 2, 20, 2, 1
+PER_BUILDING = FLOORS * (CORRIDORS * ROOMS + STAIRWELLS + ELEVATORS + 1) + 1
+
+# пік пам'яті міряється окремим коротким прогоном: tracemalloc сповільнює пошук
+MEMORY_QUERIES = 20
+
+
+def campus_graph(target: int, seed: int = 0) -> nx.Graph:
+    # кампус із найближчою до target кількістю вузлів
+    buildings = max(1, round(target / PER_BUILDING))
+    nodes, edges = [], []
+    build_campus(nodes, edges, buildings=buildings, floors=FLOORS, corridors=CORRIDORS,
+                 rooms=ROOMS, stairwells=STAIRWELLS, elevators=ELEVATORS, seed=seed)
+    return build_graph({"nodes": nodes, "edges": edges})
+
+
+def workload(G: nx.Graph, queries: int, seed: int):
+    # ті самі пари для всіх алгоритмів і прогонів із тим самим зерном
+    rnd = random.Random(seed)
+    ids = sorted(G.nodes)
+    return [tuple(rnd.sample(ids, 2)) for _ in range(queries)]
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def run_algo(G: nx.Graph, algo: str, pairs, reference=None, repeat: int = 3):
+    # (рядок результатів, відстані по парах); кожна пара проганяється repeat
+    # разів, затримка пари - найкращий час (менше шуму від планувальника ОС)
+    fn = ENGINES[algo]
+    cg = compile_graph(G)
+    # передобробка (routing.PREPARE) не входить у затримку запиту
+    t0 = time.perf_counter()
+    prepare(cg, algo)
+    prep_s = time.perf_counter() - t0
+
+    # розігрів: перші виклики платять за списки CSR і кеші інтерпретатора
+    SPT_CACHE.clear()
+    for a, b in pairs[:MEMORY_QUERIES]:
+        try:
+            fn(cg, a, b)
+        except nx.NetworkXNoPath:
+            pass
+
+    repeat = max(1, repeat)
+    stats = SearchStats()
+    lat = np.full(len(pairs), np.inf)
+    dists = np.empty(len(pairs), dtype=np.float64)
+    clock = time.perf_counter
+    # як у timeit: збирач сміття не вклинюється у вимірювання
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    t_all = clock()
+    try:
+        for r in range(repeat):
+            # лічильники - лише з першого проходу: пошук детермінований
+            st = stats if r == 0 else None
+            # кожен прохід - з порожнім кешем дерев, як перший прохід навантаження
+            SPT_CACHE.clear()
+            for i, (a, b) in enumerate(pairs):
+                t1 = clock()
+                try:
+                    _, d = fn(cg, a, b, stats=st)
+                except nx.NetworkXNoPath:
+                    d = np.inf
+                dt = clock() - t1
+                if dt < lat[i]:
+                    lat[i] = dt
+                dists[i] = d
+        total = clock() - t_all
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    SPT_CACHE.clear()
+    tracemalloc.start()
+    try:
+        for a, b in pairs[:MEMORY_QUERIES]:
+            try:
+                fn(cg, a, b)
+            except nx.NetworkXNoPath:
+                pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    lat_ms = lat * 1000.0
+    res = {
+        "algo": algo,
+        "queries": len(pairs),
+        "prep_s": round(prep_s, 4),
+        "p50_ms": round(_percentile(lat_ms, 50), 4),
+        "p95_ms": round(_percentile(lat_ms, 95), 4),
+        "p99_ms": round(_percentile(lat_ms, 99), 4),
+        "mean_ms": round(float(lat_ms.mean()) if len(pairs) else 0.0, 4),
+        "throughput_qps": round(len(pairs) * repeat / total if total > 0 else 0.0, 2),
+        "peak_kb": round(peak / 1024, 1),
+        "settled_mean": round(stats.settled / len(pairs), 1) if pairs else 0.0,
+        "pushes_mean": round(stats.pushes / len(pairs), 1) if pairs else 0.0,
+    }
+    if reference is not None:
+        # відповіді мають збігатися з Дейкстрою - інакше прискорення нічого не варте
+        res["mismatches"] = int(np.count_nonzero(~np.isclose(dists, reference, rtol=0, atol=1e-9)))
+    return res, dists
+
+
+def run(sizes, algos, queries: int, seed: int, repeat: int = 3, log=print) -> dict:
+    results = []
+    for target in sizes:
+        G = campus_graph(target, seed)
+        pairs = workload(G, queries, seed)
+        log(f" Граф ~{target}: {G.number_of_nodes()} вузлів, {G.number_of_edges()} ребер")
+        reference = None
+        for algo in algos:
+            res, dists = run_algo(G, algo, pairs, reference, repeat)
+            if algo == "dijkstra":
+                reference = dists
+            res.update(size=target, nodes=G.number_of_nodes(), edges=G.number_of_edges())
+            results.append(res)
+            log(f"   {algo:<11} p50 {res['p50_ms']:>9.3f} мс  p95 {res['p95_ms']:>9.3f} мс  "
+                f"p99 {res['p99_ms']:>9.3f} мс  {res['throughput_qps']:>9.1f} зап/с  "
+                f"вузлів {res['settled_mean']:>9.1f}  пам'ять {res['peak_kb']:>8.1f} КБ")
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "seed": seed,
+            "queries": queries,
+            "repeat": repeat,
+            "sizes": list(sizes),
+            "algos": list(algos),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25, effort_tolerance: float = 0.0,
+            memory_tolerance: float = 0.10):
+    # регресія - метрика погіршилась більш ніж на допуск свого виду (частка) відносно бази
+    limits = {"time": tolerance, "effort": effort_tolerance, "memory": memory_tolerance}
+    base = {(r["size"], r["algo"]): r for r in baseline.get("results", [])}
+    regressions = []
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["size"], r["algo"]))
+        if b is None:
+            continue
+        for metric, (higher_better, kind) in METRICS.items():
+            old, new = b.get(metric), r.get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_better else change
+            row = {"size": r["size"], "algo": r["algo"], "metric": metric,
+                   "baseline": old, "current": new, "change": round(change, 4),
+                   "regression": worse > limits[kind]}
+            rows.append(row)
+            if row["regression"]:
+                regressions.append(row)
+        if r.get("mismatches"):
+            regressions.append({"size": r["size"], "algo": r["algo"], "metric": "mismatches",
+                                "baseline": b.get("mismatches", 0), "current": r["mismatches"],
+                                "change": None, "regression": True})
+    return rows, regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Бенчмарк алгоритмів пошуку шляху")
+    ap.add_argument("--sizes", default="1000,5000,20000", help="цільові кількості вузлів через кому")
+    ap.add_argument("--algos", default=",".join(ENGINES), help="алгоритми через кому")
+    ap.add_argument("--queries", type=int, default=200, help="пар (start, end) на граф")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=Path("benchmark.json"))
+    ap.add_argument("--baseline", type=Path, help="попередній JSON для порівняння")
+    ap.add_argument("--repeat", type=int, default=3, help="прогонів кожної пари (береться найкращий)")
+    ap.add_argument("--tolerance", type=float, default=0.25,
+                    help="допустиме погіршення часу відносно бази (0.25 = 25%%)")
+    ap.add_argument("--effort-tolerance", type=float, default=0.0,
+                    help="допустиме погіршення лічильників вузлів")
+    ap.add_argument("--memory-tolerance", type=float, default=0.10,
+                    help="допустиме погіршення піку пам'яті")
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    algos = [a.strip() for a in args.algos.split(",") if a.strip()]
+    unknown = [a for a in algos if a not in ENGINES]
+    if unknown:
+        ap.error(f"невідомі алгоритми: {', '.join(unknown)} (є: {', '.join(ENGINES)})")
+    # Дейкстра першою - її відстані еталон для перевірки решти
+    if "dijkstra" in algos:
+        algos.remove("dijkstra")
+        algos.insert(0, "dijkstra")
+
+    report = run(sizes, algos, args.queries, args.seed, args.repeat)
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.tolerance, args.effort_tolerance,
+                                      args.memory_tolerance)
+        report["comparison"] = {"baseline": str(args.baseline), "tolerance": args.tolerance,
+                                "effort_tolerance": args.effort_tolerance,
+                                "memory_tolerance": args.memory_tolerance,
+                                "rows": rows, "regressions": len(regressions)}
+        for r in regressions:
+            print(f" [РЕГРЕСІЯ] ~{r['size']} {r['algo']} {r['metric']}: "
+                  f"{r['baseline']} -> {r['current']}")
+        if not regressions:
+            print(f" Регресій відносно {args.baseline} немає (допуск {args.tolerance:.0%})")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f" Результати записано в {args.out}")
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
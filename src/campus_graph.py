@@ -0,0 +1,16 @@
+import networkx as nx
+
+# Окремий модуль, бо клас успадковує nx.Graph: graph_model імпортується й
+# пакетним режимом, якому networkx не потрібен (див. graph_model.new_graph).
+
+
+class CampusGraph(nx.Graph):
+    # nx.Graph з номером версії. Його збільшують власні шляхи правок проєкту
+    # (dynamic - закриття/відкриття ребер, graph_model.touch), а compile_graph і
+    # node_table кешують результат саме під цим номером (разом із кількістю
+    # вузлів і ребер). Пряму правку атрибутів - G.edges[u, v]["weight"] = w,
+    # G.nodes[n]["floor"] = f, nx.set_edge_attributes - граф не помічає:
+    # після неї треба викликати touch(G).
+    def __init__(self, incoming_graph_data=None, **attr):
+        self.version = 0
+        super().__init__(incoming_graph_data, **attr)
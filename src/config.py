@@ -6,5 +6,31 @@ DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "data.json"
 # Візуалізація: чи підписувати ваги ребер
 DRAW_WEIGHTS = True
 
-# Алгоритм за замовчуванням: "dijkstra" або "astar"
-DEFAULT_ALGO = "dijkstra"
\ No newline at end of file
+# Алгоритм за замовчуванням: "dijkstra", "astar", "alt" (A* з опорними вузлами),
+# "ch" (ієрархія скорочень), "bidijkstra" або "biastar" (двобічні пошуки),
+# "hier" (поверхи + надграф сходів, ліфтів і входів)
+DEFAULT_ALGO = "dijkstra"
+
+# Кеш дерев найкоротших шляхів (одне дерево на початкову точку):
+# межі LRU за кількістю дерев і за обсягом пам'яті
+SPT_CACHE_ENTRIES = 64
+SPT_CACHE_BYTES = 64 * 1024 * 1024
+# повне дерево будується для start, що повторився серед стількох останніх промахів
+SPT_CACHE_SEEN = 4096
+
+# JSON, більші за цей розмір, читаються потоково (data_loader.iter_graph_items)
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Налагодження: лічильники пошуку (вузли, релаксації, черга, евристика) і розбивка
+# часу на завантаження/побудову/пошук у виводі CLI та панелі результату GUI
+DEBUG = False
+
+# Альтернативні маршрути (pathfinding.k_shortest_paths) у CLI та GUI: скільки
+# маршрутів показувати разом із найкоротшим і яка частка довжини може
+# збігатися з уже показаним маршрутом (1.0 - без фільтра)
+ALT_ROUTES = 3
+ALT_MAX_OVERLAP = 0.8
+
+# Досяжність (pathfinding.reachable): межа відстані за замовчуванням для
+# теплової карти в GUI і visualization --reach
+REACH_CUTOFF = 30.0
@@ -0,0 +1,317 @@
+from __future__ import annotations
+import argparse
+import heapq
+import math
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from src.config import DATA_PATH
+    from src.data_loader import load_graph_from_json
+    from src.graph_model import CompiledGraph, build_graph, compile_graph
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/contraction.py
+    from config import DATA_PATH
+    from data_loader import load_graph_from_json
+    from graph_model import CompiledGraph, build_graph, compile_graph
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Ієрархія скорочень (contraction hierarchies): вузли стягуються по черзі,
+# а щоб відстані між рештою не змінились, додаються ребра-скорочення.
+# Запит - двобічна Дейкстра лише "вгору" за рангом; знайдений шлях
+# розгортається назад у вихідні ребра.
+
+INF = math.inf
+
+# межа локального пошуку свідка (witness search) під час стягування
+WITNESS_SETTLE_LIMIT = 60
+
+
+def _witness(adj, contracted, src, skip, limit):
+    # обмежена Дейкстра від src в'обхід вузла skip по ще не стягнутих вузлах
+    dist = {src: 0.0}
+    heap = [(0.0, src)]
+    settled = 0
+    while heap and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for v, w in adj[u].items():
+            if v == skip or contracted[v]:
+                continue
+            nd = d + w
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _shortcuts(adj, contracted, v):
+    # які скорочення знадобляться, якщо стягнути v
+    nbrs = [(u, w) for u, w in adj[v].items() if not contracted[u]]
+    out = []
+    for i, (u, wu) in enumerate(nbrs):
+        rest = nbrs[i + 1:]
+        if not rest:
+            break
+        limit = wu + max(w for _, w in rest)
+        dist = _witness(adj, contracted, u, v, limit)
+        for x, wx in rest:
+            via = wu + wx
+            if dist.get(x, INF) > via:
+                out.append((u, x, via))
+    return out, len(nbrs)
+
+
+class ContractionHierarchy:
+    # висхідний граф у CSR: up_indices[up_indptr[i]:up_indptr[i+1]] - сусіди i
+    # з вищим рангом; up_mid = -1 для вихідного ребра, інакше середній вузол
+    __slots__ = ("rank", "up_indptr", "up_indices", "up_weights", "up_mid",
+                 "n_shortcuts", "build_seconds", "_lists")
+
+    def __init__(self, cg: CompiledGraph):
+        t0 = time.perf_counter()
+        n = cg.n
+        ptr, nbr, wt, _, _ = cg.lists()
+        adj = [dict() for _ in range(n)]
+        mid = [dict() for _ in range(n)]
+        for u in range(n):
+            a = adj[u]
+            for k in range(ptr[u], ptr[u + 1]):
+                v, w = nbr[k], wt[k]
+                if v != u and w < a.get(v, INF):
+                    a[v] = w
+
+        contracted = [False] * n
+        deleted = [0] * n
+
+        def priority(v):
+            sc, deg = _shortcuts(adj, contracted, v)
+            return len(sc) - deg + deleted[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = [0] * n
+        up = [None] * n
+        order = 0
+        n_shortcuts = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            # ліниве оновлення пріоритету
+            p = priority(v)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            sc, _ = _shortcuts(adj, contracted, v)
+            up[v] = [(u, w, mid[v].get(u, -1)) for u, w in adj[v].items() if not contracted[u]]
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for u, _, _ in up[v]:
+                deleted[u] += 1
+            for a, b, w in sc:
+                if w < adj[a].get(b, INF):
+                    n_shortcuts += 1
+                    adj[a][b] = adj[b][a] = w
+                    mid[a][b] = mid[b][a] = v
+
+        counts = np.array([len(e) for e in up], dtype=np.int64)
+        self.up_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.up_indptr[1:])
+        flat = [e for edges in up for e in edges]
+        self.up_indices = np.array([e[0] for e in flat], dtype=np.int32)
+        self.up_weights = np.array([e[1] for e in flat], dtype=np.float64)
+        self.up_mid = np.array([e[2] for e in flat], dtype=np.int32)
+        self.rank = np.array(rank, dtype=np.int32)
+        self.n_shortcuts = n_shortcuts
+        self.build_seconds = time.perf_counter() - t0
+        self._lists = (self.up_indptr.tolist(), self.up_indices.tolist(),
+                       self.up_weights.tolist(), self.up_mid.tolist(), rank)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.rank.nbytes + self.up_indptr.nbytes + self.up_indices.nbytes
+                + self.up_weights.nbytes + self.up_mid.nbytes)
+
+    def _edge(self, a: int, b: int):
+        # ребро a-b зберігається у списку нижчого за рангом кінця
+        ptr, nbr, wt, md, rank = self._lists
+        lo, hi = (a, b) if rank[a] < rank[b] else (b, a)
+        best = None
+        for k in range(ptr[lo], ptr[lo + 1]):
+            if nbr[k] == hi and (best is None or wt[k] < best[0]):
+                best = (wt[k], md[k])
+        return best
+
+    def _unpack(self, a: int, b: int, out: List[Tuple[int, int, float]]):
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            w, m = self._edge(x, y)
+            if m < 0:
+                out.append((x, y, w))
+            else:
+                stack.append((m, y))
+                stack.append((x, m))
+
+    def query(self, s: int, t: int, stats=None):
+        # двобічний висхідний пошук; None, якщо шляху немає
+        # (stats - pathfinding.SearchStats або None)
+        if s == t:
+            return [s], 0.0
+        ptr, nbr, wt, _, _ = self._lists
+        dists = ({s: 0.0}, {t: 0.0})
+        preds = ({s: -1}, {t: -1})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        best, meet = INF, -1
+        pop, push = heapq.heappop, heapq.heappush
+        pops = stale = 0
+        while True:
+            active = [i for i in (0, 1) if heaps[i] and heaps[i][0][0] < best]
+            if not active:
+                break
+            for side in active:
+                heap, dist, pred = heaps[side], dists[side], preds[side]
+                other = dists[1 - side]
+                d, u = pop(heap)
+                pops += 1
+                if d > dist[u]:
+                    stale += 1
+                    continue
+                if u in other and d + other[u] < best:
+                    best, meet = d + other[u], u
+                for k in range(ptr[u], ptr[u + 1]):
+                    v = nbr[k]
+                    nd = d + wt[k]
+                    if nd < dist.get(v, INF):
+                        dist[v] = nd
+                        pred[v] = u
+                        push(heap, (nd, v))
+        if stats is not None:
+            stats.add_search(pops, stale, len(heaps[0]) + len(heaps[1]), 2)
+        if meet < 0:
+            return None
+
+        # ланцюжок вгору від s до точки зустрічі, далі вниз до t
+        chain = [meet]
+        while chain[-1] != s:
+            chain.append(preds[0][chain[-1]])
+        chain.reverse()
+        u = meet
+        while u != t:
+            u = preds[1][u]
+            chain.append(u)
+
+        edges = []
+        for a, b in zip(chain, chain[1:]):
+            self._unpack(a, b, edges)
+        path = [s]
+        dist = 0.0
+        for _, b, w in edges:
+            path.append(b)
+            dist += w
+        return path, dist
+
+
+def build_ch(G) -> ContractionHierarchy:
+    # передобробка виконується один раз і кешується біля скомпільованого графа
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    ch = cg.aux.get("ch")
+    if ch is None:
+        ch = ContractionHierarchy(cg)
+        cg.aux["ch"] = ch
+    return ch
+
+
+def ch_path(G: nx.Graph, start: str, end: str, stats=None) -> Tuple[List[str], float]:
+    # Найкоротший шлях через ієрархію скорочень; той самий контракт, що й dijkstra_path
+    # (stats - pathfinding.SearchStats; build - час побудови ієрархії, якщо її ще не було)
+    t0 = time.perf_counter() if stats is not None else 0.0
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    s, t = cg.index.get(start), cg.index.get(end)
+    if s is None or t is None:
+        raise nx.NodeNotFound(f"Either source {start} or target {end} is not in G")
+    t1 = time.perf_counter() if stats is not None else 0.0
+    ch = build_ch(cg)
+    t2 = time.perf_counter() if stats is not None else 0.0
+    res = ch.query(s, t, stats)
+    if res is None:
+        raise nx.NetworkXNoPath(f"Node {end} not reachable from {start}")
+    path, dist = res
+    out = [cg.ids[i] for i in path], float(dist)
+    if stats is not None:
+        stats.add_times(t1 - t0, t2 - t1, time.perf_counter() - t2)
+    return out
+
+
+# кампуси для графіка передобробки (generate_data.build_campus, вузлів приблизно)
+FIGURE_SIZES = (1000, 5000, 20000)
+
+
+def preprocessing_figure(rows, current=None):
+    # Figure: час передобробки і пам'ять ієрархії від кількості вузлів;
+    # rows - [(вузлів, секунд, байт)], current - та сама трійка для графа з даних
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 4), dpi=100)
+    ax_t, ax_m = fig.subplots(1, 2)
+    n = [r[0] for r in rows]
+    for ax, col, scale, title, unit in ((ax_t, 1, 1.0, "Час передобробки", "с"),
+                                         (ax_m, 2, 1 / 1024, "Пам'ять ієрархії", "КБ")):
+        ax.plot(n, [r[col] * scale for r in rows], marker="o", label="кампус (generate_data)")
+        if current is not None:
+            ax.scatter([current[0]], [current[col] * scale], color="#e53935", zorder=3, label="дані")
+        ax.set_title(title)
+        ax.set_xlabel("вузлів")
+        ax.set_ylabel(unit)
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Передобробка ієрархії скорочень: час і пам'ять")
+    ap.add_argument("--sizes", default=",".join(map(str, FIGURE_SIZES)),
+                    help="вузлів у кампусах для графіка (через кому; порожньо - без графіка)")
+    ap.add_argument("--out", type=Path, default=Path("ch_preprocessing.png"), help="файл графіка")
+    args = ap.parse_args(argv)
+
+    G = build_graph(load_graph_from_json(DATA_PATH))
+    ch = build_ch(G)
+    print(f" Ієрархію скорочень побудовано: {G.number_of_nodes()} вузлів, "
+          f"{G.number_of_edges()} ребер, {ch.n_shortcuts} скорочень")
+    print(f" Час передобробки: {ch.build_seconds:.3f} с, пам'ять: {ch.nbytes / 1024:.1f} КБ")
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    if not sizes:
+        return
+    try:
+        from src.generate_data import build_campus, campus_size
+    except ImportError:  # запуск як скрипт
+        from generate_data import build_campus, campus_size
+    rows = []
+    for target in sizes:
+        nodes, edges = [], []
+        # корпуси з параметрами build_campus за замовчуванням
+        per_building = campus_size(1, floors=4, corridors=2, rooms=20, stairwells=2, elevators=1)
+        build_campus(nodes, edges, buildings=max(1, round(target / per_building)))
+        h = ContractionHierarchy(compile_graph(build_graph({"nodes": nodes, "edges": edges})))
+        rows.append((len(nodes), h.build_seconds, h.nbytes))
+        print(f"   {len(nodes):>7} вузлів: {h.build_seconds:.3f} с, {h.nbytes / 1024:.1f} КБ, "
+              f"{h.n_shortcuts} скорочень")
+    fig = preprocessing_figure(rows, (G.number_of_nodes(), ch.build_seconds, ch.nbytes))
+    fig.savefig(args.out)
+    print(f" Графік записано в {args.out}")
+
+if __name__ == "__main__":
+    main()
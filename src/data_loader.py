@@ -1,7 +1,11 @@
 from __future__ import annotations
+import codecs
+import hashlib
 import json
+import os
+import re
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Callable, Dict, Iterator, Optional, Tuple
 
 
 def load_graph_from_json(path: str | Path) -> dict:
@@ -20,7 +24,153 @@ def load_positions(json_path: str | Path) -> Dict[str, Tuple[float, float]]:
     pos: Dict[str, Tuple[float, float]] = {}
     for node in data.get("nodes", []):
         nid = str(node["id"])
-        x = float(node.get("x", 0.0))
-        y = float(node.get("y", 0.0))
-        pos[nid] = (x, y)
+        # генератор пише координати як "pos": [x, y]; x/y - старий формат
+        if "pos" in node:
+            x, y = node["pos"]
+        else:
+            x, y = node.get("x", 0.0), node.get("y", 0.0)
+        pos[nid] = (float(x), float(y))
     return pos
+
+
+def file_digest(path: str | Path) -> str:
+    # sha256 вмісту файлу - ключ актуальності похідних кешів (таблиць, знімків)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+_WS = re.compile(r"[ \t\r\n]*")
+
+
+class _StreamReader:
+    # буфер над файлом: байти читаються порціями, декодуються інкрементно,
+    # спожитий префікс відкидається - у пам'яті лише поточний фрагмент
+    def __init__(self, f, chunk_size, on_chunk, hasher):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+        self.hasher = hasher
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        self._decoder = json.JSONDecoder()
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        raw = self.f.read(self.chunk_size)
+        if self.hasher is not None:
+            self.hasher.update(raw)
+        self.bytes_read += len(raw)
+        if self.pos > len(self.buf) // 2:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += self.decoder.decode(raw, final=not raw)
+        if not raw:
+            self.eof = True
+        self.on_chunk(self.bytes_read)
+        return True
+
+    def peek(self) -> str:
+        # наступний непробільний символ ("" - кінець файлу)
+        while True:
+            pos = self.pos = _WS.match(self.buf, self.pos).end()
+            if pos < len(self.buf):
+                return self.buf[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Некоректний JSON: очікувалось {chars!r} після {self.bytes_read} байт")
+        self.pos += 1
+        return c
+
+    def value(self):
+        # один JSON-елемент; якщо він упирається в кінець буфера - дочитуємо
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_graph_items(
+    path: str | Path,
+    progress: Optional[Callable[[int, int, int, int], None]] = None,
+    chunk_size: int = 1 << 16,
+    hasher=None,
+) -> Iterator[Tuple[str, dict]]:
+    # Потоковий розбір {"nodes": [...], "edges": [...]} лише засобами stdlib:
+    # віддає ("node", dict) і ("edge", dict) по одному, не будуючи всього документа.
+    # progress(байт прочитано, байт усього, вузлів, ребер) - після кожної порції.
+    # Ребро з невідомим кінцем відкладається до кінця файлу (вузли можуть іти
+    # після ребер); якщо кінець так і не з'явився - ValueError.
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Файл не знайдено: {p}")
+    total = os.path.getsize(p)
+    counts = [0, 0]
+    on_chunk = (lambda done: progress(done, total, counts[0], counts[1])) if progress else (lambda done: None)
+    seen = set()
+    pending = []
+
+    with open(p, "rb") as f:
+        r = _StreamReader(f, chunk_size, on_chunk, hasher)
+        r.expect("{")
+        if r.peek() == "}":
+            r.pos += 1
+        else:
+            while True:
+                key = r.value()
+                r.expect(":")
+                if key in ("nodes", "edges") and r.peek() == "[":
+                    r.pos += 1
+                    if r.peek() == "]":
+                        r.pos += 1
+                    else:
+                        while True:
+                            item = r.value()
+                            if key == "nodes":
+                                if "id" not in item:
+                                    raise ValueError(f"Вузол без id: {item!r}")
+                                seen.add(item["id"])
+                                counts[0] += 1
+                                yield "node", item
+                            else:
+                                if "u" not in item or "v" not in item:
+                                    raise ValueError(f"Ребро без кінців: {item!r}")
+                                if item["u"] in seen and item["v"] in seen:
+                                    counts[1] += 1
+                                    yield "edge", item
+                                else:
+                                    pending.append(item)
+                            if r.expect(",]") == "]":
+                                break
+                else:
+                    r.value()  # інші ключі пропускаються
+                if r.expect(",}") == "}":
+                    break
+        # після кореневого об'єкта допускаються лише пробіли
+        if r.peek():
+            raise ValueError("Некоректний JSON: зайві дані після кореневого об'єкта")
+
+    dangling = [e for e in pending if e["u"] not in seen or e["v"] not in seen]
+    if dangling:
+        sample = ", ".join(f"{e['u']}-{e['v']}" for e in dangling[:5])
+        raise ValueError(f"Ребер із відсутніми вузлами: {len(dangling)} ({sample})")
+    for e in pending:
+        counts[1] += 1
+        yield "edge", e
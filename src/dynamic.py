@@ -0,0 +1,161 @@
+from __future__ import annotations
+import math
+
+try:
+    from src.graph_model import bump_version, compile_graph, mark_compiled
+    from src.pathfinding import SPT_CACHE, repair_tree
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from graph_model import bump_version, compile_graph, mark_compiled
+    from pathfinding import SPT_CACHE, repair_tree
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Закриття/відкриття коридорів, сходів і вузлів під час роботи програми.
+# Закрите ребро зникає з nx.Graph (його не видно ні у візуалізації, ні в
+# networkx-алгоритмах), а в скомпільованому графі отримує вагу inf на місці -
+# без перекомпіляції. Кешовані дерева, таблиця всіх пар і таблиці ALT після
+# цього ремонтуються інкрементно (pathfinding.repair_tree, так само й таблиці
+# найближчих об'єктів facilities.FacilityTable), надграф порталів
+# перебудовується лише для зачеплених поверхів; ієрархія скорочень так не
+# ремонтується і перебудовується при наступному запиті.
+
+INF = math.inf
+
+
+def _closed(G: nx.Graph) -> dict:
+    # frozenset({u, v}) -> [вага, множина причин закриття]
+    return G.graph.setdefault("closed_edges", {})
+
+
+def _apply(G: nx.Graph, cg, edits) -> dict:
+    # edits - [(u, v, нова вага в CSR)]; латає CSR, ремонтує похідні структури.
+    # cg береться до правки nx.Graph, інакше compile_graph побачив би зміну
+    # і зібрав граф наново
+    old_version = cg.version
+    changes = []
+    for u, v, w in edits:
+        i, j = cg.idx(u), cg.idx(v)
+        old = cg.set_weight(i, j, w)
+        if old != w:
+            changes.append((i, j, old, w))
+    # правку вже внесено і в G, і в cg: нова версія G, але кеш лишається дійсним
+    bump_version(G)
+    mark_compiled(G, cg)
+    if not changes:
+        return {"changes": 0}
+
+    cg.bump()
+    cg.aux.pop("h_scale", None)
+    cg.aux.pop("ch", None)
+    report = {"changes": len(changes), "trees": SPT_CACHE.repair(cg, old_version, changes)}
+
+    lm = cg.aux.get("alt")
+    if lm is not None:
+        for r in range(len(lm.nodes)):
+            repair_tree(cg, lm.dist[r], lm.pred[r], changes)
+        report["landmarks"] = len(lm.nodes)
+
+    hier = cg.aux.get("hier")
+    if hier is not None:
+        report["partitions"] = hier.update(cg, changes)
+
+    facilities = cg.aux.get("facilities")
+    if facilities:
+        report["facility_nodes"] = sum(t.update(cg, changes) for t in facilities.values())
+
+    if cg.table is not None:
+        rows = cg.table.affected_rows(changes)
+        for t in rows.tolist():
+            repair_tree(cg, cg.table.dist[t], cg.table.nxt[t], changes)
+        report["table_rows"] = len(rows)
+    return report
+
+
+def close_edge(G: nx.Graph, u: str, v: str, reason="edge") -> dict:
+    # закриває ребро u-v (ремонт, подія); повторне закриття з іншої причини
+    # лише додає причину - ребро відкриється, коли знято всі
+    key = frozenset((u, v))
+    closed = _closed(G)
+    if key in closed:
+        closed[key][1].add(reason)
+        return {"changes": 0}
+    if not G.has_edge(u, v):
+        raise nx.NetworkXError(f"Ребра {u}-{v} немає в графі")
+    cg = compile_graph(G)
+    w = G.edges[u, v].get("weight", 1.0)
+    closed[key] = [w, {reason}]
+    G.remove_edge(u, v)
+    return _apply(G, cg, [(u, v, INF)])
+
+
+def reopen_edge(G: nx.Graph, u: str, v: str, reason="edge") -> dict:
+    key = frozenset((u, v))
+    closed = _closed(G)
+    if key not in closed:
+        return {"changes": 0}
+    w, reasons = closed[key]
+    reasons.discard(reason)
+    if reasons:
+        return {"changes": 0}
+    cg = compile_graph(G)
+    del closed[key]
+    G.add_edge(u, v, weight=w)
+    return _apply(G, cg, [(u, v, w)])
+
+
+def close_node(G: nx.Graph, node: str) -> dict:
+    # закриває всі ребра вузла; сам вузол лишається в графі, але стає недосяжним
+    edges = [(node, v) for v in list(G.neighbors(node))]
+    edges += [tuple(k) for k in _closed(G) if node in k and len(k) == 2]
+    return _batch(G, edges, close=True, reason=("node", node))
+
+
+def reopen_node(G: nx.Graph, node: str) -> dict:
+    edges = [tuple(k) for k, (_, r) in _closed(G).items() if ("node", node) in r]
+    return _batch(G, edges, close=False, reason=("node", node))
+
+
+def _batch(G: nx.Graph, edges, close: bool, reason) -> dict:
+    # кілька ребер - один ремонт кешів замість окремого на кожне ребро
+    closed = _closed(G)
+    cg = compile_graph(G)
+    edits = []
+    for u, v in edges:
+        key = frozenset((u, v))
+        if close:
+            if key in closed:
+                closed[key][1].add(reason)
+                continue
+            w = G.edges[u, v].get("weight", 1.0)
+            closed[key] = [w, {reason}]
+            G.remove_edge(u, v)
+            edits.append((u, v, INF))
+        elif key in closed:
+            w, reasons = closed[key]
+            reasons.discard(reason)
+            if not reasons:
+                del closed[key]
+                G.add_edge(u, v, weight=w)
+                edits.append((u, v, w))
+    return _apply(G, cg, edits)
+
+
+def set_edge_weight(G: nx.Graph, u: str, v: str, w: float) -> dict:
+    # нова вага ребра; для закритого ребра запам'ятовується до відкриття
+    w = float(w)
+    key = frozenset((u, v))
+    closed = _closed(G)
+    if key in closed:
+        closed[key][0] = w
+        return {"changes": 0}
+    if not G.has_edge(u, v):
+        raise nx.NetworkXError(f"Ребра {u}-{v} немає в графі")
+    cg = compile_graph(G)
+    G.edges[u, v]["weight"] = w
+    return _apply(G, cg, [(u, v, w)])
+
+
+def closed_edges(G: nx.Graph):
+    return [tuple(sorted(k)) for k in _closed(G)]
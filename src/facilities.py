@@ -0,0 +1,234 @@
+from __future__ import annotations
+import heapq
+import math
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from src.config import DATA_PATH
+    from src.graph_model import CompiledGraph, compile_graph, node_table
+    from src.pathfinding import repair_tree
+    from src.snapshot import load_graph
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/facilities.py
+    from config import DATA_PATH
+    from graph_model import CompiledGraph, compile_graph, node_table
+    from pathfinding import repair_tree
+    from snapshot import load_graph
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Найближчий об'єкт певного типу (вихід, сходи, туалет) для кожного вузла.
+# Один пошук Дейкстри, у якого в черзі одразу всі об'єкти типу з відстанню 0,
+# будує ліс найкоротших шляхів: для кожного вузла - відстань до найближчого
+# об'єкта, сам об'єкт і наступний вузол на шляху до нього (вказівники для
+# евакуаційних табличок). Таблиця кешується на скомпільованому графі для
+# кожного типу. Закриття об'єкта скидає лише вузли, що вели до нього, і
+# "підвішує" їх до сусідніх областей; відкриття - хвиля Дейкстри від об'єкта;
+# зміни ваг (dynamic) ремонтують ліс тим самим repair_tree, що й дерева.
+
+INF = math.inf
+
+
+class FacilityTable:
+    # dist[i] - відстань від вузла i до найближчого відкритого об'єкта, fac[i] -
+    # цей об'єкт (-1 - недосяжний), nxt[i] - наступний вузол шляху до нього
+    # (-1 у самого об'єкта). Списки, бо ремонти - цикли Python по малих ділянках.
+    __slots__ = ("type", "seeds", "dist", "nxt", "fac", "build_seconds")
+
+    def __init__(self, cg: CompiledGraph, ftype: str, seeds):
+        t0 = time.perf_counter()
+        self.type = ftype
+        self.seeds = set(seeds)
+        self.dist = [INF] * cg.n
+        self.nxt = [-1] * cg.n
+        self.fac = [-1] * cg.n
+        heap = []
+        for s in sorted(self.seeds):
+            self.dist[s] = 0.0
+            self.fac[s] = s
+            heap.append((0.0, s))
+        self._grow(cg, heap)
+        self.build_seconds = time.perf_counter() - t0
+
+    def _grow(self, cg: CompiledGraph, heap) -> int:
+        # хвиля Дейкстри від записів heap; мітка об'єкта переходить разом із відстанню
+        ptr, nbr, wt, _, _ = cg.lists()
+        dist, nxt, fac = self.dist, self.nxt, self.fac
+        pop, push = heapq.heappop, heapq.heappush
+        heapq.heapify(heap)
+        settled = 0
+        while heap:
+            d, u = pop(heap)
+            if d > dist[u]:
+                continue
+            settled += 1
+            f = fac[u]
+            for k in range(ptr[u], ptr[u + 1]):
+                v = nbr[k]
+                nd = d + wt[k]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    nxt[v] = u
+                    fac[v] = f
+                    push(heap, (nd, v))
+        return settled
+
+    def close(self, cg: CompiledGraph, nodes) -> int:
+        # Об'єкти nodes більше не цілі. Інші вузли свого найближчого не змінюють
+        # (відстані лише зросли б), тож скидаються тільки ті, що вели до закритих;
+        # вони отримують найкращого незачепленого сусіда і хвилю Дейкстри.
+        gone = self.seeds & set(nodes)
+        if not gone:
+            return 0
+        self.seeds -= gone
+        ptr, nbr, wt, _, _ = cg.lists()
+        dist, nxt, fac = self.dist, self.nxt, self.fac
+        affected = [x for x in range(cg.n) if fac[x] in gone]
+        for x in affected:
+            dist[x] = INF
+            nxt[x] = -1
+            fac[x] = -1
+        heap = []
+        for x in affected:
+            best, arg = INF, -1
+            for k in range(ptr[x], ptr[x + 1]):
+                y = nbr[k]
+                if fac[y] >= 0 and dist[y] + wt[k] < best:
+                    best, arg = dist[y] + wt[k], y
+            if arg >= 0:
+                dist[x] = best
+                nxt[x] = arg
+                fac[x] = fac[arg]
+                heap.append((best, x))
+        self._grow(cg, heap)
+        return len(affected)
+
+    def reopen(self, cg: CompiledGraph, nodes) -> int:
+        # нові (або знову відкриті) об'єкти: хвиля йде лише туди, де вони ближчі
+        new = set(nodes) - self.seeds
+        if not new:
+            return 0
+        self.seeds |= new
+        heap = []
+        for s in sorted(new):
+            self.dist[s] = 0.0
+            self.nxt[s] = -1
+            self.fac[s] = s
+            heap.append((0.0, s))
+        return self._grow(cg, heap)
+
+    def sync(self, cg: CompiledGraph, seeds) -> int:
+        # привести таблицю до набору відкритих об'єктів seeds різницею з поточним
+        seeds = set(seeds)
+        return self.close(cg, self.seeds - seeds) + self.reopen(cg, seeds - self.seeds)
+
+    def update(self, cg: CompiledGraph, changes) -> int:
+        # changes - [(i, j, стара вага, нова вага)], як у repair_tree; ліс - це
+        # дерево з кількома коренями, тож ремонт той самий, а мітки об'єктів
+        # після нього відновлюються проходом за вказівниками до кореня
+        touched = repair_tree(cg, self.dist, self.nxt, changes)
+        nxt = np.asarray(self.nxt, dtype=np.int64)
+        root = np.where(nxt >= 0, nxt, np.arange(cg.n))
+        while True:
+            up = root[root]
+            if np.array_equal(up, root):
+                break
+            root = up
+        self.fac = np.where(np.isfinite(self.dist), root, -1).tolist()
+        return touched
+
+    def nearest(self, i: int) -> Tuple[int, float, List[int]]:
+        # (об'єкт, відстань, шлях вузлами від i до об'єкта); об'єкт -1 - недосяжний
+        f = self.fac[i]
+        if f < 0:
+            return -1, INF, []
+        path = [i]
+        while self.nxt[path[-1]] >= 0:
+            path.append(self.nxt[path[-1]])
+        return f, self.dist[i], path
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (dist float64, fac int32, nxt int32) - уся таблиця масивами
+        return (np.array(self.dist, dtype=np.float64), np.array(self.fac, dtype=np.int32),
+                np.array(self.nxt, dtype=np.int32))
+
+
+def facility_nodes(G: nx.Graph, ftype: str) -> List[str]:
+    # відкриті об'єкти типу ftype (атрибут 'type'); закриті - у G.graph["closed_facilities"]
+    nt = node_table(G)
+    if ftype not in nt.types:
+        raise KeyError(f"Вузлів типу {ftype!r} немає в графі (є: {', '.join(nt.types)})")
+    closed = G.graph.get("closed_facilities", ())
+    code = nt.types.index(ftype)
+    return [nt.ids[i] for i in np.flatnonzero(nt.type == code).tolist() if nt.ids[i] not in closed]
+
+
+def facility_table(G, ftype: str, nodes=None) -> FacilityTable:
+    # Таблиця для типу ftype, один раз на скомпільований граф. nodes - відкриті
+    # об'єкти явно (обов'язково для CompiledGraph без атрибутів вузлів); якщо
+    # набір змінився, кешована таблиця доводиться до нього інкрементно.
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    if nodes is None:
+        if isinstance(G, CompiledGraph):
+            raise ValueError("Для CompiledGraph об'єкти передаються явно (nodes)")
+        nodes = facility_nodes(G, ftype)
+    seeds = {cg.idx(n) for n in nodes}
+    tables = cg.aux.setdefault("facilities", {})
+    table = tables.get(ftype)
+    if table is None:
+        table = tables[ftype] = FacilityTable(cg, ftype, seeds)
+    elif table.seeds != seeds:
+        table.sync(cg, seeds)
+    return table
+
+
+def nearest_facility(G, start: str, ftype: str, nodes=None) -> Tuple[str, List[str], float]:
+    # (найближчий об'єкт типу ftype, шлях від start до нього, довжина)
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    table = facility_table(G, ftype, nodes)
+    f, d, path = table.nearest(cg.idx(start))
+    if f < 0:
+        raise nx.NetworkXNoPath(f"Від {start} не досяжний жоден об'єкт типу {ftype}")
+    return cg.ids[f], [cg.ids[i] for i in path], float(d)
+
+
+def close_facility(G: nx.Graph, node: str) -> int:
+    # об'єкт перестає бути ціллю (вихід зачинено, туалет на ремонті) - сам вузол
+    # і коридори лишаються прохідними; повертає кількість перерахованих вузлів
+    if node not in G:
+        raise nx.NodeNotFound(f"Node {node} not found in graph")
+    closed = G.graph.setdefault("closed_facilities", set())
+    if node in closed:
+        return 0
+    closed.add(node)
+    cg = compile_graph(G)
+    return sum(t.close(cg, [cg.idx(node)]) for t in cg.aux.get("facilities", {}).values())
+
+
+def reopen_facility(G: nx.Graph, node: str) -> int:
+    closed = G.graph.get("closed_facilities", set())
+    if node not in closed:
+        return 0
+    closed.discard(node)
+    cg = compile_graph(G)
+    ftype = node_table(G).record(node).type
+    table = cg.aux.get("facilities", {}).get(ftype)
+    return table.reopen(cg, [cg.idx(node)]) if table is not None else 0
+
+
+def main():
+    G = load_graph(DATA_PATH)
+    nt = node_table(G)
+    for ftype in nt.types:
+        t = facility_table(G, ftype)
+        dist, _, _ = t.arrays()
+        reach = np.isfinite(dist)
+        print(f" {ftype}: {len(t.seeds)} об'єктів, досяжно {int(reach.sum())}/{len(dist)} вузлів, "
+              f"найдальший {dist[reach].max() if reach.any() else 0:.1f}; {t.build_seconds * 1000:.1f} мс")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+import argparse
 import json
+import os
+import random
+import shutil
+import tempfile
 from pathlib import Path
 
 # Крок сітки (умовні одиниці)
@@ -12,26 +17,29 @@ LBL = {
     "LIB":   "БІБЛ",
 }
 
-def add_node(nodes, _id, x, y, floor, ntype="room", label=None, wing=None):
-    nodes.append({
+def add_node(nodes, _id, x, y, floor, ntype="room", label=None, wing=None, building=None):
+    node = {
         "id": _id,
         "label": label if label else _id,
         "type": ntype,
         "floor": floor,
         "wing": wing,
         "pos": (x, y)
-    })
+    }
+    if building is not None:
+        node["building"] = building
+    nodes.append(node)
 
 def add_edge(edges, u, v, w=2):
     edges.append({"u": u, "v": v, "weight": float(w)})
 
-def corridor(nodes, edges, ids, x0, y0, floor, horizontal=True, wing=None):
+def corridor(nodes, edges, ids, x0, y0, floor, horizontal=True, wing=None, building=None):
     # створює ланцюжок аудиторій по сітці.
     prev = None
     for i, rid in enumerate(ids):
         x = x0 + (i * DX if horizontal else 0)
         y = y0 + (0 if horizontal else i * DY)
-        add_node(nodes, str(rid), x, y, floor, "room", str(rid), wing=wing)
+        add_node(nodes, str(rid), x, y, floor, "room", str(rid), wing=wing, building=building)
         if prev:
             add_edge(edges, prev, str(rid), 2)
         prev = str(rid)
@@ -113,13 +121,167 @@ def build_data():
 
     return {"nodes": nodes, "edges": edges}
 
-def main():
-    data = build_data()
-    out = Path(__file__).resolve().parents[1] / "data" / "data.json"
+# Параметричний кампус для навантажувальних тестів: кілька корпусів,
+# у кожному поверхи з паралельними коридорами аудиторій, сходові клітки й ліфти
+# між поверхами, туалет на кожному поверсі, вхід на першому, а між входами
+# корпусів - вуличні переходи. Будується тими самими add_node/add_edge/corridor.
+
+FLOOR_GAP = 6        # запас по y між поверхами понад коридори
+BUILDING_GAP = 20    # відстань по x між корпусами
+STAIR_W, ELEVATOR_W, ELEVATOR_WAIT = 4, 2, 5
+
+def campus_size(buildings, floors, corridors, rooms, stairwells, elevators):
+    per_floor = corridors * rooms + stairwells + elevators + 1
+    return buildings * (floors * per_floor + 1)
+
+def build_campus(nodes, edges, buildings=3, floors=4, corridors=2, rooms=20,
+                 stairwells=2, elevators=1, connectors=2, seed=0):
+    # nodes/edges - будь-що з .append: списки або потокові записувачі
+    rnd = random.Random(seed)
+    floor_dy = max(10, corridors * DY + FLOOR_GAP)
+    width = rooms * DX + BUILDING_GAP
+    exits = []
+    for b in range(buildings):
+        bid = f"B{b + 1}"
+        bx = b * width
+        for f in range(1, floors + 1):
+            fy = f * floor_dy
+            heads = []
+            for c in range(corridors):
+                ids = [f"{bid}-{f}-{c + 1}-{r + 1}" for r in range(rooms)]
+                corridor(nodes, edges, ids, bx, fy + c * DY, f, wing=f"{bid}-{c + 1}", building=bid)
+                heads.append(ids)
+            # коридори поверху з'єднані поперечними переходами з обох кінців
+            for a, z in zip(heads, heads[1:]):
+                add_edge(edges, a[0], z[0], DY)
+                add_edge(edges, a[-1], z[-1], DY)
+
+            main = heads[0]
+            for s in range(stairwells):
+                r = (s + 1) * rooms // (stairwells + 1)
+                sid = f"{bid}-S{s + 1}-{f}"
+                add_node(nodes, sid, bx + r * DX, fy - 1, f, "stair", f"S{s + 1}.{f}", building=bid)
+                add_edge(edges, sid, main[r], 3)
+                if f > 1:
+                    add_edge(edges, f"{bid}-S{s + 1}-{f - 1}", sid, STAIR_W)
+            for e in range(elevators):
+                r = min(rooms - 1, e * rooms // max(1, elevators) + rooms // (2 * max(1, elevators)))
+                eid = f"{bid}-E{e + 1}-{f}"
+                add_node(nodes, eid, bx + r * DX + 1, fy - 1, f, "elevator", f"L{e + 1}.{f}", building=bid)
+                add_edge(edges, eid, main[r], ELEVATOR_WAIT)
+                if f > 1:
+                    add_edge(edges, f"{bid}-E{e + 1}-{f - 1}", eid, ELEVATOR_W)
+            wc = f"{bid}-WC-{f}"
+            add_node(nodes, wc, bx + rooms * DX, fy, f, "toilet", f"WC{f}", building=bid)
+            add_edge(edges, wc, main[-1], 2)
+            if f == 1:
+                ex = f"{bid}-EXIT"
+                add_node(nodes, ex, bx - DX, fy, 1, "exit", f"ВХІД {bid}", building=bid)
+                add_edge(edges, ex, main[0], 2)
+                exits.append((ex, bx - DX))
+
+    # вуличні переходи: ланцюжок між сусідніми корпусами + випадкові додаткові
+    def outdoor(i, j):
+        (a, xa), (z, xz) = exits[i], exits[j]
+        add_edge(edges, a, z, abs(xa - xz) + rnd.randint(0, 10))
+    for i in range(len(exits) - 1):
+        outdoor(i, i + 1)
+    pairs = [(i, j) for i in range(len(exits)) for j in range(i + 2, len(exits))]
+    for i, j in rnd.sample(pairs, min(len(pairs), max(0, connectors - 1) * max(0, len(exits) - 2))):
+        outdoor(i, j)
+
+
+class _JsonArrayWriter:
+    # потоковий запис JSON-масиву: кожен append одразу серіалізується у файл
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def append(self, item):
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(item, ensure_ascii=False))
+        self.count += 1
+
+
+def write_campus_streaming(out, **params):
+    # Вузли пишуться у тимчасовий файл поруч з out, ребра - у ще один
+    # (spool), який наприкінці дописується в "edges": у пам'яті не тримаються
+    # списки. out замінюється атомарно лише після успішного запису, а
+    # тимчасові файли прибираються за будь-якого результату.
+    out = Path(out)
     out.parent.mkdir(parents=True, exist_ok=True)
-    with open(out, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f" Згенеровано {out}")
+    out_fd, out_tmp = tempfile.mkstemp(dir=out.parent, prefix=out.name + ".", suffix=".tmp")
+    spool_fd, spool_name = tempfile.mkstemp(dir=out.parent, suffix=".edges")
+    try:
+        with os.fdopen(out_fd, "w", encoding="utf-8") as f, \
+                os.fdopen(spool_fd, "w+", encoding="utf-8") as spool:
+            f.write('{"nodes": [')
+            nodes, edges = _JsonArrayWriter(f), _JsonArrayWriter(spool)
+            build_campus(nodes, edges, **params)
+            f.write('\n],\n"edges": [')
+            spool.seek(0)
+            shutil.copyfileobj(spool, f)
+            f.write("\n]}\n")
+        os.replace(out_tmp, out)
+    finally:
+        for name in (spool_name, out_tmp):
+            try:
+                os.unlink(name)
+            except FileNotFoundError:
+                pass
+    return nodes.count, edges.count
+
+def main():
+    ap = argparse.ArgumentParser(description="Генератор графа корпусу")
+    ap.add_argument("--out", type=Path, default=Path(__file__).resolve().parents[1] / "data" / "data.json")
+    ap.add_argument("--campus", action="store_true", help="параметричний кампус замість одного корпусу")
+    ap.add_argument("--buildings", type=int, default=3)
+    ap.add_argument("--floors", type=int, default=4)
+    ap.add_argument("--corridors", type=int, default=2, help="коридорів на поверсі")
+    ap.add_argument("--rooms", type=int, default=20, help="аудиторій у коридорі")
+    ap.add_argument("--stairwells", type=int, default=2)
+    ap.add_argument("--elevators", type=int, default=1)
+    ap.add_argument("--connectors", type=int, default=2, help="вуличних переходів на корпус")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--stream", action="store_true",
+                    help="писати потоково (вмикається сам від 100 000 вузлів)")
+    args = ap.parse_args()
+    out = args.out
+
+    if not args.campus:
+        data = build_data()
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f" Згенеровано {out}")
+        return
+
+    # некоректні розміри дали б IndexError (heads[0] без коридорів) або
+    # порожній чи розірваний кампус - краще одразу повідомлення argparse
+    for name in ("buildings", "floors", "corridors", "rooms"):
+        if getattr(args, name) < 1:
+            ap.error(f"--{name} має бути не менше 1")
+    for name in ("stairwells", "elevators", "connectors"):
+        if getattr(args, name) < 0:
+            ap.error(f"--{name} не може бути від'ємним")
+    if args.floors > 1 and args.stairwells + args.elevators == 0:
+        ap.error("кілька поверхів потребують хоча б одних сходів чи ліфта (--stairwells/--elevators)")
+
+    params = dict(buildings=args.buildings, floors=args.floors, corridors=args.corridors,
+                  rooms=args.rooms, stairwells=args.stairwells, elevators=args.elevators,
+                  connectors=args.connectors, seed=args.seed)
+    size = campus_size(args.buildings, args.floors, args.corridors, args.rooms,
+                       args.stairwells, args.elevators)
+    if args.stream or size >= 100_000:
+        n, m = write_campus_streaming(out, **params)
+    else:
+        nodes, edges = [], []
+        build_campus(nodes, edges, **params)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"nodes": nodes, "edges": edges}, f, ensure_ascii=False, indent=2)
+        n, m = len(nodes), len(edges)
+    print(f" Згенеровано {out}: {n} вузлів, {m} ребер")
 
 if __name__ == "__main__":
     main()
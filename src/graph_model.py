@@ -1,26 +1,413 @@
+from __future__ import annotations
 import json
-import networkx as nx
+import itertools
+from array import array
+import numpy as np
+
+try:
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+def _node_attrs(n: dict) -> dict:
+    node_id = n["id"]
+    return dict(
+        label=n.get("label", node_id),
+        type=n.get("type", "room"),
+        floor=n.get("floor"),
+        wing=n.get("wing"),
+        building=n.get("building"),
+        pos=tuple(n.get("pos", (0, 0)))
+    )
+
+def new_graph() -> nx.Graph:
+    # CampusGraph імпортується лише тут, при першій побудові графа
+    try:
+        from src.campus_graph import CampusGraph
+    except ImportError:  # запуск як скрипт: python src/main.py
+        from campus_graph import CampusGraph
+    return CampusGraph()
+
+
+def _stamp(G) -> tuple:
+    # ключ кешів у G.graph: (версія графа, кількість вузлів, кількість ребер).
+    # Звичайний nx.Graph версії не має - для нього лише кількості
+    return getattr(G, "version", 0), G.number_of_nodes(), G.number_of_edges()
+
 
 def build_graph(data: dict) -> nx.Graph:
     
-    G = nx.Graph()
+    G = new_graph()
     # додавання вузлів
     for n in data["nodes"]:
-        node_id = n["id"]
-        pos = tuple(n.get("pos", (0, 0)))
-        G.add_node(
-            node_id,
-            label=n.get("label", node_id),
-            type=n.get("type", "room"),
-            floor=n.get("floor"),
-            wing=n.get("wing"),
-            pos=pos
-        )
+        G.add_node(n["id"], **_node_attrs(n))
     # додавання ребер
     for e in data["edges"]:
         u, v, w = e["u"], e["v"], float(e.get("weight", 1.0))
         G.add_edge(u, v, weight=w)
     return G
 
+def build_graph_streaming(items) -> nx.Graph:
+    # те саме, що build_graph, але з потоку ("node"|"edge", dict)
+    # (data_loader.iter_graph_items) - без проміжного словника всього документа
+    G = new_graph()
+    for kind, item in items:
+        if kind == "node":
+            G.add_node(item["id"], **_node_attrs(item))
+        else:
+            G.add_edge(item["u"], item["v"], weight=float(item.get("weight", 1.0)))
+    return G
+
 def node_exists(G: nx.Graph, node: str) -> bool:
-    return node in G.nodes
\ No newline at end of file
+    return node in G.nodes
+
+
+def categorical(values):
+    # категоріальні коди: categories[code] - значення (None дозволено)
+    codes = {}
+    out = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int16, count=len(values))
+    return out, list(codes)
+
+
+class NodeRecord:
+    # атрибути одного вузла як запис (замість dict networkx)
+    __slots__ = ("id", "label", "type", "floor", "wing", "building", "pos")
+
+    def __init__(self, id, label, type, floor, wing, building, pos):
+        self.id = id
+        self.label = label
+        self.type = type
+        self.floor = floor
+        self.wing = wing
+        self.building = building
+        self.pos = pos
+
+
+class NodeTable:
+    # Колонкове сховище атрибутів вузлів, зібране один раз: рядок i - вузол ids[i]
+    # (порядок G.nodes, той самий, що в CompiledGraph). floor - int32 (-1 - без
+    # поверху), wing/type/building - коди int16 у списки категорій, pos - n x 2.
+    # Подання для поверху (номери рядків, id, координати, підписи) рахуються
+    # при першому зверненні й кешуються; floor None або "all" - усі вузли.
+    __slots__ = ("ids", "index", "label", "pos", "has_pos", "floor", "wing", "wings",
+                 "type", "types", "building", "buildings", "order", "_rows", "_views")
+
+    def __init__(self, ids, label, pos, floor, wing, wings, ntype, types, building, buildings,
+                 has_pos=None):
+        self.ids = list(ids)
+        self.index = {n: i for i, n in enumerate(self.ids)}
+        self.label = list(label)
+        self.pos = np.asarray(pos, dtype=np.float64).reshape(len(self.ids), 2)
+        self.has_pos = np.ones(len(self.ids), dtype=bool) if has_pos is None else has_pos
+        self.floor = np.asarray(floor, dtype=np.int32)
+        self.wing, self.wings = wing, list(wings)
+        self.type, self.types = ntype, list(types)
+        self.building, self.buildings = building, list(buildings)
+        # порядок списків вибору: поверх, крило, тип, підпис (рівні - за порядком вузлів)
+        wrank = _ranks([w or "" for w in self.wings])
+        trank = _ranks([t or "room" for t in self.types])
+        lrank = np.unique(np.array([str(x) for x in self.label], dtype=object), return_inverse=True)[1]
+        self.order = np.lexsort((lrank.reshape(-1), trank[self.type], wrank[self.wing],
+                                 np.maximum(self.floor, 0)))
+        # рядки кожного поверху за зростанням номера рядка
+        by_floor = np.argsort(self.floor, kind="stable")
+        values, starts = np.unique(self.floor[by_floor], return_index=True)
+        self._rows = dict(zip(values.tolist(), np.split(by_floor, starts[1:])))
+        self._views = {}
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+    @property
+    def floors(self) -> list:
+        return [f for f in self._rows if f >= 0]
+
+    def values(self, name: str) -> list:
+        # колонка як список значень (коди розкодовано, -1 поверху -> None)
+        if name == "floor":
+            return [None if f < 0 else f for f in self.floor.tolist()]
+        codes, cats = getattr(self, name), getattr(self, name + "s")
+        return [cats[c] for c in codes.tolist()]
+
+    def record(self, node) -> NodeRecord:
+        i = self.index[node]
+        f = int(self.floor[i])
+        return NodeRecord(node, self.label[i], self.types[self.type[i]], None if f < 0 else f,
+                          self.wings[self.wing[i]], self.buildings[self.building[i]],
+                          tuple(self.pos[i].tolist()))
+
+    def _view(self, kind: str, floor, make):
+        key = (kind, None if floor == "all" else floor)
+        v = self._views.get(key)
+        if v is None:
+            v = self._views[key] = make(self.rows(key[1]))
+        return v
+
+    def rows(self, floor=None) -> np.ndarray:
+        if floor is None or floor == "all":
+            return np.arange(self.n)
+        return self._rows.get(floor, np.empty(0, dtype=np.int64))
+
+    def ids_on(self, floor=None) -> list:
+        return self._view("ids", floor, lambda r: [self.ids[i] for i in r.tolist()])
+
+    def pos_on(self, floor=None) -> np.ndarray:
+        return self._view("pos", floor, lambda r: self.pos[r])
+
+    def pos_dict(self, floor=None) -> dict:
+        # {id: (x, y)} для networkx/matplotlib; спільний для всіх викликів - не змінювати
+        return self._view("pos_dict", floor, lambda r: dict(zip(
+            self.ids_on(floor), map(tuple, self.pos[r].tolist()))))
+
+    def labels_dict(self, floor=None) -> dict:
+        return self._view("labels", floor, lambda r: {self.ids[i]: self.label[i] for i in r.tolist()})
+
+
+def _ranks(names) -> np.ndarray:
+    # номер кожної категорії в алфавітному порядку назв
+    order = sorted(range(len(names)), key=lambda i: str(names[i]))
+    rank = np.empty(max(len(names), 1), dtype=np.int32)
+    rank[order] = np.arange(len(names))
+    return rank
+
+
+def node_table(G: nx.Graph) -> NodeTable:
+    # будується один раз за прохід по вузлах і кешується в G.graph до зміни
+    # версії графа чи кількості вузлів (зміни ребер його не зачіпають)
+    nt = G.graph.get("_nodes")
+    if nt is not None and G.graph.get("_nodes_at") == _stamp(G)[:2]:
+        return nt
+    ids, label, floor, wing, ntype, building, pos, has_pos = [], [], [], [], [], [], [], []
+    for n, d in G.nodes(data=True):
+        ids.append(n)
+        label.append(d.get("label", n))
+        f = d.get("floor")
+        floor.append(-1 if f is None else f)
+        wing.append(d.get("wing"))
+        ntype.append(d.get("type", "room"))
+        building.append(d.get("building"))
+        # "pos": [x, y] - формат генератора; x/y - старий формат
+        p = d.get("pos")
+        if isinstance(p, (tuple, list)) and len(p) == 2:
+            pos.append(p)
+            has_pos.append(True)
+        elif "x" in d and "y" in d:
+            pos.append((d["x"], d["y"]))
+            has_pos.append(True)
+        else:
+            pos.append((0.0, 0.0))
+            has_pos.append(False)
+    nt = NodeTable(ids, label, np.array(pos, dtype=np.float64), floor, *categorical(wing),
+                   *categorical(ntype), *categorical(building), has_pos=np.array(has_pos, dtype=bool))
+    G.graph["_nodes"] = nt
+    G.graph["_nodes_at"] = _stamp(G)[:2]
+    return nt
+
+
+# кожен стан скомпільованого графа отримує новий номер версії -
+# ключ для кешів, що залежать від структури та ваг
+_versions = itertools.count(1)
+
+
+class CompiledGraph:
+    # Компактне подання графа для пошуку: id вузлів інтерновано в int (0..n-1),
+    # ребра упаковано в CSR-масиви: сусіди вузла i - indices[indptr[i]:indptr[i+1]],
+    # їхні ваги - weights[...]. Неорієнтоване ребро зберігається в обидва боки.
+    # part[i] - номер розділу (корпус, поверх) вузла i, part_keys[номер] - сам ключ.
+    # n_edges - кількість ребер у CSR (indptr[-1] // 2), разом із закритими (вага inf).
+    __slots__ = ("ids", "index", "indptr", "indices", "weights", "pos", "n_edges", "part", "part_keys",
+                 "version", "table", "aux", "_lists")
+
+    def __init__(self, ids, indptr, indices, weights, pos, n_edges, part=None, part_keys=None):
+        self.ids = list(ids)
+        self.index = {n: i for i, n in enumerate(self.ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.pos = pos
+        self.n_edges = n_edges
+        if part is None:
+            part, part_keys = np.zeros(len(self.ids), dtype=np.int32), [(None, None)]
+        self.part = part
+        self.part_keys = list(part_keys)
+        self.version = next(_versions)
+        # передобчислена таблиця маршрутів (precompute.PathTable), якщо підключена
+        self.table = None
+        # похідні структури для окремих алгоритмів (ієрархія скорочень тощо)
+        self.aux = {}
+        self._lists = None
+
+    def __getstate__(self):
+        # у інший процес їдуть лише масиви; списки, таблиця й кеші - локальні
+        return (self.ids, self.indptr, self.indices, self.weights, self.pos,
+                self.n_edges, self.part, self.part_keys, self.version)
+
+    def __setstate__(self, state):
+        (ids, self.indptr, self.indices, self.weights, self.pos, self.n_edges,
+         self.part, self.part_keys, self.version) = state
+        self.ids = list(ids)
+        self.index = {n: i for i, n in enumerate(self.ids)}
+        self.table = None
+        self.aux = {}
+        self._lists = None
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+    def idx(self, node) -> int:
+        i = self.index.get(node)
+        if i is None:
+            raise nx.NodeNotFound(f"Node {node} not found in graph")
+        return i
+
+    def set_weight(self, i: int, j: int, w: float) -> float:
+        # правка ваги ребра i-j на місці (обидва напрямки CSR) без перекомпіляції;
+        # повертає попередню вагу. inf - ребро закрите.
+        old = None
+        for a, b in ((i, j), (j, i)):
+            lo, hi = self.indptr[a], self.indptr[a + 1]
+            ks = lo + np.nonzero(self.indices[lo:hi] == b)[0]
+            if len(ks) == 0:
+                raise KeyError(f"Ребра {self.ids[i]}-{self.ids[j]} немає в графі")
+            old = float(self.weights[ks[0]])
+            self.weights[ks] = w
+            if self._lists is not None:
+                for k in ks.tolist():
+                    self._lists[2][k] = w
+        return old
+
+    def bump(self) -> int:
+        # новий номер версії після правок на місці
+        self.version = next(_versions)
+        return self.version
+
+    def lists(self):
+        # гарячі цикли пошуку індексують поелементно - на звичайних списках
+        # це в рази швидше, ніж на скалярах NumPy, тому копії робимо один раз
+        if self._lists is None:
+            self._lists = (
+                self.indptr.tolist(),
+                self.indices.tolist(),
+                self.weights.tolist(),
+                self.pos[:, 0].tolist(),
+                self.pos[:, 1].tolist(),
+            )
+        return self._lists
+
+
+def partitions(keys):
+    # ключі (корпус, поверх) по вузлах -> (номери розділів int32, список ключів)
+    codes = {}
+    part = np.fromiter((codes.setdefault(k, len(codes)) for k in keys), dtype=np.int32)
+    return part, list(codes)
+
+
+def _csr(ids, us, vs, ws, pos, part=None, part_keys=None) -> CompiledGraph:
+    # список ребер (кожне один раз) -> CSR в обидва боки
+    m = len(us)
+    src = np.concatenate([us, vs])
+    dst = np.concatenate([vs, us])
+    w = np.concatenate([ws, ws])
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(ids)), out=indptr[1:])
+    return CompiledGraph(ids, indptr, dst[order], w[order], pos, m, part, part_keys)
+
+
+def compile_graph(G: nx.Graph) -> CompiledGraph:
+    # будує CSR-подання один раз і кешує його в G.graph до зміни версії графа
+    # (dynamic, touch) чи кількості вузлів або ребер
+    cg = G.graph.get("_compiled")
+    if cg is not None and G.graph.get("_compiled_at") == _stamp(G):
+        return cg
+
+    ids = list(G.nodes)
+    index = {n: i for i, n in enumerate(ids)}
+    m = G.number_of_edges()
+
+    us = np.empty(m, dtype=np.int32)
+    vs = np.empty(m, dtype=np.int32)
+    ws = np.empty(m, dtype=np.float64)
+    for k, (u, v, w) in enumerate(G.edges(data="weight", default=1.0)):
+        us[k], vs[k], ws[k] = index[u], index[v], w
+
+    # координати й розділи - з колонкового сховища (той самий порядок вузлів)
+    nt = node_table(G)
+    pos = nt.pos.copy()
+    part, part_keys = partitions(zip(nt.values("building"), nt.values("floor")))
+
+    cg = _csr(ids, us, vs, ws, pos, part, part_keys)
+    mark_compiled(G, cg)
+    return cg
+
+
+def mark_compiled(G: nx.Graph, cg: CompiledGraph, nt: NodeTable | None = None) -> None:
+    # cg (і nt) відповідають поточному стану G: після збірки, зі знімка або коли
+    # ту саму правку внесено і в G, і в cg на місці (dynamic)
+    stamp = _stamp(G)
+    G.graph["_compiled"] = cg
+    G.graph["_compiled_at"] = stamp
+    if nt is not None:
+        G.graph["_nodes"] = nt
+        G.graph["_nodes_at"] = stamp[:2]
+
+
+def bump_version(G: nx.Graph) -> int:
+    # новий номер версії графа після правки; звичайний nx.Graph теж отримує атрибут
+    G.version = getattr(G, "version", 0) + 1
+    return G.version
+
+
+def touch(G: nx.Graph) -> None:
+    # позначає граф зміненим - обов'язково після правки ваг чи атрибутів напряму
+    # (G.edges[u, v]["weight"] = w): кількості вузлів і ребер тоді ті самі, тож
+    # без нової версії compile_graph і node_table повернули б застарілий кеш
+    bump_version(G)
+    G.graph.pop("_compiled", None)
+    G.graph.pop("_nodes", None)
+
+
+def compile_items(items):
+    # (CompiledGraph, NodeTable) прямо з потоку ("node"|"edge", dict), оминаючи
+    # nx.Graph: атрибути й ребра накопичуються в компактних колонках і array('i'/'d'),
+    # а не в словниках networkx. Повтори поводяться як у build_graph_streaming:
+    # атрибути вузла і вага ребра - з останнього запису.
+    ids, index = [], {}
+    label, floor, wing, ntype, building = [], [], [], [], []
+    xs, ys = array("d"), array("d")
+    us, vs, ws = array("i"), array("i"), array("d")
+    for kind, item in items:
+        if kind == "node":
+            a = _node_attrs(item)
+            i = index.get(item["id"])
+            if i is None:
+                i = index[item["id"]] = len(ids)
+                ids.append(item["id"])
+                for col in (label, floor, wing, ntype, building):
+                    col.append(None)
+                xs.append(0.0)
+                ys.append(0.0)
+            label[i], wing[i], ntype[i], building[i] = a["label"], a["wing"], a["type"], a["building"]
+            floor[i] = -1 if a["floor"] is None else a["floor"]
+            xs[i], ys[i] = a["pos"]
+        else:
+            us.append(index[item["u"]])
+            vs.append(index[item["v"]])
+            ws.append(float(item.get("weight", 1.0)))
+    u = np.frombuffer(us, dtype=np.int32)
+    v = np.frombuffer(vs, dtype=np.int32)
+    w = np.frombuffer(ws, dtype=np.float64)
+    # одне ребро на пару вузлів (остання вага), у порядку першої появи пари
+    key = np.minimum(u, v).astype(np.int64) * max(len(ids), 1) + np.maximum(u, v)
+    _, first = np.unique(key, return_index=True)
+    _, last = np.unique(key[::-1], return_index=True)
+    order = np.argsort(first)
+    keep, take = first[order], (len(key) - 1 - last)[order]
+    pos = np.column_stack([np.frombuffer(xs, dtype=np.float64), np.frombuffer(ys, dtype=np.float64)])
+    nt = NodeTable(ids, label, pos, floor, *categorical(wing), *categorical(ntype), *categorical(building))
+    part = partitions(zip(building, nt.values("floor")))
+    return _csr(ids, u[keep], v[keep], w[take], pos, *part), nt
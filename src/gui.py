@@ -1,19 +1,38 @@
+import multiprocessing as mp
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 from pathlib import Path
 import networkx as nx
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection
 from matplotlib.figure import Figure
 
-from src.config import DATA_PATH, DRAW_WEIGHTS, DEFAULT_ALGO
-from src.data_loader import load_graph_from_json
-from src.graph_model import build_graph
-from src.pathfinding import dijkstra_path, astar_path
+from src.config import DATA_PATH, DRAW_WEIGHTS, DEFAULT_ALGO, DEBUG, ALT_ROUTES, ALT_MAX_OVERLAP, REACH_CUTOFF
+from src.snapshot import load_graph
+from src.graph_model import compile_graph, node_table
+from src.pathfinding import SEARCH_TOTALS
+from src.precompute import load_table, attach_table
+from src.facilities import close_facility, facility_nodes, reopen_facility
+from src.routing import algo_title, init_worker, worker_facility, worker_reach, worker_route, worker_tour
+from src.spatial import spatial_index
+from src.visualization import heat_layer
 
 FLOOR_TABS = [1, 2, 3, "all"]  # 4-та вкладка = усі поверхи
+POLL_MS = 16  # опитування фонового пошуку ~60 разів на секунду
+# скільки скасований пошук може ще доробляти, поки новий чекає за ним у черзі
+# процесу; довше - процес перезапускається (з пересиланням графа і втратою кешів)
+CANCEL_GRACE_S = 1.5
+# кольори альтернативних маршрутів (пунктир під основним) і їхні назви для панелі результату
+ALT_COLORS = [("#fb8c00", "помаранчевий"), ("#8e24aa", "фіолетовий"),
+              ("#00897b", "бірюзовий"), ("#6d4c41", "коричневий")]
+STOP_COLOR = "#fdd835"  # номери зупинок обходу
 
 class FloorPlot(ttk.Frame):
+    # Вкладка поверху у два шари: статична карта (вузли, підписи, ваги) малюється
+    # один раз і кешується як фон Agg (copy_from_bbox), а маршрут - анімовані
+    # артисти, які перемальовуються поверх відновленого фону (blit).
     def __init__(self, master, title=""):
         super().__init__(master)
         self.fig = Figure(figsize=(7, 4.5), dpi=100)
@@ -22,77 +41,150 @@ class FloorPlot(ttk.Frame):
         self.ax.set_title(title)
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    def draw_subgraph(self, G: nx.Graph, floor: int | None, path=None, draw_weights=True):
+        self.has_base = False
+        self.nodes = set()
+        self.pos = {}
+        self.labels = {}
+        self.path = None
+        self.alts = None
+        self.stops = None
+        self.heat = None
+        self._background = None
+        self._overlay = []
+        # повне перемальовування (перший показ, зміна розміру) оновлює кеш фону
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        # клік по карті: on_click(x, y, кнопка миші) у координатах 'pos'
+        self.on_click = None
+        self.canvas.mpl_connect("button_press_event", self._on_press)
+
+    def _on_press(self, event):
+        if self.on_click is not None and event.inaxes is self.ax and event.xdata is not None:
+            self.on_click(event.xdata, event.ydata, event.button)
+
+    def draw_base(self, G: nx.Graph, floor: int | None, draw_weights=True):
+        self._clear_overlay()
         self.ax.clear()
         self.ax.axis("off")
+        self._background = None
+        self.has_base = True
 
-        if floor == "all" or floor is None:
-            nodes = list(G.nodes)
-        else:
-            nodes = [n for n, d in G.nodes(data=True) if d.get("floor") == floor]
+        # вузли, координати й підписи поверху - готові подання колонкового сховища
+        nt = node_table(G)
+        nodes = nt.ids_on(floor)
+        self.nodes = set(nodes)
 
-        subG = G.subgraph(nodes).copy()
         if not nodes:
+            self.pos, self.labels = {}, {}
             self.ax.set_title("Немає вузлів для відображення")
             self.canvas.draw_idle()
             return
 
-        if all("pos" in G.nodes[n] for n in nodes):
-            pos = {n: G.nodes[n]["pos"] for n in nodes}
+        # представлення підграфа без копіювання атрибутів
+        subG = G.subgraph(nodes)
+        if nt.has_pos[nt.rows(floor)].all():
+            self.pos = nt.pos_dict(floor)
         else:
-            pos = nx.spring_layout(subG, seed=7)
+            self.pos = nx.spring_layout(subG, seed=7)
 
-        labels = {n: G.nodes[n].get("label", n) for n in nodes}
-        nx.draw(subG, pos, with_labels=True, labels=labels,
+        self.labels = nt.labels_dict(floor)
+        nx.draw(subG, self.pos, with_labels=True, labels=self.labels,
                 node_size=650, node_color="#cde6ff", font_size=9, ax=self.ax)
 
         if draw_weights:
             el = nx.get_edge_attributes(subG, "weight")
-            nx.draw_networkx_edge_labels(subG, pos, edge_labels=el, font_size=8, ax=self.ax)
-
-        if path:
-            p = [n for n in path if n in subG.nodes]
-            if len(p) > 1:
-                # маршрут позначається червоним кольором
-                nx.draw_networkx_edges(
-                    subG, pos,
-                    edgelist=list(zip(p, p[1:])),
-                    width=3.5,
-                    edge_color="#e53935",  
-                    ax=self.ax
-                )
-
-                # початок маршруту позначений синім кольором
-                start_node = p[0]
-                nx.draw_networkx_nodes(
-                    subG, pos,
-                    nodelist=[start_node],
-                    node_color="#29b6f6",  
-                    node_size=700,
-                    edgecolors="black",
-                    linewidths=1.5,
-                    ax=self.ax
-                )
-
-                # кінць маршруту позначений зеленим кольором
-                end_node = p[-1]
-                nx.draw_networkx_nodes(
-                    subG, pos,
-                    nodelist=[end_node],
-                    node_color="#43a047",  
-                    node_size=700,
-                    edgecolors="black",
-                    linewidths=1.5,
-                    ax=self.ax
-                )    
-
+            nx.draw_networkx_edge_labels(subG, self.pos, edge_labels=el, font_size=8, ax=self.ax)
 
         t = "Усі поверхи" if floor == "all" else f"Поверх {floor}"
         self.ax.set_title(t)
         self.fig.tight_layout()
         self.canvas.draw_idle()
 
+    def draw_subgraph(self, G: nx.Graph, floor: int | None, path=None, draw_weights=True, alternatives=None,
+                      stops=None, heat=None):
+        self.draw_base(G, floor, draw_weights)
+        self.set_route(path, alternatives, stops, heat)
+
+    def _clear_overlay(self):
+        for a in self._overlay:
+            a.remove()
+        self._overlay = []
+
+    def set_route(self, path, alternatives=None, stops=None, heat=None):
+        # лише шар маршруту: старі артисти знімаються, нові малюються поверх фону;
+        # alternatives - [(path, dist)] інших маршрутів, пунктиром під основним;
+        # stops - зупинки обходу в порядку відвідування (номери над вузлами);
+        # heat - ({вузол: відстань}, межа) досяжності, теплова карта під маршрутом
+        self.path = path
+        self.alts = alternatives
+        self.stops = stops
+        self.heat = heat
+        self._clear_overlay()
+        ax, pos = self.ax, self.pos
+        if heat is not None:
+            reach, cutoff = heat
+            hot = [n for n in reach if n in self.nodes]
+            if hot:
+                self._overlay.append(heat_layer(ax, [pos[n] for n in hot], [reach[n] for n in hot],
+                                                cutoff, size=650, animated=True))
+                for n in hot:
+                    x, y = pos[n]
+                    self._overlay.append(ax.text(x, y, str(self.labels.get(n, n)), fontsize=9,
+                                                 ha="center", va="center", animated=True))
+        for i, (alt, _) in enumerate(alternatives or []):
+            segs = [(pos[a], pos[b]) for a, b in zip(alt, alt[1:]) if a in self.nodes and b in self.nodes]
+            if segs:
+                self._overlay.append(ax.add_collection(LineCollection(
+                    segs, linewidths=2.5, linestyles="--", colors=ALT_COLORS[i % len(ALT_COLORS)][0],
+                    animated=True)))
+        p = [n for n in (path or []) if n in self.nodes]
+        if len(p) > 1:
+            # маршрут позначається червоним кольором; вузли маршруту з підписами
+            # повторюються над ним, як на карті під лінією
+            segs = [(pos[a], pos[b]) for a, b in zip(p, p[1:])]
+            self._overlay.append(ax.add_collection(
+                LineCollection(segs, linewidths=3.5, colors="#e53935", animated=True)))
+            xy = [pos[n] for n in p]
+            self._overlay.append(ax.scatter([x for x, _ in xy], [y for _, y in xy],
+                                            s=650, c="#cde6ff", animated=True))
+            # початок маршруту позначений синім кольором, кінець - зеленим
+            for n, color in ((p[0], "#29b6f6"), (p[-1], "#43a047")):
+                x, y = pos[n]
+                self._overlay.append(ax.scatter([x], [y], s=700, c=color, edgecolors="black",
+                                                linewidths=1.5, animated=True))
+            for n in p:
+                x, y = pos[n]
+                self._overlay.append(ax.text(x, y, str(self.labels.get(n, n)), fontsize=9,
+                                             ha="center", va="center", animated=True))
+        # номер зупинки - жовта мітка над правим верхнім краєм вузла; вузол,
+        # через який обхід проходить кілька разів, має кілька номерів
+        numbers = {}
+        for i, n in enumerate(stops or []):
+            if n in self.nodes:
+                numbers.setdefault(n, []).append(str(i + 1))
+        for n, nums in numbers.items():
+            x, y = pos[n]
+            self._overlay.append(ax.annotate(
+                ",".join(nums), (x, y), xytext=(10, 10), textcoords="offset points", fontsize=8,
+                fontweight="bold", ha="center", va="center", animated=True,
+                bbox=dict(boxstyle="circle,pad=0.25", fc=STOP_COLOR, ec="black", lw=1)))
+        self._blit()
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for a in self._overlay:
+            self.ax.draw_artist(a)
+
+    def _blit(self):
+        if self._background is None:
+            # фон ще не відмальовано (вкладку не показували) - артисти
+            # потраплять на полотно в _on_draw після першого повного малювання
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        for a in self._overlay:
+            self.ax.draw_artist(a)
+        self.canvas.blit(self.fig.bbox)
+
 class PathfinderGUI(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -105,29 +197,48 @@ class PathfinderGUI(tk.Tk):
             self.destroy()
             return
 
-        data = load_graph_from_json(DATA_PATH)
-        self.G = build_graph(data)
+        # великий JSON без знімка розбирається потоково - смуга показує хід
+        loading = ttk.Frame(self, padding=20)
+        loading.pack(expand=True)
+        ttk.Label(loading, text="Завантаження графа...").pack()
+        bar = ttk.Progressbar(loading, mode="determinate", length=320, maximum=1.0)
+        bar.pack(pady=6)
+
+        def on_progress(done, total, nodes, edges):
+            bar["value"] = done / max(total, 1)
+            self.update_idletasks()
+
+        self.G = load_graph(DATA_PATH, on_progress, stats=SEARCH_TOTALS if DEBUG else None)
+        loading.destroy()
+        attach_table(self.G, load_table(DATA_PATH, self.G.graph.get("sha256")))
         self.nodes_sorted = self._sorted_nodes()
+        self.display = {n: d for d, n in self.nodes_sorted}
+        # найближчий вузол до точки кліку на карті поверху
+        self.spatial = spatial_index(self.G)
+
+        # пошук іде в окремому процесі: вікно не блокується, а результат
+        # застарілого пошуку просто відкидається (див. _cancel)
+        self.pool = None
+        self.job = None
+        self.job_gen = 0
+        self.stale = []
+        self.reach_query = None
+        self._start_pool()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self._build_controls()
         self._build_tabs()
         self._redraw_all(path=None)
 
     def _sorted_nodes(self):
-        def keyf(n):
-            d = self.G.nodes[n]
-            floor = d.get("floor", 0) or 0               
-            wing  = d.get("wing") or ""                  
-            typ   = d.get("type") or "room"              
-            label = str(d.get("label", n))
-            return (int(floor), wing, typ, label)
-
+        # порядок (поверх, крило, тип, підпис) уже пораховано в сховищі атрибутів
+        nt = node_table(self.G)
         result = []
-        for n in sorted(self.G.nodes, key=keyf):
-            lab = str(self.G.nodes[n].get("label", n))
+        for i in nt.order.tolist():
+            n, lab = nt.ids[i], str(nt.label[i])
             display = f"{n} — {lab}" if lab != n else n
             result.append((display, n))
-        return result    
+        return result
 
 
     def _build_controls(self):
@@ -153,20 +264,77 @@ class PathfinderGUI(tk.Tk):
         self.algo_var = tk.StringVar(value=DEFAULT_ALGO)
         ttk.Radiobutton(algo, text="Dijkstra", value="dijkstra", variable=self.algo_var).pack(side=tk.LEFT, padx=6)
         ttk.Radiobutton(algo, text="A*",       value="astar",    variable=self.algo_var).pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(algo, text="ALT",      value="alt",      variable=self.algo_var).pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(algo, text="CH",       value="ch",       variable=self.algo_var).pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(algo, text="Bi-Dijkstra", value="bidijkstra", variable=self.algo_var).pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(algo, text="Bi-A*",    value="biastar",  variable=self.algo_var).pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(algo, text="Поверхи",  value="hier",     variable=self.algo_var).pack(side=tk.LEFT, padx=6)
 
         btns = ttk.Frame(top)
         btns.grid(row=0, column=5, padx=10)
         ttk.Button(btns, text="Побудувати маршрут", command=self._on_build).pack(fill=tk.X, pady=1)
         ttk.Button(btns, text="Очистити", command=self._on_clear).pack(fill=tk.X, pady=1)
+        # скільки маршрутів показати: найкоротший і альтернативи до нього
+        alts = ttk.Frame(top)
+        alts.grid(row=0, column=6, padx=5)
+        ttk.Label(alts, text="Маршрутів:").pack(side=tk.LEFT)
+        self.k_var = tk.IntVar(value=ALT_ROUTES)
+        ttk.Spinbox(alts, from_=1, to=1 + len(ALT_COLORS), width=3, textvariable=self.k_var,
+                    state="readonly").pack(side=tk.LEFT, padx=3)
+        ttk.Label(top, text="На карті: ліва кнопка - початок, права - кінець і маршрут, "
+                            "середня - зупинка обходу",
+                  foreground="#555").grid(row=1, column=0, columnspan=4, sticky="w", pady=(4, 0))
+
+        # обхід кількох зупинок від початку в найкращому порядку
+        tour = ttk.Frame(top)
+        tour.grid(row=1, column=4, columnspan=3, sticky="w", pady=(4, 0))
+        self.stops = []
+        self.stops_var = tk.StringVar(value="Зупинок: 0")
+        ttk.Label(tour, textvariable=self.stops_var).pack(side=tk.LEFT)
+        ttk.Button(tour, text="+ кінець", command=self._on_add_stop).pack(side=tk.LEFT, padx=3)
+        ttk.Button(tour, text="Скинути", command=self._on_clear_stops).pack(side=tk.LEFT, padx=3)
+        self.round_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tour, text="з поверненням", variable=self.round_var).pack(side=tk.LEFT, padx=3)
+        ttk.Button(tour, text="Обійти", command=self._on_tour).pack(side=tk.LEFT, padx=3)
+
+        # досяжність: усі вузли не далі межі від початку (або від зупинок, якщо вони є)
+        reach = ttk.Frame(top)
+        reach.grid(row=1, column=7, sticky="w", pady=(4, 0))
+        ttk.Label(reach, text="Зона до:").pack(side=tk.LEFT)
+        self.cutoff_var = tk.DoubleVar(value=REACH_CUTOFF)
+        ttk.Spinbox(reach, from_=1, to=1000, increment=5, width=5,
+                    textvariable=self.cutoff_var).pack(side=tk.LEFT, padx=3)
+        ttk.Button(reach, text="Показати", command=self._on_reach).pack(side=tk.LEFT, padx=3)
+
+        # найближчий об'єкт типу (вихід, сходи, туалет) від початку; кінець можна
+        # позначити закритим об'єктом - таблиця перераховується лише довкола нього
+        fac = ttk.Frame(top)
+        fac.grid(row=2, column=0, columnspan=4, sticky="w", pady=(4, 0))
+        ttk.Label(fac, text="Найближчий об'єкт:").pack(side=tk.LEFT)
+        types = node_table(self.G).types
+        self.fac_var = tk.StringVar(value="stair" if "stair" in types else (types[0] if types else ""))
+        ttk.Combobox(fac, textvariable=self.fac_var, state="readonly", width=12,
+                     values=types).pack(side=tk.LEFT, padx=3)
+        ttk.Button(fac, text="Маршрут", command=self._on_facility).pack(side=tk.LEFT, padx=3)
+        ttk.Button(fac, text="Закрити/відкрити кінець",
+                   command=self._on_toggle_facility).pack(side=tk.LEFT, padx=3)
 
         # Результат
         res = ttk.Frame(self, padding=(8,4))
         res.pack(side=tk.TOP, fill=tk.X)
         ttk.Label(res, text="Результат:").pack(anchor="w")
-        self.result_txt = tk.Text(res, height=4, wrap="word")
+        self.result_txt = tk.Text(res, height=8 if DEBUG else 6, wrap="word")
         self.result_txt.pack(fill=tk.X)
         self.result_txt.configure(state="disabled")
 
+        # стан фонового пошуку
+        busy = ttk.Frame(res)
+        busy.pack(fill=tk.X, pady=(4, 0))
+        self.progress = ttk.Progressbar(busy, mode="indeterminate", length=160)
+        self.progress.pack(side=tk.LEFT)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(busy, textvariable=self.status_var).pack(side=tk.LEFT, padx=8)
+
     def _build_tabs(self):
         self.nb = ttk.Notebook(self)
         self.nb.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
@@ -177,20 +345,116 @@ class PathfinderGUI(tk.Tk):
             frame = FloorPlot(self.nb, title=title)
             self.nb.add(frame, text=title)
             self.plots[f] = frame
+            frame.on_click = lambda x, y, button, f=f: self._on_map_click(f, x, y, button)
+        # приховані вкладки малюються, лише коли їх уперше показують
+        self.route_path = None
+        self.route_alts = None
+        self.route_stops = None
+        self.route_heat = None
+        self.nb.bind("<<NotebookTabChanged>>", lambda _e: self._refresh_tab(self._current_floor()))
 
     # утиліти
     def _to_id(self, display):
         return display.split("—",1)[0].strip() if "—" in display else display
 
-    def _set_result(self, text):
+    def _set_result(self, text, stats=None):
+        # при config.DEBUG під результатом - лічильники запиту і сумарні
+        if DEBUG and stats is not None:
+            text += (f"\n[пошук] {stats.summary()}"
+                     f"\n[усього {SEARCH_TOTALS.searches} пошуків] {SEARCH_TOTALS.summary()}")
         self.result_txt.configure(state="normal")
         self.result_txt.delete("1.0", tk.END)
         self.result_txt.insert(tk.END, text)
         self.result_txt.configure(state="disabled")
 
-    def _redraw_all(self, path):
-        for f, plot in self.plots.items():
-            plot.draw_subgraph(self.G, f, path=path, draw_weights=True)
+    def _current_floor(self):
+        return FLOOR_TABS[self.nb.index(self.nb.select())]
+
+    def _refresh_tab(self, f):
+        # статична карта - один раз на вкладку, далі лише шар маршруту
+        plot = self.plots[f]
+        if not plot.has_base:
+            plot.draw_base(self.G, f, draw_weights=True)
+        if (plot.path is not self.route_path or plot.alts is not self.route_alts
+                or plot.stops is not self.route_stops or plot.heat is not self.route_heat):
+            plot.set_route(self.route_path, self.route_alts, self.route_stops, self.route_heat)
+
+    def _redraw_all(self, path, alternatives=None, stops=None, heat=None):
+        # маршрут запам'ятовується для всіх вкладок, а малюється лише видима
+        self.route_path = path
+        self.route_alts = alternatives
+        self.route_stops = stops
+        self.route_heat = heat
+        self._refresh_tab(self._current_floor())
+
+    # фоновий пошук
+    def _start_pool(self):
+        cg = compile_graph(self.G)
+        table = cg.table
+        # інтерактивні запити часто йдуть від тієї самої точки - дерева одразу
+        args = (cg, DATA_PATH, table.digest, True) if table is not None else (cg, None, None, True)
+        self.pool = mp.Pool(1, initializer=init_worker, initargs=args)
+
+    def _restart_pool(self):
+        # крайній захід: скасований пошук не встиг за CANCEL_GRACE_S, а новий
+        # чекає за ним - процес зупиняється, поточний запит подається наново
+        self.pool.terminate()
+        self._start_pool()
+        self.stale = []
+        if self.job is not None:
+            gen, s, e, algo, t0, (fn, args), _ = self.job
+            self.job = (gen, s, e, algo, t0, (fn, args), self.pool.apply_async(fn, args))
+
+    def _submit(self, fn, args, s, e, algo, status):
+        self._cancel()
+        self.job_gen += 1
+        res = self.pool.apply_async(fn, args)
+        self.job = (self.job_gen, s, e, algo, time.perf_counter(), (fn, args), res)
+        self._set_busy(True, status)
+        self.after(POLL_MS, self._poll, self.job_gen)
+
+    def _cancel(self):
+        # Кооперативне скасування: процес і його кеші (дерева, CH, таблиці)
+        # лишаються, незавершений пошук дораховує у фоні, а його результат
+        # відкидається перевіркою покоління в _poll
+        job, self.job = self.job, None
+        if job is not None and not job[-1].ready():
+            self.stale.append((time.perf_counter() + CANCEL_GRACE_S, job[-1]))
+        self._set_busy(False)
+
+    def _set_busy(self, busy, text=""):
+        if busy:
+            self.progress.start(POLL_MS)
+        else:
+            self.progress.stop()
+        self.status_var.set(text)
+
+    def _poll(self, gen):
+        if self.job is None or self.job[0] != gen:
+            return  # запит замінено новішим
+        _, s, e, algo, t0, _, res = self.job
+        if not res.ready():
+            self.stale = [(deadline, r) for deadline, r in self.stale if not r.ready()]
+            if self.stale and time.perf_counter() > self.stale[0][0]:
+                self._restart_pool()
+            self.status_var.set(f"Пошук {s} - {e}... {time.perf_counter() - t0:.1f} с")
+            self.after(POLL_MS, self._poll, gen)
+            return
+        self.job = None
+        self._set_busy(False)
+        try:
+            out = res.get()
+        except Exception as ex:
+            messagebox.showerror("Помилка пошуку", str(ex))
+            return
+        if algo == "tour":
+            self._show_tour(*out)
+        elif algo == "reach":
+            self._show_reach(*out)
+        elif algo == "facility":
+            self._show_facility(e, *out)
+        else:
+            self._show_route(algo, *out)
 
     # дії
     def _on_build(self):
@@ -203,28 +467,153 @@ class PathfinderGUI(tk.Tk):
             messagebox.showerror("Помилка", "Точка відсутня в графі.")
             return
         algo = self.algo_var.get().lower()
-        try:
-            if algo == "astar":
-                from src.pathfinding import astar_path
-                path, dist = astar_path(self.G, s, e)
-                name = "A*"
-            else:
-                from src.pathfinding import dijkstra_path
-                path, dist = dijkstra_path(self.G, s, e)
-                name = "Dijkstra"
-        except Exception as ex:
-            messagebox.showerror("Помилка пошуку", str(ex))
+        k = max(1, min(int(self.k_var.get() or 1), 1 + len(ALT_COLORS)))
+        self._submit(worker_route, (s, e, algo, DEBUG, k, ALT_MAX_OVERLAP), s, e, algo, f"Пошук {s} - {e}...")
+
+    def _show_route(self, algo, path, dist, stats, info):
+        info = info or {}
+        name = algo_title(algo)
+        if "build_seconds" in info:
+            name += (f" (передобробка {info['build_seconds']:.3f} с, "
+                     f"{info['n_shortcuts']} скорочень, {info['nbytes'] / 1024:.1f} КБ)")
+        if stats is not None:
+            # пошук рахувався в іншому процесі - сумарні лічильники тут
+            SEARCH_TOTALS.add(stats)
+
+        label = node_table(self.G).labels_dict().get
+        chain = " далі ".join(label(n) for n in path)
+        text = f"Найкоротший маршрут: {chain}\nДовжина: {dist:.2f}\nАлгоритм: {name}"
+        alts = info.get("alternatives") or []
+        for i, (alt, d) in enumerate(alts):
+            extra = f", +{(d / dist - 1) * 100:.0f}%" if dist > 0 else ""
+            text += (f"\nАльтернатива {i + 1} ({ALT_COLORS[i % len(ALT_COLORS)][1]} пунктир, {d:.2f}{extra}): "
+                     + " далі ".join(label(n) for n in alt))
+        self._set_result(text, stats)
+        self._redraw_all(path, alts or None)
+
+    def _on_add_stop(self, node=None):
+        node = node or self._to_id(self.end_var.get().strip())
+        if node not in self.G.nodes:
+            messagebox.showerror("Помилка", "Точка відсутня в графі.")
             return
+        if node not in self.stops:
+            self.stops.append(node)
+        self.stops_var.set(f"Зупинок: {len(self.stops)}")
+        self.status_var.set(f"Зупинка: {node}")
 
-        labels = {n: self.G.nodes[n].get("label", n) for n in path}
-        chain = " далі ".join(labels[n] for n in path)
-        self._set_result(f"Найкоротший маршрут: {chain}\nДовжина: {dist:.2f}\nАлгоритм: {name}")
-        self._redraw_all(path)
+    def _on_clear_stops(self):
+        self.stops = []
+        self.stops_var.set("Зупинок: 0")
+
+    def _on_tour(self):
+        s = self._to_id(self.start_var.get().strip())
+        if s not in self.G.nodes:
+            messagebox.showwarning("Введення", "Оберіть початок обходу.")
+            return
+        if not [n for n in self.stops if n != s]:
+            messagebox.showwarning("Введення", "Додайте хоча б одну зупинку (кнопка \"+ кінець\" "
+                                               "або середня кнопка миші на карті).")
+            return
+        # кінець вільний (де закінчиться найкоротший обхід) або сам початок
+        end = s if self.round_var.get() else None
+        self._submit(worker_tour, (list(self.stops), s, end, DEBUG), s, f"{len(self.stops)} зупинок", "tour",
+                     f"Обхід від {s}...")
+
+    def _show_tour(self, tour, stats):
+        if stats is not None:
+            SEARCH_TOTALS.add(stats)
+        label = node_table(self.G).labels_dict().get
+        method = "точний" if tour.method == "exact" else "евристика 2-opt/Or-opt"
+        chain = " далі ".join(f"{i + 1}. {label(n)}" for i, n in enumerate(tour.order))
+        text = (f"Обхід зупинок: {chain}\nДовжина: {tour.length:.2f} "
+                f"(переходи: {', '.join(f'{d:.1f}' for d in tour.legs)})\n"
+                f"Порядок: {method}, {tour.seconds * 1000:.1f} мс")
+        self._set_result(text, stats)
+        self._redraw_all(tour.path, stops=tour.order)
+
+    def _on_reach(self):
+        s = self._to_id(self.start_var.get().strip())
+        sources = list(self.stops) or ([s] if s in self.G.nodes else [])
+        if not sources:
+            messagebox.showwarning("Введення", "Оберіть початок або додайте зупинки.")
+            return
+        try:
+            cutoff = float(self.cutoff_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Помилка", "Межа зони має бути числом.")
+            return
+        self._submit(worker_reach, (sources, cutoff, DEBUG), ", ".join(sources), f"до {cutoff:g}", "reach",
+                     f"Зона до {cutoff:g}...")
+        self.reach_query = (sources, cutoff)
+
+    def _show_reach(self, nodes, dist, stats):
+        if stats is not None:
+            SEARCH_TOTALS.add(stats)
+        sources, cutoff = self.reach_query
+        label = node_table(self.G).labels_dict().get
+        # найдальші - в кінці списку: вузли вже впорядковані за відстанню
+        far = ", ".join(f"{label(n)} ({d:.1f})" for n, d in list(zip(nodes, dist))[-5:])
+        text = (f"Зона до {cutoff:g} від: {', '.join(label(n) for n in sources)}\n"
+                f"Досяжно вузлів: {len(nodes)}; найдальші: {far}\n"
+                f"Колір: зелений - поруч, червоний - біля межі")
+        self._set_result(text, stats)
+        self._redraw_all(None, heat=(dict(zip(nodes, dist)), cutoff))
+
+    def _on_facility(self):
+        s = self._to_id(self.start_var.get().strip())
+        ftype = self.fac_var.get()
+        if s not in self.G.nodes or not ftype:
+            messagebox.showwarning("Введення", "Оберіть початок і тип об'єкта.")
+            return
+        # процес пошуку отримує поточний набір відкритих об'єктів (його копія
+        # графа не знає про закриття в цьому вікні)
+        nodes = facility_nodes(self.G, ftype)
+        self._submit(worker_facility, (s, ftype, nodes), s, ftype, "facility", f"Найближчий {ftype} від {s}...")
+
+    def _on_toggle_facility(self):
+        node = self._to_id(self.end_var.get().strip())
+        if node not in self.G.nodes:
+            messagebox.showerror("Помилка", "Точка відсутня в графі.")
+            return
+        if node in self.G.graph.get("closed_facilities", ()):
+            reopen_facility(self.G, node)
+            self.status_var.set(f"Об'єкт {node} знову відкрито")
+        else:
+            close_facility(self.G, node)
+            self.status_var.set(f"Об'єкт {node} закрито")
+
+    def _show_facility(self, ftype, facility, path, dist, table):
+        label = node_table(self.G).labels_dict().get
+        closed = sorted(self.G.graph.get("closed_facilities", ()))
+        text = (f"Найближчий {ftype}: {label(facility)}, довжина {dist:.2f}\n"
+                f"Маршрут: {' далі '.join(label(n) for n in path)}\n"
+                f"Колір - відстань кожного вузла до найближчого {ftype}"
+                + (f"; закриті: {', '.join(closed)}" if closed else ""))
+        self._set_result(text)
+        self._redraw_all(path, heat=(table, max(table.values(), default=0.0)))
+
+    def _on_map_click(self, f, x, y, button):
+        # вузол поверху, найближчий до точки кліку
+        node, d = self.spatial.nearest((x, y), None if f == "all" else f)[0]
+        if button == 1:
+            self.start_var.set(self.display[node])
+            self.status_var.set(f"Початок: {node} ({d:.1f} від точки кліку)")
+        elif button == 2:
+            self._on_add_stop(node)
+        elif button == 3:
+            self.end_var.set(self.display[node])
+            self._on_build()
 
     def _on_clear(self):
+        self._cancel()
         self._set_result("")
         self._redraw_all(path=None)
 
+    def _on_close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+        self.destroy()
+
 def main():
     app = PathfinderGUI()
     app.mainloop()
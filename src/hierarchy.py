@@ -0,0 +1,208 @@
+from __future__ import annotations
+import heapq
+import math
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from src.config import DATA_PATH
+    from src.graph_model import CompiledGraph, compile_graph
+    from src.snapshot import load_graph
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/hierarchy.py
+    from config import DATA_PATH
+    from graph_model import CompiledGraph, compile_graph
+    from snapshot import load_graph
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Ієрархічний пошук за поверхами: вузли розбиті на розділи (корпус, поверх)
+# (CompiledGraph.part), а розділи з'єднані лише через портали - сходи, ліфти,
+# входи, тобто вузли з ребром в інший розділ. Для кожного розділу один раз
+# рахуються відстані між його порталами всередині розділу (скорочення).
+# Запит іде повним графом лише на поверсі старту й поверсі цілі; решта
+# поверхів проходиться надграфом порталів: скорочення всередині розділу
+# плюс вихідні ребра між розділами. Зміна ваг на одному поверсі перебудовує
+# скорочення лише цього розділу.
+
+INF = math.inf
+
+
+def _local(cg: CompiledGraph, src: int, p: int, target: int = -1):
+    # Дейкстра в межах розділу p (словники: розділ - малий шматок графа)
+    ptr, nbr, wt, _, _ = cg.lists()
+    part = cg.part
+    dist = {src: 0.0}
+    pred = {src: -1}
+    heap = [(0.0, src)]
+    pop, push = heapq.heappop, heapq.heappush
+    while heap:
+        d, u = pop(heap)
+        if d > dist[u]:
+            continue
+        if u == target:
+            break
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            if part[v] != p:
+                continue
+            nd = d + wt[k]
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                pred[v] = u
+                push(heap, (nd, v))
+    return dist, pred
+
+
+class FloorHierarchy:
+    # Надграф порталів: short[a] - [(b, відстань)] до інших порталів розділу a
+    # всередині розділу. Шляхи скорочень не зберігаються - при розгортанні
+    # маршруту їх дає короткий пошук у межах одного розділу.
+    __slots__ = ("keys", "part", "portal", "portals", "short", "build_seconds")
+
+    def __init__(self, cg: CompiledGraph):
+        t0 = time.perf_counter()
+        self.keys = list(cg.part_keys)
+        self.part = cg.part.tolist()
+        # портал - кінець ребра між різними розділами
+        src = np.repeat(np.arange(cg.n), np.diff(cg.indptr))
+        cross = cg.part[src] != cg.part[cg.indices]
+        portal = np.zeros(cg.n, dtype=bool)
+        portal[src[cross]] = True
+        self.portal = portal.tolist()
+        self.portals = [[] for _ in self.keys]
+        for u in np.flatnonzero(portal).tolist():
+            self.portals[self.part[u]].append(u)
+        self.short = {}
+        for p in range(len(self.keys)):
+            self._build_part(cg, p)
+        self.build_seconds = time.perf_counter() - t0
+
+    def _build_part(self, cg: CompiledGraph, p: int) -> None:
+        ports = self.portals[p]
+        for a in ports:
+            dist, _ = _local(cg, a, p)
+            self.short[a] = [(b, dist[b]) for b in ports if b != a and dist.get(b, INF) < INF]
+
+    def rebuild(self, cg: CompiledGraph, parts) -> int:
+        # перерахунок скорочень лише вказаних розділів (після зміни ваг на поверсі)
+        parts = set(parts)
+        for p in parts:
+            self._build_part(cg, p)
+        return len(parts)
+
+    def update(self, cg: CompiledGraph, changes) -> int:
+        # changes - [(i, j, стара вага, нова вага)], як у pathfinding.repair_tree;
+        # ребра між розділами читаються з CSR на льоту, тож перебудовуються
+        # лише розділи зі зміненими внутрішніми ребрами
+        part = self.part
+        return self.rebuild(cg, {part[i] for i, j, _, _ in changes if part[i] == part[j]})
+
+    @property
+    def n_portals(self) -> int:
+        return len(self.short)
+
+    @property
+    def n_shortcuts(self) -> int:
+        return sum(len(v) for v in self.short.values())
+
+    def query(self, cg: CompiledGraph, s: int, t: int, stats=None):
+        # Дейкстра: у розділах s і t - усі ребра, в інших - лише скорочення
+        # між порталами; переходи між розділами - звичайні ребра CSR
+        ptr, nbr, wt, _, _ = cg.lists()
+        part, portal, short = self.part, self.portal, self.short
+        ps, pt = part[s], part[t]
+        dist = {s: 0.0}
+        pred = {s: (-1, False)}
+        heap = [(0.0, s)]
+        pop, push = heapq.heappop, heapq.heappush
+        pops = stale = 0
+        while heap:
+            d, u = pop(heap)
+            pops += 1
+            if d > dist[u]:
+                stale += 1
+                continue
+            if u == t:
+                break
+            pu = part[u]
+            full = pu == ps or pu == pt
+            if full or portal[u]:
+                for k in range(ptr[u], ptr[u + 1]):
+                    v = nbr[k]
+                    if full or part[v] != pu:
+                        nd = d + wt[k]
+                        if nd < dist.get(v, INF):
+                            dist[v] = nd
+                            pred[v] = (u, False)
+                            push(heap, (nd, v))
+            if not full and portal[u]:
+                for v, w in short[u]:
+                    nd = d + w
+                    if nd < dist.get(v, INF):
+                        dist[v] = nd
+                        pred[v] = (u, True)
+                        push(heap, (nd, v))
+        if stats is not None:
+            stats.add_search(pops, stale, len(heap))
+        if dist.get(t, INF) == INF:
+            return None
+        # розгортання: скорочення замінюється шляхом усередині його розділу
+        path = [t]
+        while path[-1] != s:
+            v = path[-1]
+            u, via = pred[v]
+            if via:
+                _, lp = _local(cg, u, part[u], v)
+                x = lp[v]
+                while x != u:
+                    path.append(x)
+                    x = lp[x]
+            path.append(u)
+        path.reverse()
+        return path, dist[t]
+
+
+def build_hierarchy(G) -> FloorHierarchy:
+    # передобробка один раз на скомпільований граф; правки ваг через dynamic
+    # перебудовують лише зачеплені розділи (FloorHierarchy.update)
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    h = cg.aux.get("hier")
+    if h is None:
+        h = cg.aux["hier"] = FloorHierarchy(cg)
+    return h
+
+
+def hier_path(G: nx.Graph, start: str, end: str, stats=None) -> Tuple[List[str], float]:
+    # той самий контракт, що й dijkstra_path (stats - pathfinding.SearchStats;
+    # build - час побудови надграфа порталів, якщо його ще не було)
+    t0 = time.perf_counter() if stats is not None else 0.0
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    s, t = cg.index.get(start), cg.index.get(end)
+    if s is None or t is None:
+        raise nx.NodeNotFound(f"Either source {start} or target {end} is not in G")
+    t1 = time.perf_counter() if stats is not None else 0.0
+    h = build_hierarchy(cg)
+    t2 = time.perf_counter() if stats is not None else 0.0
+    res = h.query(cg, s, t, stats)
+    if res is None:
+        raise nx.NetworkXNoPath(f"Node {end} not reachable from {start}")
+    path, dist = res
+    out = [cg.ids[i] for i in path], float(dist)
+    if stats is not None:
+        stats.add_times(t1 - t0, t2 - t1, time.perf_counter() - t2)
+    return out
+
+
+def main():
+    G = load_graph(DATA_PATH)
+    h = build_hierarchy(G)
+    print(f" Надграф порталів: {len(h.keys)} розділів (корпус, поверх), "
+          f"{h.n_portals} порталів, {h.n_shortcuts} скорочень")
+    print(f" Час передобробки: {h.build_seconds:.3f} с")
+
+if __name__ == "__main__":
+    main()
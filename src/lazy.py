@@ -0,0 +1,20 @@
+import importlib.util
+import sys
+
+# Відкладений імпорт важких залежностей (networkx): модуль реєструється одразу,
+# а виконується при першому зверненні до його атрибута. Пакетний режим і
+# пошук на скомпільованому графі так не платять за імпорт networkx - він
+# потрібен лише для nx.Graph і винятків, тобто на шляху помилки.
+
+
+def lazy_import(name: str):
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    loader.exec_module(mod)
+    return mod
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+# Навантажувальний тест сервісу маршрутів (src/service.py): concurrency
+# з'єднань keep-alive шлють запити /route з фіксованого зерном набору пар,
+# наприкінці - запитів за секунду, перцентилі затримки, коди відповідей.
+# --distinct задає кількість різних пар: мале значення перевіряє злиття
+# однакових запитів і кеш дерев.
+#
+#   python src/loadtest.py --url http://127.0.0.1:8080 --requests 5000 --concurrency 32
+
+
+async def _request(reader, writer, host, method, target, body=b""):
+    head = (f"{method} {target} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = h.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _get_json(host, port, target):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, body = await _request(reader, writer, host, "GET", target)
+        return status, json.loads(body)
+    finally:
+        writer.close()
+
+
+async def run(url: str, requests: int, concurrency: int, distinct: int, algo: str, seed: int) -> dict:
+    u = urlsplit(url)
+    host, port = u.hostname or "127.0.0.1", u.port or 80
+    _, data = await _get_json(host, port, "/nodes")
+    rnd = random.Random(seed)
+    ids = sorted(data["nodes"])
+    pairs = [tuple(rnd.sample(ids, 2)) for _ in range(max(1, distinct))]
+    work = [pairs[rnd.randrange(len(pairs))] for _ in range(requests)]
+    latencies = []
+    codes = {}
+    queue = iter(work)
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for a, b in queue:
+                target = "/route?" + urlencode({"start": a, "end": b, "algo": algo})
+                t0 = time.perf_counter()
+                status, _ = await _request(reader, writer, host, "GET", target)
+                latencies.append(time.perf_counter() - t0)
+                codes[status] = codes.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    _, before = await _get_json(host, port, "/health")
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(max(1, concurrency))))
+    seconds = time.perf_counter() - t0
+    _, after = await _get_json(host, port, "/health")
+
+    lat = np.asarray(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "seconds": round(seconds, 3),
+        "rps": round(len(latencies) / seconds, 1) if seconds > 0 else 0.0,
+        "p50_ms": round(float(np.percentile(lat, 50)), 3) if len(lat) else 0.0,
+        "p95_ms": round(float(np.percentile(lat, 95)), 3) if len(lat) else 0.0,
+        "p99_ms": round(float(np.percentile(lat, 99)), 3) if len(lat) else 0.0,
+        "codes": codes,
+        "coalesced": after["coalesced"] - before["coalesced"],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Навантажувальний тест сервісу маршрутів")
+    ap.add_argument("--url", default="http://127.0.0.1:8080")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--distinct", type=int, default=500, help="різних пар (start, end)")
+    ap.add_argument("--algo", default="dijkstra")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="вивести результат як JSON")
+    args = ap.parse_args(argv)
+    rep = asyncio.run(run(args.url, args.requests, args.concurrency, args.distinct, args.algo, args.seed))
+    if args.json:
+        print(json.dumps(rep, ensure_ascii=False))
+        return
+    print(f" Запитів: {rep['requests']} за {rep['seconds']} с - {rep['rps']} зап/с")
+    print(f" Затримка: p50 {rep['p50_ms']} мс, p95 {rep['p95_ms']} мс, p99 {rep['p99_ms']} мс")
+    print(f" Коди відповідей: {rep['codes']}, злито однакових запитів: {rep['coalesced']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,272 @@
+import argparse
+import itertools
+import json
 import sys
+import time
 from pathlib import Path
-import networkx as nx
 
-from config import DATA_PATH, DRAW_WEIGHTS, DEFAULT_ALGO
-from data_loader import load_graph_from_json, load_positions
-from graph_model import build_graph, node_exists
-from pathfinding import dijkstra_path, astar_path
-from visualization import draw_graph
+from config import DATA_PATH, DRAW_WEIGHTS, DEFAULT_ALGO, DEBUG, ALT_ROUTES, ALT_MAX_OVERLAP, REACH_CUTOFF
+from routing import init_worker, worker_batch
+from snapshot import load_compiled
+
+# Верхній рівень імпортує лише те, що потрібне пакетному режиму (скомпільований
+# граф зі знімка і ядра пошуку, networkx - відкладено, див. lazy); кожна інша
+# команда імпортує своє сама, а matplotlib (visualization) - лише тоді, коли
+# малюється маршрут.
+
+
+# скорочення й назви алгоритмів -> ключ routing.ALGORITHMS
+ALGO_ALIASES = {
+    "d": "dijkstra", "dijkstra": "dijkstra",
+    "a": "astar", "astar": "astar", "a*": "astar",
+    "l": "alt", "alt": "alt",
+    "c": "ch", "ch": "ch",
+    "bd": "bidijkstra", "bidijkstra": "bidijkstra",
+    "ba": "biastar", "biastar": "biastar", "bi-a*": "biastar",
+    "h": "hier", "hier": "hier",
+}
 
 
 def choose_algo(name: str) -> str:
-    name = (name or "").strip().lower()
-    if name in ("d", "dijkstra"):
-        return "dijkstra"
-    if name in ("a", "astar", "a*"):
-        return "astar"
-    return DEFAULT_ALGO
+    # діалог: порожнє чи невідоме введення - алгоритм за замовчуванням
+    return ALGO_ALIASES.get((name or "").strip().lower(), DEFAULT_ALGO)
+
+
+def _load_progress():
+    # хід потокового розбору великого JSON (data_loader.iter_graph_items) - у stderr,
+    # щоб не змішуватися з результатами в stdout; рядок оновлюється на кожен відсоток
+    last = [-1]
+
+    def show(done: int, total: int, nodes: int, edges: int) -> None:
+        pct = done * 100 // max(total, 1)
+        if pct != last[0]:
+            last[0] = pct
+            print(f"\r[завантаження] {pct}%: вузлів {nodes}, ребер {edges}",
+                  end="\n" if pct >= 100 else "", file=sys.stderr, flush=True)
+    return show
+
+
+def _parse_query(line_no: int, text: str, algo: str):
+    # рядок JSONL -> (рядок, id, start, end, algo); запит - об'єкт
+    # {"start", "end", "algo"?, "id"?} або масив [start, end, algo?].
+    # Некоректний запит - ValueError, тобто запис з error лише для цього рядка
+    q = json.loads(text)
+    if isinstance(q, list) and 2 <= len(q) <= 3:
+        q = dict(zip(("start", "end", "algo"), q))
+    if not isinstance(q, dict) or "start" not in q or "end" not in q:
+        raise ValueError("очікувався об'єкт із полями start і end")
+    name = q.get("algo")
+    if name is None:
+        name = algo
+    elif not isinstance(name, str):
+        raise ValueError(f"algo має бути рядком, а не {type(name).__name__}")
+    key = ALGO_ALIASES.get(name.strip().lower())
+    if key is None:
+        raise ValueError(f"невідомий алгоритм {name!r} (є: {', '.join(sorted(set(ALGO_ALIASES.values())))})")
+    return line_no, q.get("id"), str(q["start"]), str(q["end"]), key
+
+
+def batch(argv=None) -> int:
+    # Пакетний режим: запити JSONL зі stdin або файлу -> по рядку JSON на результат
+    # (path, dist, ms - час пошуку). Вхід читається порціями по --chunk рядків,
+    # тож пам'ять не залежить від довжини потоку; з --workers порція ділиться
+    # між процесами, порядок результатів - як у вході.
+    #   python src/main.py batch --input queries.jsonl --output routes.jsonl --workers 4
+    ap = argparse.ArgumentParser(prog="main.py batch", description="Пакетний пошук маршрутів (JSONL)")
+    ap.add_argument("--input", default="-", help="файл запитів JSONL (- : stdin)")
+    ap.add_argument("--output", default="-", help="файл результатів JSONL (- : stdout)")
+    ap.add_argument("--algo", default=DEFAULT_ALGO, help="алгоритм для запитів без поля algo")
+    ap.add_argument("--chunk", type=int, default=1000, help="запитів у порції")
+    ap.add_argument("--workers", type=int, default=0, help="процесів для пошуку (0 - у цьому процесі)")
+    args = ap.parse_args(argv)
+    if args.algo.strip().lower() not in ALGO_ALIASES:
+        ap.error(f"невідомий алгоритм {args.algo!r}")
+
+    if not Path(DATA_PATH).exists():
+        print(f"Дані не знайдено: {DATA_PATH}", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    # лише скомпільований граф (масиви зі знімка), без nx.Graph
+    cg, digest = load_compiled(DATA_PATH, progress=_load_progress())
+    init_args = (cg, DATA_PATH, digest)
+    pool = None
+    if args.workers > 0:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=init_args)
+    else:
+        init_worker(*init_args)
+    load_s = time.perf_counter() - t0
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    chunk = max(1, args.chunk)
+    parts = max(1, args.workers)
+    done = errors = 0
+    t1 = time.perf_counter()
+    try:
+        lines = enumerate(src, 1)
+        while True:
+            block = list(itertools.islice(lines, chunk))
+            if not block:
+                break
+            queries, bad = [], {}
+            for line_no, text in block:
+                if not text.strip():
+                    continue
+                try:
+                    queries.append(_parse_query(line_no, text, args.algo))
+                except ValueError as ex:
+                    bad[line_no] = {"line": line_no, "error": f"Некоректний запит: {ex}"}
+            if pool is not None:
+                step = -(-len(queries) // parts) or 1
+                slices = [queries[a:a + step] for a in range(0, len(queries), step)]
+                results = [r for part in pool.map(worker_batch, slices) for r in part]
+            else:
+                results = worker_batch(queries)
+            # помилки розбору стають на свої місця серед результатів
+            if bad:
+                results = sorted(results + list(bad.values()), key=lambda r: r["line"])
+            dst.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results))
+            done += len(results)
+            errors += sum(1 for r in results if "error" in r)
+        dst.flush()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    seconds = time.perf_counter() - t1
+    rate = done / seconds if seconds > 0 else 0.0
+    print(f"[batch] запитів: {done}, помилок: {errors}; завантаження {load_s:.3f} с, "
+          f"пошук {seconds:.3f} с ({rate:.0f} зап/с)", file=sys.stderr)
+    return 0
 
 
-def main() -> None:
+def tour(argv=None) -> int:
+    # Обхід зупинок у найкращому порядку: порядок, довжина і повний шлях у JSON.
+    #   python src/main.py tour 12 LIB 27 --start 1 --round
+    ap = argparse.ArgumentParser(prog="main.py tour", description="Обхід кількох зупинок")
+    ap.add_argument("stops", nargs="+", help="вузли, які треба відвідати")
+    ap.add_argument("--start", help="фіксований початок (інакше обирається разом із порядком)")
+    ap.add_argument("--end", help="фіксований кінець")
+    ap.add_argument("--round", action="store_true", help="повернутися на початок (потрібен --start)")
+    args = ap.parse_args(argv)
+    if args.round and args.start is None:
+        ap.error("--round потребує --start")
+    import networkx as nx
+    from precompute import attach_table, load_table
+    from tour import plan_tour
+
+    if not Path(DATA_PATH).exists():
+        print(f"Дані не знайдено: {DATA_PATH}", file=sys.stderr)
+        return 1
+    cg, digest = load_compiled(DATA_PATH, progress=_load_progress())
+    attach_table(cg, load_table(DATA_PATH, digest))
+    try:
+        t = plan_tour(cg, args.stops, args.start, args.start if args.round else args.end)
+    except (nx.NodeNotFound, nx.NetworkXNoPath) as ex:
+        print(f"[tour] {ex}", file=sys.stderr)
+        return 1
+    print(json.dumps({"order": t.order, "length": t.length, "legs": t.legs, "path": t.path},
+                     ensure_ascii=False))
+    print(f"[tour] зупинок: {len(t.order)}, порядок: {t.method}, {t.seconds * 1000:.1f} мс", file=sys.stderr)
+    return 0
+
+
+def reach(argv=None) -> int:
+    # Досяжність: вузли не далі межі від джерел, по рядку JSON на межу.
+    # Кілька --cutoff рахуються одним пошуком до найбільшої.
+    #   python src/main.py reach LIB --cutoff 10 20 30
+    ap = argparse.ArgumentParser(prog="main.py reach", description="Вузли в межах відстані від джерел")
+    ap.add_argument("sources", nargs="+", help="вузли-джерела (відстань - до найближчого)")
+    ap.add_argument("--cutoff", type=float, nargs="+", default=[REACH_CUTOFF], help="межі відстані")
+    args = ap.parse_args(argv)
+    import networkx as nx
+    from pathfinding import reachable_many
+
+    if not Path(DATA_PATH).exists():
+        print(f"Дані не знайдено: {DATA_PATH}", file=sys.stderr)
+        return 1
+    cg, _ = load_compiled(DATA_PATH, progress=_load_progress())
+    try:
+        found = reachable_many(cg, [(args.sources, c) for c in args.cutoff])
+    except nx.NodeNotFound as ex:
+        print(f"[reach] {ex}", file=sys.stderr)
+        return 1
+    for c, (idx, dist) in zip(args.cutoff, found):
+        print(json.dumps({"cutoff": c, "nodes": [cg.ids[i] for i in idx.tolist()], "dist": dist.tolist()},
+                         ensure_ascii=False))
+    return 0
+
+
+def nearest(argv=None) -> int:
+    # Найближчий об'єкт типу --type (вихід, сходи, туалет) для вузлів: по рядку
+    # JSON на вузол. Без вузлів - уся таблиця (вузол, об'єкт, відстань, наступний
+    # вузол) для евакуаційних табличок. Таблиця - один пошук від усіх об'єктів.
+    #   python src/main.py nearest --type stair 12 LIB --closed STAIR_L_F1
+    ap = argparse.ArgumentParser(prog="main.py nearest", description="Найближчий об'єкт типу")
+    ap.add_argument("nodes", nargs="*", help="вузли (без них - таблиця для всіх)")
+    ap.add_argument("--type", required=True, help="тип об'єкта (атрибут 'type' вузла)")
+    ap.add_argument("--closed", nargs="+", default=[], help="закриті об'єкти")
+    args = ap.parse_args(argv)
+    import networkx as nx
+    from facilities import close_facility, facility_table, nearest_facility
+    from graph_model import compile_graph
+    from snapshot import load_graph
+
+    if not Path(DATA_PATH).exists():
+        print(f"Дані не знайдено: {DATA_PATH}", file=sys.stderr)
+        return 1
+    G = load_graph(DATA_PATH, _load_progress())
+    try:
+        for n in args.closed:
+            close_facility(G, n)
+        table = facility_table(G, args.type)
+        ids = compile_graph(G).ids
+        if args.nodes:
+            for n in args.nodes:
+                try:
+                    f, path, d = nearest_facility(G, n, args.type)
+                    rec = {"node": n, "facility": f, "dist": d, "path": path}
+                except nx.NetworkXNoPath as ex:
+                    rec = {"node": n, "error": str(ex)}
+                print(json.dumps(rec, ensure_ascii=False))
+        else:
+            for i, n in enumerate(ids):
+                f, d, h = table.fac[i], table.dist[i], table.nxt[i]
+                print(json.dumps({"node": n, "facility": ids[f] if f >= 0 else None,
+                                  "dist": d if f >= 0 else None, "next": ids[h] if h >= 0 else None},
+                                 ensure_ascii=False))
+    except (nx.NodeNotFound, KeyError) as ex:
+        print(f"[nearest] {ex.args[0] if ex.args else ex}", file=sys.stderr)
+        return 1
+    print(f"[nearest] {args.type}: {len(table.seeds)} об'єктів, таблиця за {table.build_seconds * 1000:.1f} мс",
+          file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "batch":
+        sys.exit(batch(argv[1:]))
+    if argv and argv[0] == "tour":
+        sys.exit(tour(argv[1:]))
+    if argv and argv[0] == "reach":
+        sys.exit(reach(argv[1:]))
+    if argv and argv[0] == "nearest":
+        sys.exit(nearest(argv[1:]))
+
+    import networkx as nx
+    from contraction import build_ch
+    from graph_model import node_exists
+    from hierarchy import build_hierarchy
+    from pathfinding import SPT_CACHE, SEARCH_TOTALS, SearchStats
+    from precompute import attach_table, load_table
+    from routing import alternatives, route
+    from snapshot import load_graph
+
     print("Система пошуку найкоротшого маршруту по корпусу коледжу ")
 
     if not Path(DATA_PATH).exists():
@@ -27,10 +275,13 @@ def main() -> None:
               "python -m src.generate_data")
         sys.exit(1)
 
-    # читає дані з JSON
-    data = load_graph_from_json(DATA_PATH)
-    # будує граф (функція з graph_model.py)
-    G: nx.Graph = build_graph(data)
+    # читає граф один раз: з бінарного знімка, а якщо він застарів - з JSON
+    G: nx.Graph = load_graph(DATA_PATH, _load_progress(), stats=SEARCH_TOTALS if DEBUG else None)
+    # передобчислена таблиця маршрутів (python src/precompute.py), якщо вона актуальна
+    if attach_table(G, load_table(DATA_PATH, G.graph.get("sha256"))):
+        print("Використовується передобчислена таблиця маршрутів.")
+    # діалог: від тієї самої точки часто шукають кілька цілей - дерева одразу
+    SPT_CACHE.configure(eager=True)
 
     while True:
         start = input("Введіть початкову точку (наприклад, 12 або SPORT): ").strip()
@@ -43,13 +294,20 @@ def main() -> None:
                 break
             continue
 
-        algo = choose_algo(input("Алгоритм [dijkstra/astar] (Enter = dijkstra): "))
+        algo = choose_algo(input(
+            "Алгоритм [dijkstra/astar/alt/ch/bidijkstra/biastar/hier] (Enter = dijkstra): "))
 
         try:
-            if algo == "astar":
-                path, dist = astar_path(G, start, end)
-            else:
-                path, dist = dijkstra_path(G, start, end)
+            if algo == "ch":
+                ch = build_ch(G)
+                print(f"[ch] передобробка: {ch.build_seconds:.3f} с, "
+                      f"{ch.n_shortcuts} скорочень, {ch.nbytes / 1024:.1f} КБ")
+            elif algo == "hier":
+                h = build_hierarchy(G)
+                print(f"[hier] передобробка: {h.build_seconds:.3f} с, {len(h.keys)} поверхів, "
+                      f"{h.n_portals} порталів, {h.n_shortcuts} скорочень")
+            stats = SearchStats() if DEBUG else None
+            path, dist = route(G, start, end, algo, stats)
         except Exception as ex:
             print(f"Помилка пошуку: {ex}")
             again = input("Спробувати ще? (yes/no): ").strip().lower()
@@ -59,12 +317,21 @@ def main() -> None:
 
         print("\nНайкоротший маршрут:", " далі ".join(path))
         print(f"Загальна довжина: {dist:g} метрів.\n")
+        if ALT_ROUTES > 1:
+            # інші варіанти, якщо, наприклад, сходи на основному маршруті переповнені
+            for i, (alt, d) in enumerate(alternatives(G, start, end, path, ALT_ROUTES, ALT_MAX_OVERLAP), 1):
+                extra = f", +{(d / dist - 1) * 100:.0f}%" if dist > 0 else ""
+                print(f"Альтернатива {i}: {' далі '.join(alt)}")
+                print(f"  довжина: {d:g} метрів{extra}")
+            print()
+        if stats is not None:
+            print(f"[пошук] {stats.summary()}\n")
 
         vis = input("Показати візуалізацію? (yes/no): ").strip().lower()
         if vis == "yes":
-            pos_json = load_positions(DATA_PATH)   # ключі — str(node_id)
-            # бере тільки наявні у JSON
-            pos = {n: pos_json[str(n)] for n in G.nodes if str(n) in pos_json}
+            # координати вже є в атрибутах вузлів - JSON вдруге не читається
+            pos = nx.get_node_attributes(G, "pos")
+            from visualization import draw_graph
 
             draw_graph(
                 G,
@@ -77,6 +344,10 @@ def main() -> None:
 
         again = input("Виконати новий пошук? (yes/no): ").strip().lower()
         if again != "yes":
+            st = SPT_CACHE.stats()
+            print(f"[кеш] дерев: {st['entries']}, влучань: {st['hits']}, промахів: {st['misses']}")
+            if DEBUG:
+                print(f"[пошук] усього запитів: {SEARCH_TOTALS.searches}; {SEARCH_TOTALS.summary()}")
             print("Програму завершено.")
             break
 
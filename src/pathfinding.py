@@ -1,28 +1,905 @@
+from __future__ import annotations
 import math
-import networkx as nx
-from typing import Tuple, List
-
-def _euclid(a: tuple[float, float], b: tuple[float, float]) -> float:
-    ax, ay = a
-    bx, by = b
-    return math.hypot(ax - bx, ay - by)
-
-def dijkstra_path(G: nx.Graph, start: str, end: str) -> Tuple[List[str], float]:
-    # Найкоротший шлях Дейкстрою (ваги ребер 'weight').
-    path = nx.dijkstra_path(G, start, end, weight="weight")
-    dist = nx.dijkstra_path_length(G, start, end, weight="weight")
-    return path, float(dist)
-
-def astar_path(G: nx.Graph, start: str, end: str) -> Tuple[List[str], float]:
-    # A* із евклідовою евристикою за координатами вузлів ('pos').
-    def h(u, v):
-        pu = G.nodes[u].get("pos", (0.0, 0.0))
-        pv = G.nodes[v].get("pos", (0.0, 0.0))
-        return _euclid(pu, pv)
-
-    path = nx.astar_path(G, start, end, heuristic=h, weight="weight")
-    # підрахування фактичної довжини за вагами
-    dist = 0.0
-    for a, b in zip(path, path[1:]):
-        dist += G.edges[a, b].get("weight", 1.0)
-    return path, float(dist)
\ No newline at end of file
+import heapq
+from time import perf_counter
+from collections import OrderedDict
+import numpy as np
+from typing import Iterator, List, Sequence, Tuple
+
+try:
+    from src.config import SPT_CACHE_ENTRIES, SPT_CACHE_BYTES, SPT_CACHE_SEEN
+    from src.graph_model import CompiledGraph, compile_graph
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from config import SPT_CACHE_ENTRIES, SPT_CACHE_BYTES, SPT_CACHE_SEEN
+    from graph_model import CompiledGraph, compile_graph
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+INF = math.inf
+
+def _compiled(G) -> CompiledGraph:
+    # приймає як nx.Graph, так і вже скомпільований граф
+    return G if isinstance(G, CompiledGraph) else compile_graph(G)
+
+def _endpoints(cg: CompiledGraph, start: str, end: str) -> Tuple[int, int]:
+    s, t = cg.index.get(start), cg.index.get(end)
+    if s is None or t is None:
+        raise nx.NodeNotFound(f"Either source {start} or target {end} is not in G")
+    return s, t
+
+def _walk(cg: CompiledGraph, pred, s: int, t: int) -> List[str]:
+    # відновлення шляху за масивом попередників
+    path = [t]
+    while path[-1] != s:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return [cg.ids[i] for i in path]
+
+class SearchStats:
+    # Лічильники зусиль пошуку і розбивка часу: load - отримання скомпільованого
+    # графа, build - передобробка під запит (евристика, опорні вузли, CH),
+    # search - сам пошук і відновлення шляху. Ядра рахують лише вилучення
+    # з черги (одне додавання цілого на ітерацію); вставки, успішні релаксації
+    # та звернення до евристики виводяться з них і залишку черги. Без stats
+    # точки входу не читають годинник і не роблять додаткової роботи.
+    __slots__ = ("searches", "settled", "relaxed", "pushes", "pops", "heuristic",
+                 "load_s", "build_s", "search_s")
+
+    def __init__(self):
+        self.searches = self.settled = self.relaxed = self.pushes = self.pops = self.heuristic = 0
+        self.load_s = self.build_s = self.search_s = 0.0
+
+    def add_search(self, pops: int, stale: int, left: int, seeds: int = 1, heuristic: bool = False) -> None:
+        # stale - застарілі записи черги, left - записи, що лишились у черзі,
+        # seeds - початкові записи; кожна інша вставка - успішна релаксація ребра,
+        # а в A* ще й одне звернення до оцінки h
+        pushes = pops + left
+        self.searches += 1
+        self.settled += pops - stale
+        self.pops += pops
+        self.pushes += pushes
+        self.relaxed += pushes - seeds
+        if heuristic:
+            self.heuristic += pushes
+
+    def add_times(self, load: float = 0.0, build: float = 0.0, search: float = 0.0) -> None:
+        self.load_s += load
+        self.build_s += build
+        self.search_s += search
+
+    def add(self, other: "SearchStats") -> None:
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def summary(self) -> str:
+        return (f"вузлів: {self.settled}, релаксацій: {self.relaxed}, "
+                f"черга +{self.pushes}/-{self.pops}, евристика: {self.heuristic}; "
+                f"час: завантаження {self.load_s * 1000:.2f} мс, "
+                f"побудова {self.build_s * 1000:.2f} мс, пошук {self.search_s * 1000:.2f} мс")
+
+
+# сумарні лічильники всіх запитів зі stats (routing.route) і завантаження графа
+SEARCH_TOTALS = SearchStats()
+
+def _now(stats) -> float:
+    # годинник читається лише тоді, коли статистику збирають
+    return perf_counter() if stats is not None else 0.0
+
+
+def _dijkstra(cg: CompiledGraph, s: int, t: int = -1, stats: SearchStats | None = None):
+    # Дейкстра на CSR; при t >= 0 зупиняється, щойно t остаточно визначено
+    ptr, nbr, wt, _, _ = cg.lists()
+    dist = [INF] * cg.n
+    pred = [-1] * cg.n
+    dist[s] = 0.0
+    heap = [(0.0, s)]
+    pop, push = heapq.heappop, heapq.heappush
+    pops = stale = 0
+    while heap:
+        d, u = pop(heap)
+        pops += 1
+        if d > dist[u]:
+            stale += 1
+            continue
+        if u == t:
+            break
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            nd = d + wt[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                push(heap, (nd, v))
+    if stats is not None:
+        stats.add_search(pops, stale, len(heap))
+    return dist, pred
+
+def _astar(cg: CompiledGraph, s: int, t: int, h, stats: SearchStats | None = None):
+    # A* на CSR; h - список нижніх оцінок відстані до t для кожного вузла
+    ptr, nbr, wt, _, _ = cg.lists()
+    g = [INF] * cg.n
+    pred = [-1] * cg.n
+    g[s] = 0.0
+    heap = [(h[s], 0.0, s)]
+    pop, push = heapq.heappop, heapq.heappush
+    pops = stale = 0
+    while heap:
+        _, d, u = pop(heap)
+        pops += 1
+        if d > g[u]:
+            stale += 1
+            continue
+        if u == t:
+            break
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            nd = d + wt[k]
+            if nd < g[v]:
+                g[v] = nd
+                pred[v] = u
+                push(heap, (nd + h[v], nd, v))
+    if stats is not None:
+        stats.add_search(pops, stale, len(heap), heuristic=True)
+    return g, pred
+
+def _heuristic_scale(cg: CompiledGraph) -> float:
+    # Евклідова відстань за 'pos' не є нижньою оцінкою довжини шляху: поверхи
+    # рознесені на 10 одиниць по y, а ребро сходів важить 4. Множник - найменше
+    # відношення ваги ребра до його евклідової довжини (не більше 1), тоді
+    # scale * euclid не переоцінює жодного шляху і лишається монотонною.
+    scale = cg.aux.get("h_scale")
+    if scale is None:
+        src = np.repeat(np.arange(cg.n), np.diff(cg.indptr))
+        d = cg.pos[src] - cg.pos[cg.indices]
+        length = np.hypot(d[:, 0], d[:, 1])
+        mask = length > 0
+        scale = 1.0
+        if mask.any():
+            scale = min(1.0, float((cg.weights[mask] / length[mask]).min()))
+        cg.aux["h_scale"] = scale
+    return scale
+
+def prepare_heuristic(G) -> float:
+    # передобробка A* наперед (бенчмарк, прогрів): множник рахується один раз на граф
+    return _heuristic_scale(_compiled(G))
+
+def _euclid_h(cg: CompiledGraph, t: int) -> np.ndarray:
+    d = cg.pos - cg.pos[t]
+    return _heuristic_scale(cg) * np.hypot(d[:, 0], d[:, 1])
+
+
+class Landmarks:
+    # ALT: відстані від кількох опорних вузлів (landmarks) до всіх вузлів.
+    # За нерівністю трикутника |d(l, t) - d(l, v)| <= d(v, t) для кожного l,
+    # тож максимум по опорних вузлах - допустима і монотонна оцінка.
+    __slots__ = ("nodes", "dist", "pred")
+
+    def __init__(self, cg: CompiledGraph, k: int = 8):
+        k = min(k, cg.n)
+        nodes = []
+        rows = []
+        preds = []
+        # вибір "найдальшого": кожен наступний - найвіддаленіший від уже обраних;
+        # недосяжні вузли (inf) обираються першими, щоб покрити всі компоненти
+        closest = np.asarray(_dijkstra(cg, 0)[0]) if cg.n else np.empty(0)
+        for _ in range(k):
+            cand = int(np.argmax(closest))
+            if nodes and closest[cand] == 0:
+                break
+            d, p = _dijkstra(cg, cand)
+            d = np.asarray(d, dtype=np.float64)
+            nodes.append(cand)
+            rows.append(d)
+            preds.append(np.asarray(p, dtype=np.int32))
+            closest = d if len(nodes) == 1 else np.minimum(closest, d)
+        self.nodes = np.array(nodes, dtype=np.int32)
+        self.dist = np.vstack(rows) if rows else np.zeros((0, cg.n))
+        # дерева попередників - для інкрементного ремонту після змін ваг
+        self.pred = np.vstack(preds) if preds else np.zeros((0, cg.n), dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.nodes.nbytes + self.dist.nbytes + self.pred.nbytes
+
+    def lower_bounds(self, t: int) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            diff = np.abs(self.dist[:, t:t + 1] - self.dist)
+        # різні компоненти дають inf/nan - такі опорні вузли нічого не обмежують
+        diff[~np.isfinite(diff)] = 0.0
+        return diff.max(axis=0) if len(diff) else np.zeros(self.dist.shape[1])
+
+
+def build_landmarks(G, k: int = 8) -> Landmarks:
+    # таблиці опорних вузлів рахуються один раз на скомпільований граф
+    cg = _compiled(G)
+    lm = cg.aux.get("alt")
+    if lm is None or len(lm.nodes) < min(k, cg.n):
+        lm = Landmarks(cg, k)
+        cg.aux["alt"] = lm
+    return lm
+
+def _result(cg: CompiledGraph, dist, pred, s: int, t: int, start, end) -> Tuple[List[str], float]:
+    if dist[t] == INF:
+        raise nx.NetworkXNoPath(f"Node {end} not reachable from {start}")
+    return _walk(cg, pred, s, t), float(dist[t])
+
+def _table_route(cg: CompiledGraph, start, end, stats, t0: float) -> Tuple[List[str], float]:
+    # відповідь із таблиці всіх пар: пошуку немає, лише прохід next-hop
+    t1 = _now(stats)
+    res = cg.table.route(start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, 0.0, perf_counter() - t1)
+    return res
+
+def dijkstra_path(G: nx.Graph, start: str, end: str, stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # Найкоротший шлях Дейкстрою (ваги ребер 'weight') - один прохід,
+    # шлях і довжина повертаються разом. stats - SearchStats для лічильників.
+    t0 = _now(stats)
+    cg = _compiled(G)
+    if cg.table is not None:
+        return _table_route(cg, start, end, stats, t0)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    dist, pred = _dijkstra(cg, s, t, stats)
+    res = _result(cg, dist, pred, s, t, start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, 0.0, perf_counter() - t1)
+    return res
+
+def astar_path(G: nx.Graph, start: str, end: str, stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # A* із евклідовою евристикою за координатами вузлів ('pos'),
+    # масштабованою до допустимої (див. _heuristic_scale).
+    t0 = _now(stats)
+    cg = _compiled(G)
+    if cg.table is not None:
+        return _table_route(cg, start, end, stats, t0)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    h = _euclid_h(cg, t).tolist()
+    t2 = _now(stats)
+    g, pred = _astar(cg, s, t, h, stats)
+    res = _result(cg, g, pred, s, t, start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, t2 - t1, perf_counter() - t2)
+    return res
+
+def alt_path(G: nx.Graph, start: str, end: str, stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # A* з оцінкою ALT (опорні вузли + нерівність трикутника), підсиленою
+    # масштабованою евклідовою відстанню - максимум двох допустимих оцінок.
+    t0 = _now(stats)
+    cg = _compiled(G)
+    if cg.table is not None:
+        return _table_route(cg, start, end, stats, t0)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    h = np.maximum(build_landmarks(cg).lower_bounds(t), _euclid_h(cg, t)).tolist()
+    t2 = _now(stats)
+    g, pred = _astar(cg, s, t, h, stats)
+    res = _result(cg, g, pred, s, t, start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, t2 - t1, perf_counter() - t2)
+    return res
+
+
+def _bidirectional(cg: CompiledGraph, s: int, t: int, p=None, stats: SearchStats | None = None):
+    # Двобічний пошук: прямий від s і зворотний від t по черзі (менша черга першою).
+    # p - потенціал для двобічного A*: p(v) = (h_t(v) - h_s(v)) / 2; прямий бік
+    # використовує ключ d + p, зворотний - d - p. При монотонних h_t, h_s зведені
+    # ваги невід'ємні, і зупинка "верх прямої + верх зворотної >= mu" коректна
+    # (для Дейкстри p = 0 і це класичний критерій).
+    ptr, nbr, wt, _, _ = cg.lists()
+    n = cg.n
+    dists = ([INF] * n, [INF] * n)
+    preds = ([-1] * n, [-1] * n)
+    dists[0][s] = dists[1][t] = 0.0
+    heaps = ([(p[s] if p else 0.0, 0.0, s)], [(-p[t] if p else 0.0, 0.0, t)])
+    mu, meet = INF, -1
+    if s == t:
+        mu, meet = 0.0, s
+    pop, push = heapq.heappop, heapq.heappush
+    pops = stale = 0
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= mu:
+            break
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        heap, dist, pred, other = heaps[side], dists[side], preds[side], dists[1 - side]
+        sign = 1.0 if side == 0 else -1.0
+        _, d, u = pop(heap)
+        pops += 1
+        if d > dist[u]:
+            stale += 1
+            continue
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            nd = d + wt[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                push(heap, (nd + sign * p[v] if p else nd, nd, v))
+                if nd + other[v] < mu:
+                    mu, meet = nd + other[v], v
+    if stats is not None:
+        stats.add_search(pops, stale, len(heaps[0]) + len(heaps[1]), 2, p is not None)
+    if meet < 0:
+        return None
+    path = [meet]
+    while path[-1] != s:
+        path.append(preds[0][path[-1]])
+    path.reverse()
+    while path[-1] != t:
+        path.append(preds[1][path[-1]])
+    return path, mu
+
+def _bi_result(cg: CompiledGraph, res, start, end) -> Tuple[List[str], float]:
+    if res is None:
+        raise nx.NetworkXNoPath(f"Node {end} not reachable from {start}")
+    path, dist = res
+    return [cg.ids[i] for i in path], float(dist)
+
+def bidirectional_dijkstra_path(G: nx.Graph, start: str, end: str,
+                                stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # Двобічна Дейкстра: на довгих коридорах обидві хвилі зустрічаються посередині.
+    t0 = _now(stats)
+    cg = _compiled(G)
+    if cg.table is not None:
+        return _table_route(cg, start, end, stats, t0)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    res = _bi_result(cg, _bidirectional(cg, s, t, None, stats), start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, 0.0, perf_counter() - t1)
+    return res
+
+def bidirectional_astar_path(G: nx.Graph, start: str, end: str,
+                             stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # Двобічний A* з усередненим потенціалом на масштабованій евклідовій оцінці.
+    t0 = _now(stats)
+    cg = _compiled(G)
+    if cg.table is not None:
+        return _table_route(cg, start, end, stats, t0)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    p = ((_euclid_h(cg, t) - _euclid_h(cg, s)) * 0.5).tolist()
+    t2 = _now(stats)
+    res = _bi_result(cg, _bidirectional(cg, s, t, p, stats), start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, t2 - t1, perf_counter() - t2)
+    return res
+
+
+def repair_tree(cg: CompiledGraph, dist, pred, changes) -> int:
+    # Інкрементний ремонт дерева найкоротших шляхів після зміни ваг
+    # (у дусі Ramalingam-Reps). changes - [(i, j, стара вага, нова вага)],
+    # cg уже містить нові ваги. Збільшення ваги ребра дерева скидає лише
+    # піддерево під ним, яке знову "підвішується" до незачеплених сусідів;
+    # зменшення поширюється хвилею Дейкстри від кінця ребра. dist/pred
+    # змінюються на місці; повертає кількість перерахованих вузлів.
+    ptr, nbr, wt, _, _ = cg.lists()
+    heap = []
+    push, pop = heapq.heappush, heapq.heappop
+
+    stack = []
+    for i, j, old, new in changes:
+        if new > old:
+            if pred[j] == i:
+                stack.append(j)
+            elif pred[i] == j:
+                stack.append(i)
+    affected = set()
+    while stack:
+        x = stack.pop()
+        if x in affected:
+            continue
+        affected.add(x)
+        for k in range(ptr[x], ptr[x + 1]):
+            y = nbr[k]
+            if pred[y] == x and y not in affected:
+                stack.append(y)
+    for x in affected:
+        dist[x] = INF
+        pred[x] = -1
+    for x in affected:
+        best, arg = INF, -1
+        for k in range(ptr[x], ptr[x + 1]):
+            y = nbr[k]
+            if y not in affected and dist[y] + wt[k] < best:
+                best, arg = dist[y] + wt[k], y
+        if arg >= 0:
+            dist[x] = best
+            pred[x] = arg
+            push(heap, (best, x))
+
+    for i, j, old, new in changes:
+        if new < old:
+            for a, b in ((i, j), (j, i)):
+                nd = dist[a] + new
+                if nd < dist[b]:
+                    dist[b] = nd
+                    pred[b] = a
+                    push(heap, (nd, b))
+
+    touched = len(affected)
+    while heap:
+        d, u = pop(heap)
+        if d > dist[u]:
+            continue
+        touched += 1
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            nd = d + wt[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                push(heap, (nd, v))
+    return touched
+
+
+class SPTCache:
+    # LRU-кеш дерев найкоротших шляхів: ключ (версія графа, початок, алгоритм),
+    # значення - масиви відстаней і попередників для всього графа.
+    # Поява нової версії графа скидає дерева старих версій.
+    # Повне дерево дорожче за пошук із раннім виходом (приблизно вдвічі), тож
+    # cached_path будує його лише для повторного start (_seen - ключі недавніх
+    # промахів) або коли eager (інтерактивні GUI/CLI: той самий start, нові цілі).
+    __slots__ = ("max_entries", "max_bytes", "nbytes", "hits", "misses",
+                 "evictions", "eager", "_version", "_data", "_seen")
+
+    def __init__(self, max_entries: int = SPT_CACHE_ENTRIES, max_bytes: int = SPT_CACHE_BYTES,
+                 eager: bool = False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eager = eager
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._version = None
+        self._data = OrderedDict()
+        self._seen = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._seen.clear()
+        self.nbytes = 0
+
+    def _use(self, version: int) -> None:
+        # дерева й промахи іншої версії графа більше не потрібні
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def get(self, version: int, start: int, algo: str):
+        self._use(version)
+        key = (version, start, algo)
+        tree = self._data.get(key)
+        if tree is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return tree
+
+    def put(self, version: int, start: int, algo: str, dist, pred) -> None:
+        tree = (np.asarray(dist, dtype=np.float64), np.asarray(pred, dtype=np.int32))
+        size = tree[0].nbytes + tree[1].nbytes
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        # як і в get: дерево іншої версії графа скидає кеш старої
+        self._use(version)
+        key = (version, start, algo)
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[0].nbytes + old[1].nbytes
+        self._data[key] = tree
+        self.nbytes += size
+        self._trim()
+
+    def want_tree(self, version: int, start: int, algo: str) -> bool:
+        # чи будувати повне дерево після промаху: так, якщо eager або від цього
+        # start уже був промах у цій версії графа (запит запам'ятовується)
+        if self.eager:
+            return True
+        self._use(version)
+        key = (version, start, algo)
+        if key in self._seen:
+            return True
+        self._seen[key] = None
+        if len(self._seen) > SPT_CACHE_SEEN:
+            self._seen.popitem(last=False)
+        return False
+
+    def configure(self, max_entries: int | None = None, max_bytes: int | None = None,
+                  eager: bool | None = None) -> None:
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if eager is not None:
+            self.eager = eager
+        self._trim()
+
+    def _trim(self) -> None:
+        # витісняє найдавніше використані дерева, доки не влізе в обидві межі
+        while self._data and (len(self._data) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (d, p) = self._data.popitem(last=False)
+            self.nbytes -= d.nbytes + p.nbytes
+            self.evictions += 1
+
+    def repair(self, cg: CompiledGraph, old_version: int, changes) -> int:
+        # після правок на місці дерева старої версії ремонтуються, а не
+        # викидаються, і переходять під новий номер версії графа
+        if self._version != old_version:
+            return 0
+        repaired = OrderedDict()
+        for (_, start, algo), (dist, pred) in self._data.items():
+            repair_tree(cg, dist, pred, changes)
+            repaired[(cg.version, start, algo)] = (dist, pred)
+        self._data = repaired
+        self._seen = OrderedDict(((cg.version, start, algo), None) for _, start, algo in self._seen)
+        self._version = cg.version
+        return len(repaired)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+SPT_CACHE = SPTCache()
+
+def cached_path(G: nx.Graph, start: str, end: str, algo: str = "dijkstra",
+                stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # Маршрут через кеш дерев: повне дерево найкоротших шляхів від start
+    # будується з другого запиту від нього (або одразу при SPT_CACHE.eager),
+    # наступні цілі від того ж start - лише прохід по ньому. Перший запит -
+    # звичайна Дейкстра з раннім виходом, як dijkstra_path.
+    t0 = _now(stats)
+    cg = _compiled(G)
+    if cg.table is not None:
+        return _table_route(cg, start, end, stats, t0)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    tree = SPT_CACHE.get(cg.version, s, algo)
+    if tree is not None:
+        dist, pred = tree
+    elif SPT_CACHE.want_tree(cg.version, s, algo):
+        # для повного дерева цілі немає, тож A*/ALT зводяться до тієї ж Дейкстри
+        dist, pred = _dijkstra(cg, s, -1, stats)
+        SPT_CACHE.put(cg.version, s, algo, dist, pred)
+    else:
+        dist, pred = _dijkstra(cg, s, t, stats)
+    res = _result(cg, dist, pred, s, t, start, end)
+    if stats is not None:
+        stats.add_times(t1 - t0, 0.0, perf_counter() - t1)
+    return res
+
+
+
+def _spur(cg: CompiledGraph, s: int, t: int, rd, rnext, blocked: set, banned: set,
+          bound: float = INF, stats: SearchStats | None = None):
+    # Відгалуження Йена від s до t за деревом rd/rnext (відстані й наступні вузли
+    # до t), оминаючи вузли blocked і ребра s-v для v з banned. rd - точна
+    # відстань до t у повному графі, тож це допустима й монотонна оцінка A*
+    # у графі з вилученими вузлами/ребрами. Щойно з черги виходить вузол,
+    # шлях дерева від якого до t не зачіпає вилученого, пошук зупиняється:
+    # g + rd цього вузла вже досяжне і не більше за будь-яку іншу оцінку.
+    # Відгалуження, довші за bound, не шукаються далі.
+    # Повертає (вузли від s до t, довжини префіксів) або None.
+    ptr, nbr, wt, _, _ = cg.lists()
+    g = {s: 0.0}
+    pred = {s: -1}
+    for b in blocked:
+        g[b] = -1.0  # вилучені вузли ніколи не релаксуються
+    clean = {t: True}
+
+    def tree_ok(u: int) -> bool:
+        # чи вільний шлях дерева від u до t (з пам'яттю в межах відгалуження)
+        if u == s:
+            x = rnext[s]
+            if x in banned:
+                return False
+        else:
+            x = u
+        trail = []
+        while True:
+            ok = clean.get(x)
+            if ok is not None:
+                break
+            if x < 0 or x == s or x in blocked:
+                ok = False
+                break
+            trail.append(x)
+            x = rnext[x]
+        for y in trail:
+            clean[y] = ok
+        return ok
+
+    heap = [(rd[s], 0.0, s)]
+    pop, push = heapq.heappop, heapq.heappush
+    pops = stale = 0
+    found = -1
+    while heap:
+        f, d, u = pop(heap)
+        pops += 1
+        if d > g[u]:
+            stale += 1
+            continue
+        if f > bound:
+            break
+        if tree_ok(u):
+            found = u
+            break
+        for k in range(ptr[u], ptr[u + 1]):
+            v = nbr[k]
+            if u == s and v in banned:
+                continue
+            nd = d + wt[k]
+            if nd < g.get(v, INF):
+                hv = rd[v]
+                if hv == INF or nd + hv > bound:
+                    continue
+                g[v] = nd
+                pred[v] = u
+                push(heap, (nd + hv, nd, v))
+    if stats is not None:
+        stats.add_search(pops, stale, len(heap), heuristic=True)
+    if found < 0:
+        return None
+    nodes = [found]
+    while nodes[-1] != s:
+        nodes.append(pred[nodes[-1]])
+    nodes.reverse()
+    prefix = [g[x] for x in nodes]
+    # далі - готовий шлях дерева; довжини префіксів через rd
+    base = g[found] + rd[found]
+    x = found
+    while x != t:
+        x = rnext[x]
+        nodes.append(x)
+        prefix.append(base - rd[x])
+    return nodes, prefix
+
+def _overlap(edges: dict, nodes, prefix) -> float:
+    # частка довжини шляху, що проходить ребрами з edges
+    total = prefix[-1]
+    if total <= 0:
+        return 1.0
+    shared = 0.0
+    for a, b, pa, pb in zip(nodes, nodes[1:], prefix, prefix[1:]):
+        if (a, b) in edges:
+            shared += pb - pa
+    return shared / total
+
+def k_shortest_paths(G, start: str, end: str, k: int = 3, max_overlap: float | None = None,
+                     limit: int | None = None,
+                     stats: SearchStats | None = None) -> List[Tuple[List[str], float]]:
+    # До k найкоротших простих шляхів (Йен) за зростанням довжини.
+    # Спільна робота між ітераціями: одне дерево найкоротших шляхів до end
+    # (з SPT_CACHE, бо граф неорієнтований - це дерево від end) дає і перший
+    # шлях, і точну оцінку A* для відгалужень, а хвости відгалужень беруться
+    # з нього ж без пошуку (_spur); відгалуження шляху рахуються лише від
+    # його точки відхилення від батьківського (Лоулер).
+    # max_overlap - фільтр "досить різних" маршрутів: шлях пропускається, якщо
+    # частка його довжини на ребрах уже обраного шляху більша. limit - скільки
+    # шляхів перебрати найбільше (за замовчуванням 10 * k).
+    t0 = _now(stats)
+    cg = _compiled(G)
+    s, t = _endpoints(cg, start, end)
+    t1 = _now(stats)
+    tree = SPT_CACHE.get(cg.version, t, "dijkstra")
+    if tree is None:
+        dist, pred = _dijkstra(cg, t, -1, stats)
+        SPT_CACHE.put(cg.version, t, "dijkstra", dist, pred)
+    else:
+        dist, pred = tree[0].tolist(), tree[1].tolist()
+    rd, rnext = dist, pred
+    if rd[s] == INF:
+        raise nx.NetworkXNoPath(f"Node {end} not reachable from {start}")
+    t2 = _now(stats)
+
+    nodes = [s]
+    while nodes[-1] != t:
+        nodes.append(rnext[nodes[-1]])
+    first = (rd[s], 0, nodes, [rd[s] - rd[x] for x in nodes], 0)
+    limit = 10 * k if limit is None else limit
+    candidates = [first]
+    seen = {tuple(nodes)}
+    order = 1
+    generated = []  # усі перебрані шляхи - від них відгалужуються наступні
+    out = []
+    chosen = []  # ребра обраних шляхів для фільтра перекриття
+    while candidates and len(out) < k and len(generated) < limit:
+        cost, _, nodes, prefix, dev = heapq.heappop(candidates)
+        generated.append(nodes)
+        if max_overlap is None or all(_overlap(e, nodes, prefix) <= max_overlap for e in chosen):
+            out.append(([cg.ids[i] for i in nodes], float(cost)))
+            if max_overlap is not None:
+                e = set(zip(nodes, nodes[1:]))
+                e.update(zip(nodes[1:], nodes))
+                chosen.append(e)
+            if len(out) >= k:
+                break
+        # скільки шляхів ще можуть знадобитися: якщо в черзі вже стільки не довших
+        # за bound, довше відгалуження ніколи не дійде до відповіді
+        room = (k - len(out)) if max_overlap is None else (limit - len(generated))
+        bound = heapq.nsmallest(room, candidates)[-1][0] if 0 < room <= len(candidates) else INF
+        for i in range(dev, len(nodes) - 1):
+            root = nodes[:i + 1]
+            banned = {p[i + 1] for p in generated if len(p) > i + 1 and p[:i + 1] == root}
+            res = _spur(cg, nodes[i], t, rd, rnext, set(root[:-1]), banned, bound - prefix[i], stats)
+            if res is None:
+                continue
+            tail, tail_prefix = res
+            path = root[:-1] + tail
+            key = tuple(path)
+            # петля можлива лише на ребрах нульової ваги
+            if key in seen or len(set(key)) < len(key):
+                continue
+            seen.add(key)
+            base = prefix[i]
+            new_prefix = prefix[:i] + [base + c for c in tail_prefix]
+            heapq.heappush(candidates, (new_prefix[-1], order, path, new_prefix, i))
+            order += 1
+            if 0 < room <= len(candidates):
+                bound = min(bound, heapq.nsmallest(room, candidates)[-1][0])
+    if stats is not None:
+        stats.add_times(t1 - t0, t2 - t1, perf_counter() - t2)
+    return out
+
+
+# Досяжність (ізохрони): усі вузли не далі cutoff від одного чи кількох джерел.
+
+def _bounded(cg: CompiledGraph, seeds: Sequence[int], cutoff: float, stats: SearchStats | None = None):
+    # Дейкстра від кількох джерел одразу, що не виходить за cutoff: у чергу не
+    # потрапляє жоден вузол, дальший за межу. Словники, бо зазвичай досяжна мала
+    # частина графа. Вузли - у порядку остаточного визначення (за неспаданням відстані).
+    ptr, nbr, wt, _, _ = cg.lists()
+    dist = {}
+    heap = []
+    for s in seeds:
+        if s not in dist:
+            dist[s] = 0.0
+            heap.append((0.0, s))
+    n_seeds = len(heap)
+    pop, push = heapq.heappop, heapq.heappush
+    order, out = [], []
+    pops = stale = 0
+    while heap:
+        d, u = pop(heap)
+        pops += 1
+        if d > dist[u]:
+            stale += 1
+            continue
+        order.append(u)
+        out.append(d)
+        for k in range(ptr[u], ptr[u + 1]):
+            nd = d + wt[k]
+            if nd <= cutoff:
+                v = nbr[k]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    push(heap, (nd, v))
+    if stats is not None:
+        stats.add_search(pops, stale, 0, n_seeds)
+    return order, out
+
+def _seeds(cg: CompiledGraph, sources) -> List[int]:
+    # одне джерело (рядок) або кілька
+    if isinstance(sources, str):
+        sources = [sources]
+    seeds = sorted({cg.idx(n) for n in sources})
+    if not seeds:
+        raise ValueError("Не вказано жодного джерела")
+    return seeds
+
+def reachable(G, sources, cutoff: float,
+              stats: SearchStats | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    # Вузли не далі cutoff від найближчого з sources: (номери вузлів у порядку
+    # cg.ids, відстані) за зростанням відстані. Для одного джерела з готовим
+    # деревом у SPT_CACHE пошуку немає - лише вибірка з масиву відстаней.
+    t0 = _now(stats)
+    cg = _compiled(G)
+    seeds = _seeds(cg, sources)
+    t1 = _now(stats)
+    tree = SPT_CACHE.get(cg.version, seeds[0], "dijkstra") if len(seeds) == 1 else None
+    if tree is not None:
+        dist = tree[0]
+        idx = np.flatnonzero(dist <= cutoff)
+        order = np.argsort(dist[idx], kind="stable")
+        idx, d = idx[order].astype(np.int32), dist[idx[order]]
+    else:
+        order, out = _bounded(cg, seeds, cutoff, stats)
+        idx, d = np.array(order, dtype=np.int32), np.array(out, dtype=np.float64)
+    if stats is not None:
+        stats.add_times(t1 - t0, 0.0, perf_counter() - t1)
+    return idx, d
+
+def reachable_many(G, queries, stats: SearchStats | None = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    # Пакет запитів [(sources, cutoff)] -> [(номери, відстані)] у тому ж порядку.
+    # Запити з тими самими джерелами рахуються одним пошуком до найбільшої межі:
+    # вузли впорядковані за відстанню, тож менша межа - префікс масиву.
+    cg = _compiled(G)
+    groups = {}
+    for q, (sources, cutoff) in enumerate(queries):
+        groups.setdefault(tuple(_seeds(cg, sources)), []).append((q, float(cutoff)))
+    out = [None] * len(queries)
+    for seeds, items in groups.items():
+        idx, d = reachable(cg, [cg.ids[s] for s in seeds], max(c for _, c in items), stats)
+        for q, cutoff in items:
+            k = int(np.searchsorted(d, cutoff, side="right"))
+            out[q] = idx[:k], d[:k]
+    return out
+
+# Пакетні запити: одна повна Дейкстра на кожне джерело заповнює рядок матриці.
+
+_WORKER_CG = None
+
+def _init_worker(cg: CompiledGraph) -> None:
+    # граф передається кожному процесу один раз - через initializer
+    global _WORKER_CG
+    _WORKER_CG = cg
+
+def _rows(cg: CompiledGraph, src_idx, tgt_idx) -> np.ndarray:
+    out = np.empty((len(src_idx), len(tgt_idx)), dtype=np.float64)
+    for r, s in enumerate(src_idx):
+        dist, _ = _dijkstra(cg, s)
+        out[r] = np.asarray(dist)[tgt_idx]
+    return out
+
+def _worker_rows(src_idx, tgt_idx) -> np.ndarray:
+    return _rows(_WORKER_CG, src_idx, tgt_idx)
+
+def iter_distance_matrix(
+    G, sources: Sequence[str], targets: Sequence[str] | None = None,
+    workers: int = 0, chunk_size: int = 64,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    # Потокова версія distance_matrix: віддає (номер першого рядка, блок рядків)
+    # порціями по chunk_size джерел; при workers > 1 у роботі одночасно
+    # щонайбільше 2 * workers порцій, тож пам'ять обмежена незалежно від len(sources).
+    cg = _compiled(G)
+    targets = list(sources) if targets is None else list(targets)
+    src_idx = [cg.idx(n) for n in sources]
+    tgt_idx = np.array([cg.idx(n) for n in targets], dtype=np.int64)
+    chunk_size = max(1, chunk_size)
+    chunks = [(i, src_idx[i:i + chunk_size]) for i in range(0, len(src_idx), chunk_size)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        for i, part in chunks:
+            yield i, _rows(cg, part, tgt_idx)
+        return
+
+    # пул процесів імпортується лише тут: одиночні пошуки його не потребують
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cg,)) as ex:
+        pending = []
+        for i, part in chunks:
+            pending.append((i, ex.submit(_worker_rows, part, tgt_idx)))
+            if len(pending) >= 2 * workers:
+                j, fut = pending.pop(0)
+                yield j, fut.result()
+        for j, fut in pending:
+            yield j, fut.result()
+
+def distance_matrix(
+    G, sources: Sequence[str], targets: Sequence[str] | None = None,
+    workers: int = 0, chunk_size: int = 64,
+) -> np.ndarray:
+    # Матриця відстаней len(sources) x len(targets) (inf - недосяжно); значення
+    # збігаються з dijkstra_path, бо рахуються тим самим ядром.
+    n_targets = len(sources if targets is None else targets)
+    out = np.empty((len(sources), n_targets), dtype=np.float64)
+    for i, block in iter_distance_matrix(G, sources, targets, workers, chunk_size):
+        out[i:i + len(block)] = block
+    return out
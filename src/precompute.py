@@ -0,0 +1,137 @@
+from __future__ import annotations
+import json
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from src.config import DATA_PATH
+    from src.data_loader import load_graph_from_json, file_digest
+    from src.graph_model import CompiledGraph, build_graph, compile_graph
+    from src.pathfinding import _dijkstra
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/precompute.py
+    from config import DATA_PATH
+    from data_loader import load_graph_from_json, file_digest
+    from graph_model import CompiledGraph, build_graph, compile_graph
+    from pathfinding import _dijkstra
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Офлайн-"компіляція" маршрутів: усі пари найкоротших шляхів рахуються один раз
+# і зберігаються поруч із JSON як матриця відстаней та матриця наступних кроків.
+# Рядок t обох матриць стосується цілі t: dist[t, i] - відстань від i до t,
+# nxt[t, i] - сусід i, через якого йде найкоротший шлях до t. Тому обхід
+# маршруту до t читає лише один рядок memory-mapped файлу.
+
+
+def table_paths(json_path: str | Path) -> Tuple[Path, Path, Path]:
+    p = Path(json_path)
+    stem = p.with_suffix("")
+    return (
+        stem.with_name(stem.name + ".apsp.dist.npy"),
+        stem.with_name(stem.name + ".apsp.next.npy"),
+        stem.with_name(stem.name + ".apsp.json"),
+    )
+
+
+class PathTable:
+    # таблиця всіх пар: відповідь на запит - прохід по next-hop за O(довжини шляху)
+    __slots__ = ("ids", "index", "dist", "nxt", "digest")
+
+    def __init__(self, ids, dist, nxt, digest):
+        self.ids = list(ids)
+        self.index = {n: i for i, n in enumerate(self.ids)}
+        self.dist = dist
+        self.nxt = nxt
+        self.digest = digest
+
+    def route(self, start: str, end: str) -> Tuple[List[str], float]:
+        s, t = self.index.get(start), self.index.get(end)
+        if s is None or t is None:
+            raise nx.NodeNotFound(f"Either source {start} or target {end} is not in G")
+        d = float(self.dist[t, s])
+        if d == np.inf:
+            raise nx.NetworkXNoPath(f"Node {end} not reachable from {start}")
+        row = self.nxt[t]
+        path = [s]
+        while path[-1] != t:
+            path.append(int(row[path[-1]]))
+        return [self.ids[i] for i in path], d
+
+    def affected_rows(self, changes) -> np.ndarray:
+        # рядки (цілі), чиї дерева зачіпає зміна ваг: збільшення на ребрі
+        # дерева або зменшення, що дає коротший шлях
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for i, j, old, new in changes:
+            if new > old:
+                mask |= (self.nxt[:, j] == i) | (self.nxt[:, i] == j)
+            elif new < old:
+                mask |= (self.dist[:, i] + new < self.dist[:, j]) | (self.dist[:, j] + new < self.dist[:, i])
+        return np.nonzero(mask)[0]
+
+
+def compile_table(G: nx.Graph, json_path: str | Path = DATA_PATH) -> PathTable:
+    # n пошуків Дейкстри (по одному на ціль) -> dist/nxt, запис у .npy + метадані
+    cg = compile_graph(G)
+    n = cg.n
+    dist = np.empty((n, n), dtype=np.float64)
+    nxt = np.empty((n, n), dtype=np.int32)
+    for t in range(n):
+        # граф неорієнтований: дерево попередників від t = next-hop до t
+        d, pred = _dijkstra(cg, t)
+        dist[t] = d
+        nxt[t] = pred
+
+    digest = file_digest(json_path)
+    dist_p, next_p, meta_p = table_paths(json_path)
+    np.save(dist_p, dist)
+    np.save(next_p, nxt)
+    with open(meta_p, "w", encoding="utf-8") as f:
+        json.dump({"digest": digest, "ids": cg.ids}, f, ensure_ascii=False)
+    return PathTable(cg.ids, dist, nxt, digest)
+
+
+def load_table(json_path: str | Path = DATA_PATH, digest: str | None = None):
+    # відкриває таблицю через mmap (copy-on-write: ремонт після закриття ребер
+    # змінює лише сторінки в пам'яті, не файл); None - якщо її немає або JSON змінився
+    dist_p, next_p, meta_p = table_paths(json_path)
+    if not (dist_p.exists() and next_p.exists() and meta_p.exists()):
+        return None
+    with open(meta_p, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("digest") != (digest or file_digest(json_path)):
+        return None
+    dist = np.load(dist_p, mmap_mode="c")
+    nxt = np.load(next_p, mmap_mode="c")
+    return PathTable(meta["ids"], dist, nxt, meta["digest"])
+
+
+def attach_table(G: nx.Graph, table) -> bool:
+    # підключає таблицю до скомпільованого графа, якщо вона описує ті самі вузли
+    # в тому самому порядку (номери вузлів спільні - потрібно для ремонту);
+    # після перекомпіляції графа таблиця відпадає сама
+    if table is None:
+        return False
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    if table.ids != cg.ids:
+        return False
+    cg.table = table
+    return True
+
+
+def main():
+    data = load_graph_from_json(DATA_PATH)
+    G = build_graph(data)
+    t0 = time.perf_counter()
+    table = compile_table(G, DATA_PATH)
+    dt = time.perf_counter() - t0
+    size = table.dist.nbytes + table.nxt.nbytes
+    print(f" Таблицю маршрутів для {len(table.ids)} вузлів збережено поруч із {DATA_PATH}")
+    print(f" Час: {dt:.2f} с, розмір: {size / 1024:.1f} КБ")
+
+if __name__ == "__main__":
+    main()
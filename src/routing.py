@@ -0,0 +1,186 @@
+from __future__ import annotations
+import math
+import time
+from typing import List, Tuple
+
+try:
+    from src.pathfinding import (
+        cached_path, astar_path, alt_path,
+        bidirectional_dijkstra_path, bidirectional_astar_path,
+        SPT_CACHE, SearchStats, SEARCH_TOTALS, build_landmarks, distance_matrix, k_shortest_paths,
+        prepare_heuristic, reachable,
+    )
+    from src.contraction import build_ch, ch_path
+    from src.hierarchy import build_hierarchy, hier_path
+    from src.precompute import attach_table, load_table
+    from src.tour import plan_tour
+    from src.facilities import facility_table, nearest_facility
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from pathfinding import (
+        cached_path, astar_path, alt_path,
+        bidirectional_dijkstra_path, bidirectional_astar_path,
+        SPT_CACHE, SearchStats, SEARCH_TOTALS, build_landmarks, distance_matrix, k_shortest_paths,
+        prepare_heuristic, reachable,
+    )
+    from contraction import build_ch, ch_path
+    from hierarchy import build_hierarchy, hier_path
+    from precompute import attach_table, load_table
+    from tour import plan_tour
+    from facilities import facility_table, nearest_facility
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+
+def _dijkstra_cached(G, start, end, stats=None):
+    # той самий старт і нові цілі - відповідь із кешованого дерева
+    return cached_path(G, start, end, "dijkstra", stats)
+
+# назва алгоритму -> (підпис для CLI/GUI, функція пошуку з контрактом
+# fn(G, start, end, stats=None) -> (path, dist))
+ALGORITHMS = {
+    "dijkstra":   ("Dijkstra", _dijkstra_cached),
+    "astar":      ("A*", astar_path),
+    "alt":        ("A* (ALT)", alt_path),
+    "ch":         ("CH", ch_path),
+    "bidijkstra": ("Bi-Dijkstra", bidirectional_dijkstra_path),
+    "biastar":    ("Bi-A*", bidirectional_astar_path),
+    "hier":       ("Поверхи", hier_path),
+}
+
+# передобробка, яку алгоритм робить один раз на граф (кешується в cg.aux);
+# алгоритмам без неї нічого готувати не треба
+PREPARE = {
+    "astar":   prepare_heuristic,
+    "alt":     lambda G: (prepare_heuristic(G), build_landmarks(G)),
+    "ch":      build_ch,
+    "biastar": prepare_heuristic,
+    "hier":    build_hierarchy,
+}
+
+
+def prepare(G, algo: str) -> None:
+    # передобробка наперед, щоб перший запит не платив за неї
+    fn = PREPARE.get(algo)
+    if fn is not None:
+        fn(G)
+
+
+def route(G: nx.Graph, start: str, end: str, algo: str = "dijkstra",
+          stats: SearchStats | None = None) -> Tuple[List[str], float]:
+    # stats - SearchStats, куди додаються лічильники пошуку; вони ж потрапляють
+    # у сумарні SEARCH_TOTALS
+    _, fn = ALGORITHMS.get(algo, ALGORITHMS["dijkstra"])
+    if stats is None:
+        return fn(G, start, end)
+    one = SearchStats()
+    try:
+        return fn(G, start, end, stats=one)
+    finally:
+        stats.add(one)
+        SEARCH_TOTALS.add(one)
+
+
+def traced_route(G: nx.Graph, start: str, end: str, algo: str = "dijkstra") -> Tuple[List[str], float, SearchStats]:
+    # те саме, що route, але з лічильниками цього запиту
+    stats = SearchStats()
+    path, dist = route(G, start, end, algo, stats)
+    return path, dist, stats
+
+
+def alternatives(G, start: str, end: str, path: List[str], k: int, max_overlap: float | None = None,
+                 stats: SearchStats | None = None) -> List[Tuple[List[str], float]]:
+    # до k - 1 інших маршрутів, ніж уже знайдений path, за зростанням довжини;
+    # max_overlap >= 1 - без фільтра перекриття
+    if max_overlap is not None and max_overlap >= 1.0:
+        max_overlap = None
+    found = k_shortest_paths(G, start, end, k, max_overlap, stats=stats)
+    return [(p, d) for p, d in found if p != path][:max(0, k - 1)]
+
+
+def algo_title(algo: str) -> str:
+    return ALGORITHMS.get(algo, ALGORITHMS["dijkstra"])[0]
+
+
+# Пошук в окремому процесі (GUI, сервіс): скомпільований граф передається
+# кожному процесу один раз через initializer, таблиця всіх пар - лише шляхом
+# до файлів (відкривається в процесі через mmap, а не копіюється).
+
+_WORKER_CG = None
+
+def init_worker(cg, json_path=None, digest=None, eager_trees: bool = False) -> None:
+    # eager_trees - повні дерева Дейкстри з першого запиту від start
+    # (SPTCache.eager): для GUI, де від однієї точки шукають кілька цілей
+    global _WORKER_CG
+    _WORKER_CG = cg
+    SPT_CACHE.configure(eager=eager_trees)
+    if json_path is not None:
+        attach_table(cg, load_table(json_path, digest))
+
+
+def worker_route(start: str, end: str, algo: str = "dijkstra", with_stats: bool = False,
+                 k: int = 1, max_overlap: float | None = None):
+    # (path, dist, stats або None, info або None) у процесі після init_worker;
+    # info - опис передобробки CH і/або "alternatives" (при k > 1)
+    stats = SearchStats() if with_stats else None
+    path, dist = route(_WORKER_CG, start, end, algo, stats)
+    info = {}
+    if algo == "ch":
+        ch = build_ch(_WORKER_CG)
+        info.update(build_seconds=ch.build_seconds, n_shortcuts=ch.n_shortcuts, nbytes=ch.nbytes)
+    if k > 1:
+        info["alternatives"] = alternatives(_WORKER_CG, start, end, path, k, max_overlap, stats)
+    return path, dist, stats, info or None
+
+
+def worker_matrix(sources, targets=None):
+    # матриця відстаней у процесі після init_worker (inf - недосяжно)
+    return distance_matrix(_WORKER_CG, sources, targets)
+
+
+def worker_reach(sources, cutoff: float, with_stats: bool = False):
+    # ([id вузла], [відстань], stats або None) у процесі після init_worker
+    stats = SearchStats() if with_stats else None
+    idx, dist = reachable(_WORKER_CG, sources, cutoff, stats)
+    if stats is not None:
+        SEARCH_TOTALS.add(stats)
+    ids = _WORKER_CG.ids
+    return [ids[i] for i in idx.tolist()], dist.tolist(), stats
+
+
+def worker_facility(start: str, ftype: str, nodes):
+    # (об'єкт, шлях, довжина, {вузол: відстань до найближчого}) у процесі після
+    # init_worker; nodes - відкриті об'єкти типу: таблиця процесу кешується
+    # і доводиться до цього набору інкрементно
+    facility, path, dist = nearest_facility(_WORKER_CG, start, ftype, nodes)
+    table = facility_table(_WORKER_CG, ftype, nodes)
+    ids = _WORKER_CG.ids
+    return facility, path, dist, {ids[i]: d for i, d in enumerate(table.dist) if d < math.inf}
+
+
+def worker_tour(stops, start=None, end=None, with_stats: bool = False):
+    # (tour.Tour, stats або None) у процесі після init_worker
+    stats = SearchStats() if with_stats else None
+    t = plan_tour(_WORKER_CG, stops, start, end, stats)
+    if stats is not None:
+        SEARCH_TOTALS.add(stats)
+    return t, stats
+
+
+def worker_batch(queries) -> list:
+    # пакет запитів [(рядок, id, start, end, algo)] у процесі після init_worker ->
+    # рядки результатів для JSONL; помилка пошуку - поле error, а не виняток
+    out = []
+    for line, qid, start, end, algo in queries:
+        rec = {"line": line} if qid is None else {"line": line, "id": qid}
+        rec.update(start=start, end=end, algo=algo)
+        t0 = time.perf_counter()
+        try:
+            path, dist = route(_WORKER_CG, start, end, algo)
+            rec.update(path=path, dist=dist)
+        except (nx.NodeNotFound, nx.NetworkXNoPath, KeyError) as ex:
+            rec["error"] = str(ex.args[0] if isinstance(ex, KeyError) and ex.args else ex)
+        rec["ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        out.append(rec)
+    return out
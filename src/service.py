@@ -0,0 +1,294 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+try:
+    from src.config import DATA_PATH, DEFAULT_ALGO
+    from src.graph_model import compile_graph
+    from src.precompute import attach_table, load_table
+    from src.routing import ALGORITHMS, init_worker, worker_matrix, worker_route
+    from src.snapshot import load_graph
+    from src.spatial import spatial_index
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/service.py
+    from config import DATA_PATH, DEFAULT_ALGO
+    from graph_model import compile_graph
+    from precompute import attach_table, load_table
+    from routing import ALGORITHMS, init_worker, worker_matrix, worker_route
+    from snapshot import load_graph
+    from spatial import spatial_index
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Локальний HTTP/JSON-сервіс маршрутів на asyncio (лише stdlib). Граф читається
+# і компілюється один раз; пошуки (CPU) виконуються в пулі процесів, кожен
+# з яких отримує граф один раз (routing.init_worker). Однакові запити, що
+# надійшли, поки перший ще рахується, чекають на той самий результат.
+#
+#   GET  /route?start=12&end=LIB&algo=astar      -> {"path": [...], "dist": 27.0}
+#   POST /matrix {"sources": [...], "targets": [...]} -> {"dist": [[...]]} (null - недосяжно)
+#   GET  /nearest?x=0&y=10&floor=1&k=3           -> {"nodes": [{"id", "dist"}]}
+#   GET  /nodes, GET /health
+#
+#   python src/service.py --port 8080 --workers 4
+
+MAX_BODY = 1 << 20
+MAX_MATRIX_CELLS = 1_000_000
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class RouteService:
+    def __init__(self, G: nx.Graph, workers: int = 0, json_path=DATA_PATH):
+        self.G = G
+        cg = compile_graph(G)
+        table = cg.table
+        args = (cg, json_path, table.digest) if table is not None else (cg,)
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=args)
+        else:
+            # без пулу процесів - один потік поруч із циклом подій (кеш дерев
+            # не розрахований на паралельні потоки)
+            init_worker(*args)
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.spatial = spatial_index(G)
+        self.inflight = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.started = time.time()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _shared(self, key, fn, *args):
+        # один обчислювальний запит на ключ; решта чекає на той самий future.
+        # shield: клієнт, що відключився, не скасовує результат для інших
+        fut = self.inflight.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+            self.inflight[key] = fut
+            fut.add_done_callback(lambda _f: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(fut)
+
+    # обробники: params - параметри запиту і поля JSON-тіла разом
+    async def route(self, params: dict) -> dict:
+        start, end = _required(params, "start"), _required(params, "end")
+        algo = params.get("algo") or DEFAULT_ALGO
+        if not isinstance(algo, str):
+            raise HTTPError(400, f"algo має бути рядком, а не {type(algo).__name__}")
+        algo = algo.lower()
+        if algo not in ALGORITHMS:
+            raise HTTPError(400, f"Невідомий алгоритм {algo!r} (є: {', '.join(ALGORITHMS)})")
+        path, dist, _, _ = await self._shared(("route", start, end, algo), worker_route, start, end, algo)
+        return {"start": start, "end": end, "algo": algo, "path": path, "dist": dist}
+
+    async def matrix(self, params: dict) -> dict:
+        sources = _names(params, "sources")
+        targets = _names(params, "targets")
+        if not sources:
+            raise HTTPError(400, "Потрібен непорожній список sources")
+        if len(sources) * len(targets if targets is not None else sources) > MAX_MATRIX_CELLS:
+            raise HTTPError(413, f"Матриця більша за {MAX_MATRIX_CELLS} клітинок")
+        key = ("matrix", tuple(sources), tuple(targets) if targets is not None else None)
+        m = await self._shared(key, worker_matrix, sources, targets)
+        return {"sources": sources, "targets": targets if targets is not None else sources,
+                "dist": [[d if math.isfinite(d) else None for d in row] for row in m.tolist()]}
+
+    async def nearest(self, params: dict) -> dict:
+        # субмілісекундний запит - прямо в циклі подій, без пулу
+        try:
+            x, y = float(_required(params, "x")), float(_required(params, "y"))
+            k = int(params.get("k", 1))
+            radius = params.get("radius")
+            if radius is not None:
+                radius = float(radius)
+            if not all(map(math.isfinite, (x, y) if radius is None else (x, y, radius))):
+                raise ValueError("координати і радіус мають бути скінченними числами")
+            floor = params.get("floor")
+            if floor not in (None, "", "all"):
+                floor = int(floor)
+            elif floor == "":
+                floor = None
+        except (TypeError, ValueError) as ex:
+            raise HTTPError(400, f"Некоректні параметри: {ex}") from ex
+        if radius is not None:
+            found = self.spatial.within((x, y), radius, floor)
+        else:
+            found = self.spatial.nearest((x, y), floor, max(1, k))
+        return {"nodes": [{"id": n, "dist": d} for n, d in found]}
+
+    async def nodes(self, params: dict) -> dict:
+        return {"nodes": list(self.G.nodes)}
+
+    async def health(self, params: dict) -> dict:
+        return {"nodes": self.G.number_of_nodes(), "edges": self.G.number_of_edges(),
+                "requests": self.requests, "coalesced": self.coalesced,
+                "inflight": len(self.inflight), "uptime_s": round(time.time() - self.started, 1)}
+
+    async def dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        handler = {"/route": self.route, "/matrix": self.matrix, "/nearest": self.nearest,
+                   "/nodes": self.nodes, "/health": self.health}.get(url.path)
+        if handler is None:
+            raise HTTPError(404, f"Немає ресурсу {url.path}")
+        if method not in ("GET", "POST"):
+            raise HTTPError(405, f"Метод {method} не підтримується")
+        params = dict(parse_qsl(url.query))
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError as ex:
+                raise HTTPError(400, f"Некоректний JSON: {ex}") from ex
+            if not isinstance(data, dict):
+                raise HTTPError(400, "Тіло запиту має бути JSON-об'єктом")
+            params.update(data)
+        self.requests += 1
+        try:
+            return await handler(params)
+        except nx.NodeNotFound as ex:
+            raise HTTPError(404, str(ex)) from ex
+        except nx.NetworkXNoPath as ex:
+            raise HTTPError(422, str(ex)) from ex
+        except KeyError as ex:
+            raise HTTPError(404, str(ex.args[0] if ex.args else ex)) from ex
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 з keep-alive: кілька запитів по одному з'єднанню
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await _respond(writer, 400, {"error": "Некоректний рядок запиту"}, False)
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # без коректної довжини межа тіла невідома - з'єднання закривається
+                    await _respond(writer, 400, {"error": "Некоректний Content-Length"}, False)
+                    break
+                if length > MAX_BODY:
+                    await _respond(writer, 413, {"error": "Завелике тіло запиту"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = 200, await self.dispatch(method.upper(), target, body)
+                except HTTPError as ex:
+                    status, payload = ex.status, {"error": str(ex)}
+                except Exception as ex:  # помилка обробника не кладе сервер
+                    status, payload = 500, {"error": f"{type(ex).__name__}: {ex}"}
+                await _respond(writer, status, payload, keep)
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def _scalar(value) -> bool:
+    # ідентифікатор вузла - рядок або число з JSON; bool і контейнери ним не є
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def _required(params: dict, name: str) -> str:
+    value = params.get(name)
+    if value in (None, ""):
+        raise HTTPError(400, f"Не вказано параметр {name}")
+    if not _scalar(value):
+        raise HTTPError(400, f"Параметр {name} має бути рядком")
+    return str(value)
+
+
+def _names(params: dict, name: str):
+    # список вузлів: JSON-масив або "a,b,c" у рядку запиту; None - не вказано.
+    # Перевіряється до побудови ключа об'єднання запитів (tuple потребує хешованих)
+    value = params.get(name)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise HTTPError(400, f"{name} має бути списком")
+    bad = [v for v in value if not _scalar(v)]
+    if bad:
+        raise HTTPError(400, f"Елементи {name} мають бути рядками, а не {type(bad[0]).__name__}")
+    return [str(v) for v in value]
+
+
+async def _respond(writer, status: int, payload, keep: bool) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, workers: int = 0, ready=None) -> None:
+    G = load_graph(DATA_PATH)
+    attach_table(G, load_table(DATA_PATH, G.graph.get("sha256")))
+    service = RouteService(G, workers)
+    server = await asyncio.start_server(service.handle, host, port)
+    addr = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f" Сервіс маршрутів: {G.number_of_nodes()} вузлів, пул: "
+          f"{workers or 'потік'}; слухає {addr}")
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP/JSON-сервіс маршрутів")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="процесів для пошуку (0 - один потік у цьому процесі)")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from src.config import STREAM_THRESHOLD_BYTES
+    from src.data_loader import file_digest, iter_graph_items
+    from src.graph_model import (
+        CompiledGraph, NodeTable, build_graph, build_graph_streaming, compile_graph, compile_items, mark_compiled,
+        new_graph, node_table, partitions,
+    )
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from config import STREAM_THRESHOLD_BYTES
+    from data_loader import file_digest, iter_graph_items
+    from graph_model import (
+        CompiledGraph, NodeTable, build_graph, build_graph_streaming, compile_graph, compile_items, mark_compiled,
+        new_graph, node_table, partitions,
+    )
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Бінарний знімок скомпільованого графа поруч із JSON (data.graph.bin):
+#   MAGIC | u64 довжина заголовка | заголовок JSON | масиви, вирівняні на 64 байти
+# У заголовку - mtime/розмір/sha256 вихідного JSON, категорії та опис масивів
+# (dtype, shape, зсув). Масиви читаються через mmap без копіювання.
+
+MAGIC = b"CPGRAPH1"
+ALIGN = 64
+# масиви, без яких знімок вважається застарілим (записаний старішою версією)
+REQUIRED = ("ids_blob", "ids_off", "label_blob", "label_off", "indptr", "indices",
+            "weights", "pos", "floor", "wing", "type", "building")
+
+
+def snapshot_path(json_path: str | Path) -> Path:
+    p = Path(json_path)
+    return p.with_name(p.stem + ".graph.bin")
+
+
+def _strings(values):
+    # рядки -> (utf-8 блоб, зсуви) для колонкового зберігання
+    data = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in data], out=offsets[1:])
+    return np.frombuffer(b"".join(data), dtype=np.uint8), offsets
+
+
+def _unstrings(blob, offsets):
+    raw = blob.tobytes()
+    off = offsets.tolist()
+    return [raw[a:b].decode("utf-8") for a, b in zip(off, off[1:])]
+
+
+def write_snapshot(G: nx.Graph, json_path: str | Path, digest: str | None = None) -> Path:
+    # колонки атрибутів - прямо з graph_model.NodeTable (порядок вузлів як у cg)
+    return _write_snapshot(compile_graph(G), node_table(G), json_path, digest)
+
+
+def _write_snapshot(cg: CompiledGraph, nt: NodeTable, json_path, digest) -> Path:
+    ids_blob, ids_off = _strings(cg.ids)
+    lab_blob, lab_off = _strings(nt.label)
+    wings, types, buildings = nt.wings, nt.types, nt.buildings
+
+    arrays = {
+        "ids_blob": ids_blob, "ids_off": ids_off,
+        "label_blob": lab_blob, "label_off": lab_off,
+        "indptr": cg.indptr, "indices": cg.indices, "weights": cg.weights,
+        "pos": cg.pos, "floor": nt.floor, "wing": nt.wing, "type": nt.type,
+        "building": nt.building,
+    }
+    st = os.stat(json_path)
+    header = {
+        "source": {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                   "sha256": digest or file_digest(json_path)},
+        "n_edges": cg.n_edges,
+        "categories": {"wing": wings, "type": types, "building": buildings},
+        "arrays": {},
+    }
+    # зсуви рахуються від початку області даних, тож заголовок можна записати першим
+    offset = 0
+    for name, a in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        header["arrays"][name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(head)) // ALIGN) * ALIGN
+
+    out = snapshot_path(json_path)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(head)))
+        f.write(head)
+        for name, a in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(a).tobytes())
+    os.replace(tmp, out)
+    return out
+
+
+class Snapshot:
+    # знімок, відкритий через mmap: масиви - представлення над сторінками файлу
+    __slots__ = ("header", "arrays", "_mm")
+
+    def __init__(self, path: str | Path):
+        with open(path, "rb") as f:
+            # ACCESS_COPY: правки на місці (закриття ребер) не потрапляють у файл
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Не знімок графа: {path}")
+        (hlen,) = struct.unpack_from("<Q", mm, len(MAGIC))
+        self.header = json.loads(mm[len(MAGIC) + 8:len(MAGIC) + 8 + hlen].decode("utf-8"))
+        data_start = -(-(len(MAGIC) + 8 + hlen) // ALIGN) * ALIGN
+        self.arrays = {}
+        for name, spec in self.header["arrays"].items():
+            dt = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            a = np.frombuffer(mm, dtype=dt, count=count, offset=data_start + spec["offset"])
+            self.arrays[name] = a.reshape(spec["shape"])
+        missing = [name for name in REQUIRED if name not in self.arrays]
+        if missing:
+            raise ValueError(f"Знімок без масивів {', '.join(missing)}: {path}")
+
+    def is_fresh(self, json_path: str | Path) -> bool:
+        # швидка перевірка за mtime і розміром; якщо mtime змінився (копіювання,
+        # checkout), вирішує sha256 вмісту
+        src = self.header["source"]
+        st = os.stat(json_path)
+        if st.st_size != src["size"]:
+            return False
+        if st.st_mtime_ns == src["mtime_ns"]:
+            return True
+        return file_digest(json_path) == src["sha256"]
+
+    def compiled(self) -> CompiledGraph:
+        a = self.arrays
+        ids = _unstrings(a["ids_blob"], a["ids_off"])
+        buildings = self.header["categories"]["building"]
+        keys = zip((buildings[c] for c in a["building"].tolist()),
+                   (None if f < 0 else f for f in a["floor"].tolist()))
+        return CompiledGraph(ids, a["indptr"], a["indices"], a["weights"], a["pos"],
+                             self.header["n_edges"], *partitions(keys))
+
+    def nodes(self, ids) -> NodeTable:
+        # колонки атрибутів прямо з масивів знімка, без проходу по вузлах
+        a = self.arrays
+        cats = self.header["categories"]
+        return NodeTable(ids, _unstrings(a["label_blob"], a["label_off"]), a["pos"], a["floor"],
+                         a["wing"], cats["wing"], a["type"], cats["type"], a["building"], cats["building"])
+
+    def graph(self) -> nx.Graph:
+        # nx.Graph для GUI/візуалізації; скомпільований граф і сховище атрибутів
+        # підкладаються в кеш, тож compile_graph(G) і node_table(G) нічого не перебудовують
+        cg = self.compiled()
+        nt = self.nodes(cg.ids)
+        labels = nt.label
+        wings, types, buildings = nt.values("wing"), nt.values("type"), nt.values("building")
+        floors = nt.values("floor")
+        pos = [tuple(p) for p in nt.pos.tolist()]
+
+        G = new_graph()
+        G.add_nodes_from(
+            (n, {"label": labels[i], "type": types[i], "floor": floors[i], "wing": wings[i],
+                 "building": buildings[i], "pos": pos[i]})
+            for i, n in enumerate(cg.ids)
+        )
+        indptr, indices, weights = cg.indptr, cg.indices, cg.weights
+        src = np.repeat(np.arange(cg.n), np.diff(indptr))
+        half = src < indices
+        ids = cg.ids
+        G.add_weighted_edges_from(
+            (ids[u], ids[v], w)
+            for u, v, w in zip(src[half].tolist(), indices[half].tolist(), weights[half].tolist())
+        )
+        mark_compiled(G, cg, nt)
+        return G
+
+
+def load_snapshot(json_path: str | Path):
+    # актуальний знімок або None
+    p = snapshot_path(json_path)
+    if not p.exists():
+        return None
+    try:
+        snap = Snapshot(p)
+    except (ValueError, KeyError, OSError):
+        return None
+    return snap if snap.is_fresh(json_path) else None
+
+
+def load_graph(json_path: str | Path, progress=None, stats=None) -> nx.Graph:
+    # Граф корпусу з одним читанням даних: зі знімка, якщо він актуальний,
+    # інакше з JSON - і тоді знімок перезаписується для наступних запусків.
+    # Великий JSON розбирається потоково (progress - див. iter_graph_items).
+    # stats (pathfinding.SearchStats) отримує час завантаження в load_s.
+    t0 = time.perf_counter()
+    G = _load_graph(json_path, progress)
+    if stats is not None:
+        stats.add_times(load=time.perf_counter() - t0)
+    return G
+
+
+def _load_graph(json_path, progress) -> nx.Graph:
+    snap = load_snapshot(json_path)
+    if snap is not None:
+        G = snap.graph()
+        G.graph["sha256"] = snap.header["source"]["sha256"]
+        return G
+    p = Path(json_path)
+    if not p.exists():
+        raise FileNotFoundError(f"Файл не знайдено: {p}")
+    # байти читаються один раз: з них і хеш для знімка, і розбір JSON
+    if p.stat().st_size > STREAM_THRESHOLD_BYTES:
+        h = hashlib.sha256()
+        G = build_graph_streaming(iter_graph_items(p, progress, hasher=h))
+    else:
+        raw = p.read_bytes()
+        h = hashlib.sha256(raw)
+        G = build_graph(json.loads(raw))
+    # хеш JSON лишається при графі - інші кеші (таблиця маршрутів) звіряються з ним
+    G.graph["sha256"] = h.hexdigest()
+    try:
+        write_snapshot(G, p, G.graph["sha256"])
+    except OSError:
+        pass  # каталог лише для читання - працюємо без знімка
+    return G
+
+
+def load_compiled(json_path: str | Path, stats=None, progress=None):
+    # (CompiledGraph, sha256 JSON) для пакетних пошуків: з актуального знімка -
+    # лише масиви через mmap, без побудови nx.Graph. Великий JSON без знімка
+    # компілюється прямо з потоку (graph_model.compile_items), теж без nx.Graph.
+    t0 = time.perf_counter()
+    snap = load_snapshot(json_path)
+    p = Path(json_path)
+    if snap is not None:
+        cg, digest = snap.compiled(), snap.header["source"]["sha256"]
+    elif p.exists() and p.stat().st_size > STREAM_THRESHOLD_BYTES:
+        h = hashlib.sha256()
+        cg, nt = compile_items(iter_graph_items(p, progress, hasher=h))
+        digest = h.hexdigest()
+        try:
+            _write_snapshot(cg, nt, p, digest)
+        except OSError:
+            pass  # каталог лише для читання - працюємо без знімка
+    else:
+        G = _load_graph(json_path, progress)
+        cg, digest = compile_graph(G), G.graph["sha256"]
+    if stats is not None:
+        stats.add_times(load=time.perf_counter() - t0)
+    return cg, digest
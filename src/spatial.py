@@ -0,0 +1,203 @@
+from __future__ import annotations
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from src.graph_model import compile_graph, node_table
+    from src.routing import route
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from graph_model import compile_graph, node_table
+    from routing import route
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Просторовий індекс вузлів за 'pos': для кожного поверху - рівномірна сітка.
+# Точки поверху відсортовано за номером клітинки (рядок за рядком), тож усі
+# клітинки одного рядка прямокутного блоку - один суцільний зріз масиву, і запит
+# переглядає блок за 2r+1 зрізів. Ключ поверху None - усі вузли разом (вкладка
+# "Усі поверхи": поверхи рознесені по y, координати не перетинаються).
+
+# у середньому стільки точок на клітинку сітки
+POINTS_PER_CELL = 4
+# поверхи до стількох вузлів пакетний запит рахує повним перебором у NumPy
+BRUTE_MAX = 4096
+
+
+class _Grid:
+    __slots__ = ("nodes", "xy", "x0", "y0", "cw", "ch", "nx", "ny", "ptr")
+
+    def __init__(self, nodes: np.ndarray, xy: np.ndarray):
+        n = len(nodes)
+        lo = xy.min(axis=0) if n else np.zeros(2)
+        hi = xy.max(axis=0) if n else np.zeros(2)
+        sx, sy = (float(v) for v in hi - lo)
+        # ~POINTS_PER_CELL точок на клітинку; клітинки квадратні, крім вироджених
+        # поверхів (один коридор - точки на одній лінії): там сітка в один ряд
+        cells = max(1.0, n / POINTS_PER_CELL)
+        if sx <= 0 and sy <= 0:
+            self.nx = self.ny = 1
+        elif sy <= sx / cells:
+            self.nx, self.ny = math.ceil(cells), 1
+        elif sx <= sy / cells:
+            self.nx, self.ny = 1, math.ceil(cells)
+        else:
+            c = math.sqrt(sx * sy / cells)
+            self.nx, self.ny = math.ceil(sx / c), math.ceil(sy / c)
+        self.cw = sx / self.nx or 1.0
+        self.ch = sy / self.ny or 1.0
+        self.x0, self.y0 = float(lo[0]), float(lo[1])
+        ix = np.minimum(((xy[:, 0] - self.x0) // self.cw).astype(np.int64), self.nx - 1)
+        iy = np.minimum(((xy[:, 1] - self.y0) // self.ch).astype(np.int64), self.ny - 1)
+        key = iy * self.nx + ix
+        order = np.argsort(key, kind="stable")
+        self.nodes = nodes[order]
+        self.xy = np.ascontiguousarray(xy[order])
+        self.ptr = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key, minlength=self.nx * self.ny), out=self.ptr[1:])
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        cx = min(max(int((x - self.x0) // self.cw), 0), self.nx - 1)
+        cy = min(max(int((y - self.y0) // self.ch), 0), self.ny - 1)
+        return cx, cy
+
+    def _block(self, cx: int, cy: int, rx: int, ry: int) -> np.ndarray:
+        # позиції точок у блоці клітинок [cx-rx, cx+rx] x [cy-ry, cy+ry]
+        x1, x2 = max(cx - rx, 0), min(cx + rx, self.nx - 1)
+        y1, y2 = max(cy - ry, 0), min(cy + ry, self.ny - 1)
+        ptr, nx_ = self.ptr, self.nx
+        parts = [np.arange(ptr[row * nx_ + x1], ptr[row * nx_ + x2 + 1]) for row in range(y1, y2 + 1)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _margin(self, x: float, y: float, cx: int, cy: int, r: int) -> float:
+        # відстань від точки до межі блоку: усе поза блоком - не ближче
+        # (межа, що збігається з краєм сітки, нічого не відсікає)
+        m = math.inf
+        if cx - r > 0:
+            m = min(m, x - (self.x0 + (cx - r) * self.cw))
+        if cx + r < self.nx - 1:
+            m = min(m, self.x0 + (cx + r + 1) * self.cw - x)
+        if cy - r > 0:
+            m = min(m, y - (self.y0 + (cy - r) * self.ch))
+        if cy + r < self.ny - 1:
+            m = min(m, self.y0 + (cy + r + 1) * self.ch - y)
+        return m
+
+    def knn(self, x: float, y: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.nodes))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        cx, cy = self._cell(x, y)
+        # блок росте вдвічі: точка далеко поза сіткою не перебирає кільця по одному
+        r = 0
+        while True:
+            cand = self._block(cx, cy, r, r)
+            margin = self._margin(x, y, cx, cy, r)
+            if len(cand) >= k:
+                d = np.hypot(self.xy[cand, 0] - x, self.xy[cand, 1] - y)
+                part = np.argpartition(d, k - 1)[:k] if k < len(d) else np.arange(len(d))
+                if margin == math.inf or d[part].max() <= margin:
+                    best = part[np.argsort(d[part], kind="stable")]
+                    return self.nodes[cand[best]], d[best]
+            r = 2 * r + 1
+
+    def radius(self, x: float, y: float, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        cx, cy = self._cell(x, y)
+        # клітинки, що перетинають коло навколо точки (і для точки поза сіткою)
+        rx = max(int((x + radius - self.x0) // self.cw) - cx, cx - int((x - radius - self.x0) // self.cw), 0)
+        ry = max(int((y + radius - self.y0) // self.ch) - cy, cy - int((y - radius - self.y0) // self.ch), 0)
+        cand = self._block(cx, cy, rx, ry)
+        d = np.hypot(self.xy[cand, 0] - x, self.xy[cand, 1] - y)
+        keep = d <= radius
+        order = np.argsort(d[keep], kind="stable")
+        return self.nodes[cand[keep][order]], d[keep][order]
+
+    def knn_brute(self, pts: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # пакет точок повним перебором: матриця відстаней m x n
+        k = min(k, len(self.nodes))
+        d = np.hypot(pts[:, None, 0] - self.xy[None, :, 0], pts[:, None, 1] - self.xy[None, :, 1])
+        part = np.argpartition(d, k - 1, axis=1)[:, :k] if k < d.shape[1] else np.tile(
+            np.arange(d.shape[1]), (len(pts), 1))
+        dk = np.take_along_axis(d, part, axis=1)
+        order = np.argsort(dk, axis=1, kind="stable")
+        return self.nodes[np.take_along_axis(part, order, axis=1)], np.take_along_axis(dk, order, axis=1)
+
+
+class SpatialIndex:
+    # найближчі вузли до точки: k найближчих, у радіусі, пакетом
+    __slots__ = ("ids", "grids")
+
+    def __init__(self, G: nx.Graph):
+        cg = compile_graph(G)
+        self.ids = cg.ids
+        pos = np.asarray(cg.pos, dtype=np.float64).reshape(cg.n, 2)
+        nt = node_table(G)
+        floors = nt.floor if nt.ids == cg.ids else nt.floor[[nt.index[n] for n in cg.ids]]
+        everything = np.arange(cg.n, dtype=np.int64)
+        self.grids = {None: _Grid(everything, pos)}
+        # вузли без поверху (-1) доступні лише в загальній сітці
+        for f in np.unique(floors[floors >= 0]).tolist():
+            sel = everything[floors == f]
+            self.grids[f] = _Grid(sel, pos[sel])
+
+    def _grid(self, floor) -> _Grid:
+        grid = self.grids.get(None if floor == "all" else floor)
+        if grid is None:
+            raise KeyError(f"Поверху {floor} немає в графі")
+        return grid
+
+    def nearest(self, point: Sequence[float], floor=None, k: int = 1) -> List[Tuple[str, float]]:
+        # [(id вузла, відстань)] за зростанням відстані
+        idx, d = self._grid(floor).knn(float(point[0]), float(point[1]), k)
+        return [(self.ids[i], float(x)) for i, x in zip(idx.tolist(), d.tolist())]
+
+    def within(self, point: Sequence[float], radius: float, floor=None) -> List[Tuple[str, float]]:
+        idx, d = self._grid(floor).radius(float(point[0]), float(point[1]), float(radius))
+        return [(self.ids[i], float(x)) for i, x in zip(idx.tolist(), d.tolist())]
+
+    def nearest_many(self, points, floor=None, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        # пакет: масив m x 2 -> (номери вузлів m x k у порядку cg.ids, відстані m x k);
+        # малі поверхи - одним векторним перебором, великі - сіткою по точці
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        grid = self._grid(floor)
+        k = min(k, len(grid.nodes))
+        if len(grid.nodes) <= BRUTE_MAX:
+            out_i, out_d = [], []
+            # порції, щоб матриця відстаней лишалась у межах ~32 МБ
+            step = max(1, (1 << 22) // max(len(grid.nodes), 1))
+            for a in range(0, len(pts), step):
+                i, d = grid.knn_brute(pts[a:a + step], k)
+                out_i.append(i)
+                out_d.append(d)
+            if out_i:
+                return np.vstack(out_i), np.vstack(out_d)
+            return np.empty((0, k), dtype=np.int64), np.empty((0, k))
+        idx = np.empty((len(pts), k), dtype=np.int64)
+        dist = np.empty((len(pts), k))
+        for r, (x, y) in enumerate(pts.tolist()):
+            idx[r], dist[r] = grid.knn(x, y, k)
+        return idx, dist
+
+
+def spatial_index(G: nx.Graph) -> SpatialIndex:
+    # будується один раз на скомпільований граф; координати не змінюються
+    # при закритті ребер, тож індекс переживає правки ваг
+    cg = compile_graph(G)
+    idx = cg.aux.get("spatial")
+    if idx is None:
+        idx = cg.aux["spatial"] = SpatialIndex(G)
+    return idx
+
+
+def nearest_node(G: nx.Graph, point: Sequence[float], floor=None) -> str:
+    return spatial_index(G).nearest(point, floor)[0][0]
+
+
+def route_from_point(G: nx.Graph, point: Sequence[float], end: str, floor=None,
+                     algo: str = "dijkstra", stats=None) -> Tuple[List[str], float]:
+    # маршрут від "де я клацнув": старт - найближчий вузол поверху
+    start = nearest_node(G, point, floor)
+    return route(G, start, end, algo, stats)
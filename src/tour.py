@@ -0,0 +1,248 @@
+from __future__ import annotations
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+try:
+    from src.graph_model import CompiledGraph, compile_graph
+    from src.pathfinding import SPT_CACHE, SearchStats, _dijkstra, _walk
+    from src.lazy import lazy_import
+except ImportError:  # запуск як скрипт: python src/main.py
+    from graph_model import CompiledGraph, compile_graph
+    from pathfinding import SPT_CACHE, SearchStats, _dijkstra, _walk
+    from lazy import lazy_import
+
+nx = lazy_import("networkx")
+
+# Обхід кількох аудиторій у найкращому порядку (огляди, доставка).
+# Матриця відстаней між зупинками - одне повне дерево Дейкстри на зупинку
+# (з SPT_CACHE, як у cached_path; або таблиця всіх пар, якщо вона підключена);
+# попередники тих самих дерев потім зшивають повний шлях без нових пошуків.
+# Порядок: точно (Гелд-Карп) до EXACT_MAX точок, інакше найближчий сусід
+# і покращення 2-opt / Or-opt, де виграш усіх ходів рахується матрицею NumPy.
+
+# до стількох точок порядок шукається точно: 2^n x n станів
+EXACT_MAX = 12
+# найдовший відрізок, який переносить Or-opt
+OR_OPT_MAX = 3
+
+
+class Tour:
+    # order - зупинки в порядку обходу, path - повний шлях вузлами,
+    # legs - довжини переходів між сусідніми зупинками
+    __slots__ = ("order", "path", "length", "legs", "method", "seconds")
+
+    def __init__(self, order, path, length, legs, method, seconds):
+        self.order = order
+        self.path = path
+        self.length = length
+        self.legs = legs
+        self.method = method
+        self.seconds = seconds
+
+
+def _matrix(cg: CompiledGraph, idx: List[int], stats=None):
+    # (m x m відстаней, функція шляху між точками a і b за номерами в idx)
+    if cg.table is not None:
+        # dist[t, s] таблиці - транспонований підблок
+        table = cg.table
+        ids = [cg.ids[i] for i in idx]
+        rows = [table.index[n] for n in ids]
+        D = np.asarray(table.dist[np.ix_(rows, rows)], dtype=np.float64).T.copy()
+        return D, lambda a, b: table.route(ids[a], ids[b])[0]
+    D = np.empty((len(idx), len(idx)), dtype=np.float64)
+    preds = []
+    for r, s in enumerate(idx):
+        tree = SPT_CACHE.get(cg.version, s, "dijkstra")
+        if tree is None:
+            dist, pred = _dijkstra(cg, s, -1, stats)
+            SPT_CACHE.put(cg.version, s, "dijkstra", dist, pred)
+        else:
+            dist, pred = tree
+        D[r] = np.asarray(dist)[idx]
+        preds.append(pred)
+    return D, lambda a, b: _walk(cg, preds[a], idx[a], idx[b])
+
+
+def _held_karp(D: np.ndarray, start: int, end: int, closed: bool):
+    # Точний порядок динамікою за підмножинами: dp[mask, j] - найкоротший шлях,
+    # що обійшов mask і стоїть у j. Підмножини обробляються шарами за кількістю
+    # точок, кожен шар - векторно по всіх підмножинах шару для кожного j.
+    m = len(D)
+    full = (1 << m) - 1
+    dp = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int8)
+    firsts = [start] if start >= 0 else [j for j in range(m) if j != end or m == 1]
+    for j in firsts:
+        dp[1 << j, j] = 0.0
+    masks = np.arange(1 << m)
+    size = np.zeros(1 << m, dtype=np.int64)
+    for j in range(m):
+        size += (masks >> j) & 1
+    for k in range(2, m + 1):
+        layer = masks[size == k]
+        for j in range(m):
+            sub = layer[(layer >> j) & 1 == 1]
+            if not len(sub):
+                continue
+            prev = sub ^ (1 << j)
+            cand = dp[prev] + D[:, j]
+            best = np.argmin(cand, axis=1)
+            dp[sub, j] = cand[np.arange(len(sub)), best]
+            parent[sub, j] = best
+    last = dp[full] + (D[:, start] if closed else 0.0)
+    if end >= 0 and not closed:
+        j = end
+    else:
+        j = int(np.argmin(last))
+    if not np.isfinite(last[j]):
+        return None
+    order, mask = [], full
+    while j >= 0:
+        order.append(j)
+        j, mask = int(parent[mask, j]), mask ^ (1 << j)
+    order.reverse()
+    return order
+
+
+def _nearest_neighbour(D: np.ndarray, start: int, end: int):
+    m = len(D)
+    firsts = [start] if start >= 0 else [j for j in range(m) if j != end or m == 1]
+    best, best_len = None, np.inf
+    for f in firsts:
+        seen = np.zeros(m, dtype=bool)
+        seen[f] = True
+        if end >= 0:
+            seen[end] = True
+        order, cur, length = [f], f, 0.0
+        for _ in range(m - 1 - (end >= 0 and end != f)):
+            row = np.where(seen, np.inf, D[cur])
+            nxt = int(np.argmin(row))
+            length += row[nxt]
+            order.append(nxt)
+            seen[nxt] = True
+            cur = nxt
+        if end >= 0 and end != f:
+            length += D[cur, end]
+            order.append(end)
+        if length < best_len:
+            best, best_len = order, length
+    return best
+
+
+def _extended(D: np.ndarray, order, fix_start: bool, fix_end: bool, closed: bool):
+    # маршрут з "краями": вільний кінець - фіктивна точка m з нульовими
+    # відстанями, замкнений обхід - повтор старту в кінці. Рухомі позиції
+    # маршруту - [lo, hi]; на краях поза ними ходи нічого не змінюють.
+    m = len(D)
+    De = np.zeros((m + 1, m + 1))
+    De[:m, :m] = D
+    if closed:
+        route = np.array(list(order) + [order[0]])
+        return De, route, 1, len(route) - 2
+    route = np.array([m] + list(order) + [m])
+    return De, route, 2 if fix_start else 1, len(route) - (3 if fix_end else 2)
+
+
+def _two_opt(De: np.ndarray, route: np.ndarray, lo: int, hi: int) -> bool:
+    # найкращий розворот відрізка route[i..j] серед усіх lo <= i < j <= hi
+    i = np.arange(lo, hi + 1)
+    a, b = route[i - 1], route[i]
+    c, d = route[i], route[i + 1]
+    gain = (De[a[:, None], c[None, :]] + De[b[:, None], d[None, :]]
+            - De[a, b][:, None] - De[c, d][None, :])
+    gain[np.tril_indices(len(i))] = 0.0
+    k = int(np.argmin(gain))
+    if gain.flat[k] >= -1e-9:
+        return False
+    x, y = i[k // len(i)], i[k % len(i)]
+    route[x:y + 1] = route[x:y + 1][::-1]
+    return True
+
+
+def _or_opt(De: np.ndarray, route: np.ndarray, lo: int, hi: int) -> bool:
+    # найкраще перенесення відрізка з 1..OR_OPT_MAX точок (можливо, розвернутого)
+    # між іншою парою сусідніх точок
+    best = (-1e-9, None)
+    for s in range(1, OR_OPT_MAX + 1):
+        i = np.arange(lo, hi - s + 2)
+        if not len(i):
+            break
+        first, last = route[i], route[i + s - 1]
+        prev, nxt = route[i - 1], route[i + s]
+        removed = De[prev, first] + De[last, nxt] - De[prev, nxt]
+        k = np.arange(lo - 1, hi + 1)
+        p, q = route[k], route[k + 1]
+        base = De[p, q][None, :]
+        fwd = De[p[None, :], first[:, None]] + De[last[:, None], q[None, :]] - base
+        rev = De[p[None, :], last[:, None]] + De[first[:, None], q[None, :]] - base
+        ins = np.minimum(fwd, rev)
+        # вставляти можна лише поза самим відрізком і його сусідніми ребрами
+        ki, kk = np.meshgrid(i, k, indexing="ij")
+        ins[(kk >= ki - 1) & (kk <= ki + s - 1)] = np.inf
+        gain = ins - removed[:, None]
+        r = int(np.argmin(gain))
+        if gain.flat[r] < best[0]:
+            a, b = divmod(r, len(k))
+            best = (gain.flat[r], (int(i[a]), s, int(k[b]), bool(rev[a, b] < fwd[a, b])))
+    if best[1] is None:
+        return False
+    i, s, k, reverse = best[1]
+    seg = route[i:i + s].copy()
+    if reverse:
+        seg = seg[::-1]
+    rest = np.concatenate([route[:i], route[i + s:]])
+    at = k + 1 if k < i else k + 1 - s
+    route[:] = np.concatenate([rest[:at], seg, rest[at:]])
+    return True
+
+
+def _improve(D: np.ndarray, order, fix_start: bool, fix_end: bool, closed: bool):
+    De, route, lo, hi = _extended(D, order, fix_start, fix_end, closed)
+    if hi - lo >= 1:
+        while _two_opt(De, route, lo, hi) or _or_opt(De, route, lo, hi):
+            pass
+    return route[:-1].tolist() if closed else route[1:-1].tolist()
+
+
+def plan_tour(G, stops: Sequence[str], start: str | None = None, end: str | None = None,
+              stats: SearchStats | None = None) -> Tour:
+    # Найкоротший обхід зупинок stops. start/end - фіксовані початок і кінець
+    # (None - обирається разом із порядком); start == end - повернення на старт.
+    t0 = time.perf_counter()
+    cg = G if isinstance(G, CompiledGraph) else compile_graph(G)
+    points = []
+    for n in ([start] if start is not None else []) + list(stops) + ([end] if end is not None else []):
+        if n not in points:
+            points.append(n)
+    missing = [n for n in points if n not in cg.index]
+    if missing:
+        raise nx.NodeNotFound(f"Вузлів немає в графі: {', '.join(map(str, missing))}")
+    if not points:
+        raise ValueError("Немає жодної зупинки")
+    closed = start is not None and start == end
+    s = 0 if start is not None else -1
+    e = points.index(end) if end is not None and not closed else -1
+    idx = [cg.index[n] for n in points]
+
+    t1 = time.perf_counter()
+    D, leg_path = _matrix(cg, idx, stats)
+    if len(points) <= EXACT_MAX:
+        order, method = _held_karp(D, s, e, closed), "exact"
+    else:
+        order, method = _nearest_neighbour(D, s, e), "heuristic"
+        if np.isfinite(D[order[:-1], order[1:]].sum()):
+            order = _improve(D, order, s >= 0, e >= 0, closed)
+    visit = order + [order[0]] if order is not None and closed and len(order) > 1 else order
+    legs = D[visit[:-1], visit[1:]] if visit is not None else np.array([np.inf])
+    if not np.isfinite(legs).all():
+        raise nx.NetworkXNoPath("Не всі зупинки досяжні одна з одної")
+
+    path = [points[visit[0]]]
+    for a, b in zip(visit, visit[1:]):
+        path.extend(leg_path(a, b)[1:])
+    t2 = time.perf_counter()
+    if stats is not None:
+        stats.add_times(t1 - t0, 0.0, t2 - t1)
+    return Tour([points[i] for i in visit], path, float(legs.sum()), legs.tolist(), method, t2 - t0)
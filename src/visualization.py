@@ -1,8 +1,30 @@
+import argparse
 import math
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import matplotlib.pyplot as plt
+import matplotlib.image as mpimg
 import networkx as nx
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 from matplotlib.patheffects import withStroke
 
+try:
+    from src.config import DATA_PATH, REACH_CUTOFF
+    from src.graph_model import compile_graph, node_table
+    from src.pathfinding import reachable
+    from src.routing import route
+except ImportError:  # запуск як скрипт: python src/main.py
+    from config import DATA_PATH, REACH_CUTOFF
+    from graph_model import compile_graph, node_table
+    from pathfinding import reachable
+    from routing import route
+
 
 def _draw_node_labels(ax, pos, labels, dy=0.06, fs=9):
     # акуратні підписи вузлів зі зсувом вгору і білою підкладкою.
@@ -20,18 +42,12 @@ def _get_pos(G, pos=None):
     if pos:
         return {n: (float(x), float(y)) for n, (x, y) in pos.items()}
 
-    # збирає те що є в атрибутах вузлів
-    fixed = {}
-    for n, d in G.nodes(data=True):
-        if "pos" in d and isinstance(d["pos"], (tuple, list)) and len(d["pos"]) == 2:
-            x, y = d["pos"]
-            fixed[n] = (float(x), float(y))
-        elif "x" in d and "y" in d:
-            fixed[n] = (float(d["x"]), float(d["y"]))
-
-    # якщо позиції є для всіх - віддає як є
-    if len(fixed) == G.number_of_nodes():
-        return fixed
+    # координати з атрибутів вузлів ("pos" або x/y) - у колонковому сховищі;
+    # якщо вони є для всіх - віддає його готовий словник
+    nt = node_table(G)
+    if nt.has_pos.all():
+        return nt.pos_dict()
+    fixed = {n: tuple(p) for n, p, ok in zip(nt.ids, nt.pos.tolist(), nt.has_pos.tolist()) if ok}
 
     # інакше - дораховує відсутні, фіксуючи відомі 
     if fixed:
@@ -75,8 +91,10 @@ def draw_graph(
     draw_weights=False,
     title=None,
     highlight_end=True,
+    show=True,
     ):
-    # візуалізація графа корпусу.
+    # візуалізація графа корпусу; show=False - лише повернути (fig, ax),
+    # напр. для fig.savefig без вікна
     pos = _get_pos(G, pos)
 
     fig, ax = plt.subplots(figsize=(12, 7))
@@ -89,7 +107,7 @@ def draw_graph(
         edgecolors="black", linewidths=1.0, ax=ax
     )
     nx.draw_networkx_edges(G, pos, width=1.5, edge_color="lightgray", ax=ax)
-    labels = {n: G.nodes[n].get("label", n) for n in G.nodes()}
+    labels = node_table(G).labels_dict()
     _draw_node_labels(ax, pos, labels, dy=0.07, fs=9)
 
     if draw_weights:
@@ -139,5 +157,293 @@ def draw_graph(
 
     ax.axis("off")
     fig.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
     return fig, ax
+
+
+# Теплова карта досяжності: вузли, зафарбовані за відстанню від джерела
+# (зелений - поруч, червоний - біля межі cutoff); недосяжні лишаються базовими.
+HEAT_CMAP = "RdYlGn_r"
+
+
+def heat_layer(ax, xy, dist, cutoff, size=650, animated=False):
+    # один PathCollection на всі досяжні вузли; xy - m x 2, dist - m відстаней
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    return ax.scatter(xy[:, 0], xy[:, 1], s=size, c=np.asarray(dist, dtype=np.float64), cmap=HEAT_CMAP,
+                      vmin=0.0, vmax=float(cutoff) or 1.0, edgecolors="black", linewidths=0.8,
+                      zorder=3, animated=animated)
+
+
+def draw_heatmap(G, reach, cutoff, floor=None, title=None, show=True):
+    # карта поверху floor (None/"all" - усі) з досяжністю reach = {вузол: відстань}
+    nt = node_table(G)
+    nodes = nt.ids_on(floor)
+    subG = G.subgraph(nodes)
+    pos = nt.pos_dict(floor) if nt.has_pos[nt.rows(floor)].all() else _get_pos(subG)
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    if title:
+        ax.set_title(title, fontsize=14)
+    nx.draw_networkx_edges(subG, pos, width=1.5, edge_color="lightgray", ax=ax)
+    nx.draw_networkx_nodes(subG, pos, node_size=600, node_color="#eceff1",
+                           edgecolors="#90a4ae", linewidths=1.0, ax=ax)
+    hot = [n for n in nodes if n in reach]
+    if hot:
+        sc = heat_layer(ax, [pos[n] for n in hot], [reach[n] for n in hot], cutoff, size=600)
+        fig.colorbar(sc, ax=ax, shrink=0.6, label="Відстань")
+    _draw_node_labels(ax, pos, nt.labels_dict(floor), dy=0.07, fs=8)
+    ax.axis("off")
+    fig.tight_layout()
+    if show:
+        plt.show()
+    return fig, ax
+
+
+# Пакетний рендер маршрутів без вікна (Agg) - напр. карти для всіх пар аудиторій.
+# Базова карта будується один раз з масивів скомпільованого графа: усі ребра -
+# одна LineCollection, усі вузли - одна PathCollection, підписи - один раз.
+# Для PNG кожен маршрут - це відновлений растровий фон (restore_region) і
+# домальований поверх шар маршруту; для SVG перевикористовуються ті самі
+# артисти карти, а змінюється лише шар маршруту.
+
+ROUTE_COLOR, START_COLOR, END_COLOR = "#e53935", "#29b6f6", "#43a047"
+RASTER_FORMATS = ("png",)
+VECTOR_FORMATS = ("svg", "pdf")
+
+
+class RouteRenderer:
+    def __init__(self, cg, labels=None, figsize=(12, 7), dpi=100, node_size=None,
+                 draw_labels=True):
+        self.cg = cg
+        self.labels = labels if labels is not None else list(cg.ids)
+        n = cg.n
+        pos = np.asarray(cg.pos, dtype=np.float64).reshape(n, 2)
+        self.pos = pos
+        # розмір вузлів як у draw_graph, але менший на великих картах
+        self.node_size = node_size or float(np.clip(60000.0 / max(n, 1), 20, 1200))
+        self.font_size = 9 if n <= 300 else 6
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot(111)
+
+        src = np.repeat(np.arange(n), np.diff(cg.indptr))
+        dst = np.asarray(cg.indices)
+        # кожне ребро один раз; закриті (вага inf) не малюються
+        half = (src < dst) & np.isfinite(np.asarray(cg.weights))
+        segs = np.stack([pos[src[half]], pos[dst[half]]], axis=1)
+        ax.add_collection(LineCollection(segs, linewidths=1.5, colors="lightgray", zorder=1))
+        ax.scatter(pos[:, 0], pos[:, 1], s=self.node_size, c="lightblue",
+                   edgecolors="black", linewidths=1.0, zorder=2)
+        if draw_labels:
+            for i in range(n):
+                self._label(pos[i], self.labels[i], animated=False)
+
+        if n:
+            pad = 1.0
+            ax.set_xlim(pos[:, 0].min() - pad, pos[:, 0].max() + pad)
+            ax.set_ylim(pos[:, 1].min() - pad, pos[:, 1].max() + pad)
+        ax.set_aspect("equal", adjustable="box")
+        ax.axis("off")
+        # верхня смуга лишається під заголовок маршруту
+        self.fig.tight_layout(rect=(0, 0, 1, 0.94))
+
+        # шар маршруту: лінія, вузли маршруту над нею, початок і кінець
+        self._line = LineCollection([], linewidths=3.0, colors=ROUTE_COLOR, zorder=3, animated=True)
+        ax.add_collection(self._line)
+        self._nodes = ax.scatter([], [], s=self.node_size, c="lightblue", edgecolors="black",
+                                 linewidths=1.0, zorder=4, animated=True)
+        self._ends = ax.scatter([], [], s=self.node_size * 7 / 6, edgecolors="black",
+                                linewidths=1.5, zorder=5, animated=True)
+        self._texts = []
+        self._title = None
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _label(self, xy, text, animated):
+        return self.ax.text(
+            xy[0], xy[1], str(text), fontsize=self.font_size, fontweight="bold",
+            ha="center", va="center", zorder=6, animated=animated,
+            bbox=dict(boxstyle="round,pad=0.15", fc="white", ec="none", alpha=0.75),
+        )
+
+    def _set_route(self, path_idx, title=None):
+        for t in self._texts:
+            t.remove()
+        self._texts = []
+        if self._title is not None:
+            self._title.remove()
+            self._title = None
+        p = np.asarray(path_idx, dtype=np.int64)
+        xy = self.pos[p] if len(p) else np.empty((0, 2))
+        self._line.set_segments(np.stack([xy[:-1], xy[1:]], axis=1) if len(p) > 1 else [])
+        self._nodes.set_offsets(xy)
+        if len(p):
+            ends = xy[[0, -1]] if len(p) > 1 else xy[:1]
+            self._ends.set_offsets(ends)
+            self._ends.set_facecolor([START_COLOR, END_COLOR][:len(ends)])
+        else:
+            self._ends.set_offsets(np.empty((0, 2)))
+        self._texts = [self._label(self.pos[i], self.labels[i], animated=True) for i in p.tolist()]
+        if title:
+            # заголовок - теж у шарі маршруту: фон лишається спільним
+            self._title = self.ax.text(0.5, 0.985, title, transform=self.fig.transFigure, fontsize=14,
+                                       ha="center", va="top", animated=True)
+
+    def _overlay(self):
+        return [self._line, self._nodes, self._ends, *self._texts] + ([self._title] if self._title else [])
+
+    def render(self, path_idx, title=None) -> np.ndarray:
+        # RGBA-кадр карти з маршрутом (представлення буфера Agg - копіюйте, якщо зберігаєте)
+        self._set_route(path_idx, title)
+        self.canvas.restore_region(self._background)
+        for a in self._overlay():
+            self.ax.draw_artist(a)
+        return np.asarray(self.canvas.buffer_rgba())
+
+    def save(self, path_idx, out, fmt="png", title=None) -> Path:
+        out = Path(out)
+        if fmt in RASTER_FORMATS:
+            mpimg.imsave(out, self.render(path_idx, title), format=fmt)
+        elif fmt in VECTOR_FORMATS:
+            self._set_route(path_idx, title)
+            overlay = self._overlay()
+            for a in overlay:
+                a.set_animated(False)
+            try:
+                self.fig.savefig(out, format=fmt)
+            finally:
+                for a in overlay:
+                    a.set_animated(True)
+        else:
+            raise ValueError(f"Непідтримуваний формат: {fmt}")
+        return out
+
+
+_RENDERER = None
+_RENDER_OPTS = None
+
+def _safe(name) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(name))
+
+def _init_render_worker(cg, labels, opts) -> None:
+    # карта будується один раз на процес
+    global _RENDERER, _RENDER_OPTS
+    _RENDER_OPTS = opts
+    _RENDERER = RouteRenderer(cg, labels, dpi=opts["dpi"], draw_labels=opts["draw_labels"])
+
+def _render_chunk(items):
+    # items - [(номер, start, end)]; повертає [(номер, файл або None, помилка або None)]
+    r, o = _RENDERER, _RENDER_OPTS
+    out = []
+    for k, a, b in items:
+        try:
+            path, dist = route(r.cg, a, b, o["algo"])
+            idx = [r.cg.index[n] for n in path]
+            f = Path(o["out_dir"]) / f"{k:05d}_{_safe(a)}__{_safe(b)}.{o['fmt']}"
+            r.save(idx, f, o["fmt"], title=f"{a} - {b} ({dist:g})" if o["titles"] else None)
+            out.append((k, str(f), None))
+        except (nx.NetworkXException, KeyError, ValueError) as ex:
+            out.append((k, None, str(ex)))
+    return out
+
+def render_routes(G, pairs, out_dir, fmt="png", workers=0, algo="dijkstra", dpi=100,
+                  draw_labels=True, titles=True, chunk_size=32) -> dict:
+    # Рендер маршрутів для списку пар (start, end) у файли out_dir.
+    # Пари з тим самим start ідуть в одній порції - дерево найкоротших шляхів
+    # рахується раз (routing.route -> кеш дерев). workers > 1 - пул процесів,
+    # кожен зі своєю копією базової карти; у роботі щонайбільше 2 * workers порцій.
+    cg = compile_graph(G)
+    nt = node_table(G)
+    labels = nt.label if nt.ids == cg.ids else [nt.label[nt.index[n]] for n in cg.ids]
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    opts = {"out_dir": str(out_dir), "fmt": fmt, "algo": algo, "dpi": dpi,
+            "draw_labels": draw_labels, "titles": titles}
+    items = [(k, a, b) for k, (a, b) in enumerate(pairs)]
+    chunk_size = max(1, chunk_size)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    t0 = time.perf_counter()
+    results = []
+    if workers <= 1 or len(chunks) <= 1:
+        _init_render_worker(cg, labels, opts)
+        for c in chunks:
+            results.extend(_render_chunk(c))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                 initargs=(cg, labels, opts)) as ex:
+            pending = []
+            for c in chunks:
+                pending.append(ex.submit(_render_chunk, c))
+                if len(pending) >= 2 * workers:
+                    results.extend(pending.pop(0).result())
+            for fut in pending:
+                results.extend(fut.result())
+    seconds = time.perf_counter() - t0
+
+    images = sum(1 for _, f, _ in results if f)
+    return {
+        "images": images,
+        "failed": [(items[k][1], items[k][2], err) for k, f, err in results if err],
+        "seconds": seconds,
+        "images_per_s": images / seconds if seconds > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    try:
+        from src.snapshot import load_graph
+    except ImportError:
+        from snapshot import load_graph
+    ap = argparse.ArgumentParser(description="Пакетний рендер карт маршрутів у файли")
+    ap.add_argument("--out", type=Path, default=Path("routes"), help="каталог для зображень")
+    ap.add_argument("--format", choices=RASTER_FORMATS + VECTOR_FORMATS, default="png")
+    ap.add_argument("--pairs", type=Path, help="файл із парами 'start end' по рядку")
+    ap.add_argument("--type", default="room", help="без --pairs: усі пари вузлів цього типу")
+    ap.add_argument("--limit", type=int, default=0, help="не більше стількох пар (0 - усі)")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--algo", default="dijkstra")
+    ap.add_argument("--dpi", type=int, default=100)
+    ap.add_argument("--no-labels", action="store_true", help="без підписів вузлів")
+    ap.add_argument("--reach", nargs="+", metavar="NODE",
+                    help="замість маршрутів - теплові карти досяжності від цих вузлів по поверхах")
+    ap.add_argument("--cutoff", type=float, default=REACH_CUTOFF, help="межа відстані для --reach")
+    args = ap.parse_args(argv)
+
+    G = load_graph(DATA_PATH)
+    if args.reach:
+        idx, dist = reachable(G, args.reach, args.cutoff)
+        ids = compile_graph(G).ids
+        reach = {ids[i]: d for i, d in zip(idx.tolist(), dist.tolist())}
+        args.out.mkdir(parents=True, exist_ok=True)
+        name = _safe("+".join(args.reach))
+        for f in node_table(G).floors:
+            fig, _ = draw_heatmap(G, reach, args.cutoff, f, show=False,
+                                  title=f"Поверх {f}: до {args.cutoff:g} від {', '.join(args.reach)}")
+            fig.savefig(args.out / f"reach_{name}_f{f}.{args.format}", format=args.format, dpi=args.dpi)
+            plt.close(fig)
+        print(f" Досяжних вузлів: {len(reach)}; карти поверхів у {args.out}")
+        return
+    if args.pairs:
+        with open(args.pairs, "r", encoding="utf-8") as f:
+            pairs = [tuple(line.split()[:2]) for line in f if len(line.split()) >= 2]
+    else:
+        nt = node_table(G)
+        code = nt.types.index(args.type) if args.type in nt.types else -1
+        nodes = sorted(nt.ids[i] for i in np.flatnonzero(nt.type == code).tolist())
+        pairs = [(a, b) for a in nodes for b in nodes if a != b]
+    if args.limit:
+        pairs = pairs[:args.limit]
+
+    rep = render_routes(G, pairs, args.out, args.format, args.workers, args.algo,
+                        args.dpi, draw_labels=not args.no_labels)
+    print(f" Зображень: {rep['images']} за {rep['seconds']:.2f} с "
+          f"({rep['images_per_s']:.1f} зобр/с) у {args.out}")
+    for a, b, err in rep["failed"][:10]:
+        print(f" [помилка] {a} - {b}: {err}")
+
+
+if __name__ == "__main__":
+    main()
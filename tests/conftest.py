@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# тести імпортують пакет src так само, як gui.py: з кореня репозиторію
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
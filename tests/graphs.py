@@ -0,0 +1,66 @@
+import math
+import random
+
+import networkx as nx
+import pytest
+
+from src.graph_model import build_graph
+from src.routing import route
+
+# Спільні випадкові графи для тестів рушіїв пошуку: кілька корпусів і поверхів
+# (розділи для "hier"), координати з вагами, що не дорівнюють евклідовій
+# довжині (масштаб евристики A*), і ізольовані вузли (NetworkXNoPath).
+# Еталон - networkx на тому самому nx.Graph.
+
+SEEDS = [1, 2, 3]
+
+
+def random_graph(seed: int, n: int = 60, m: int = 110):
+    rnd = random.Random(seed)
+    nodes = [{"id": f"n{i}", "floor": rnd.randint(1, 3), "building": f"B{rnd.randint(1, 2)}",
+              "pos": [rnd.uniform(0, 50), rnd.uniform(0, 50)]} for i in range(n)]
+    pairs = set()
+    while len(pairs) < m:
+        u, v = rnd.sample(range(n - 3), 2)  # останні три вузли - ізольовані
+        pairs.add((min(u, v), max(u, v)))
+    edges = [{"u": f"n{u}", "v": f"n{v}", "weight": round(rnd.uniform(0.5, 20.0), 2)}
+             for u, v in sorted(pairs)]
+    return build_graph({"nodes": nodes, "edges": edges})
+
+
+def random_data(seed: int, n: int = 60, m: int = 110) -> dict:
+    # той самий граф у форматі data.json
+    G = random_graph(seed, n, m)
+    nodes = [{"id": v, "label": d["label"], "type": d["type"], "floor": d["floor"], "wing": d["wing"],
+              "building": d["building"], "pos": list(d["pos"])} for v, d in G.nodes(data=True)]
+    edges = [{"u": u, "v": v, "weight": w} for u, v, w in G.edges(data="weight")]
+    return {"nodes": nodes, "edges": edges}
+
+
+def query_pairs(G, seed: int, count: int = 40):
+    rnd = random.Random(seed)
+    ids = sorted(G.nodes)
+    return [tuple(rnd.sample(ids, 2)) for _ in range(count)]
+
+
+def expected(G, s, t):
+    try:
+        return nx.shortest_path_length(G, s, t, weight="weight")
+    except nx.NetworkXNoPath:
+        return math.inf
+
+
+def path_length(G, path):
+    return sum(G.edges[a, b]["weight"] for a, b in zip(path, path[1:]))
+
+
+def check_route(G, s, t, algo):
+    want = expected(G, s, t)
+    if math.isinf(want):
+        with pytest.raises(nx.NetworkXNoPath):
+            route(G, s, t, algo)
+        return
+    path, dist = route(G, s, t, algo)
+    assert path[0] == s and path[-1] == t
+    assert dist == pytest.approx(want, abs=1e-9)
+    assert path_length(G, path) == pytest.approx(want, abs=1e-9)
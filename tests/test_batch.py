@@ -0,0 +1,81 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.graphs import expected, random_data, random_graph
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# main.py запускається як скрипт (голі імпорти з src), тож пакетний режим
+# перевіряється в окремому процесі; config.DATA_PATH підміняється до імпорту main
+DRIVER = """
+import sys
+sys.path.insert(0, {src!r})
+import config
+config.DATA_PATH = {data!r}
+import main
+code = main.batch(sys.argv[1:])
+print("NX", "networkx.algorithms" in sys.modules, file=sys.stderr)
+sys.exit(code)
+"""
+
+
+def run_batch(tmp_path, lines, *args):
+    data_path = tmp_path / "data.json"
+    if not data_path.exists():
+        data_path.write_text(json.dumps(random_data(1)), encoding="utf-8")
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    driver = DRIVER.format(src=str(SRC), data=str(data_path))
+    proc = subprocess.run([sys.executable, "-c", driver, "--input", str(queries), *args],
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    out = [json.loads(line) for line in proc.stdout.splitlines()]
+    return out, proc.stderr
+
+
+@pytest.mark.parametrize("workers", ["0", "2"])
+def test_batch_answers_in_input_order(tmp_path, workers):
+    G = random_graph(1)
+    pairs = [("n0", "n9"), ("n3", "n12"), ("n20", "n5"), ("n7", "n30")]
+    lines = [json.dumps({"start": s, "end": t, "id": i}) for i, (s, t) in enumerate(pairs)]
+    lines.insert(2, json.dumps(["n1", "n2", "astar"]))
+    out, _ = run_batch(tmp_path, lines, "--chunk", "2", "--workers", workers)
+    assert [r["line"] for r in out] == [1, 2, 3, 4, 5]
+    assert out[2]["algo"] == "astar" and out[2]["dist"] == pytest.approx(expected(G, "n1", "n2"))
+    for r in out[:2] + out[3:]:
+        assert r["dist"] == pytest.approx(expected(G, r["start"], r["end"]))
+        assert r["path"][0] == r["start"] and r["path"][-1] == r["end"]
+    assert [r["id"] for r in out if "id" in r] == [0, 1, 2, 3]
+
+
+def test_bad_lines_get_errors_in_place(tmp_path):
+    lines = [
+        '{"start": "n0", "end": "n1"}',
+        "{not json",
+        '{"start": "n0"}',
+        '{"start": "n0", "end": "n1", "algo": 3}',
+        '{"start": "n0", "end": "n1", "algo": "bogus"}',
+        '{"start": "n0", "end": "nope"}',
+        '{"start": "n0", "end": "n59"}',
+        "",
+        '["n2", "n3"]',
+    ]
+    out, _ = run_batch(tmp_path, lines)
+    assert [r["line"] for r in out] == [1, 2, 3, 4, 5, 6, 7, 9]
+    assert "dist" in out[0] and "dist" in out[-1]
+    assert all("error" in r for r in out[1:7])
+
+
+def test_batch_path_does_not_import_networkx(tmp_path):
+    G = random_graph(1)
+    ends = [f"n{i}" for i in range(1, 20) if expected(G, "n0", f"n{i}") < float("inf")]
+    lines = [json.dumps({"start": "n0", "end": end}) for end in ends]
+    out, _ = run_batch(tmp_path, lines)
+    assert all("dist" in r for r in out)
+    # другий запуск читає знімок; networkx так і не знадобився
+    out, err = run_batch(tmp_path, lines)
+    assert "NX False" in err
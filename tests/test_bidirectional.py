@@ -0,0 +1,30 @@
+import networkx as nx
+import pytest
+
+from src.pathfinding import SearchStats, bidirectional_dijkstra_path, dijkstra_path
+from tests.graphs import SEEDS, check_route, query_pairs, random_graph
+
+
+@pytest.mark.parametrize("algo", ["bidijkstra", "biastar"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_bidirectional_matches_networkx(seed, algo):
+    G = random_graph(seed)
+    for s, t in query_pairs(G, seed):
+        check_route(G, s, t, algo)
+
+
+def test_same_start_and_end():
+    G = random_graph(1)
+    assert bidirectional_dijkstra_path(G, "n4", "n4") == (["n4"], 0.0)
+
+
+def test_bidirectional_settles_fewer_nodes():
+    G = random_graph(1, n=400, m=700)
+    one, two = SearchStats(), SearchStats()
+    for s, t in query_pairs(G, 1, 30):
+        try:
+            dijkstra_path(G, s, t, stats=one)
+            bidirectional_dijkstra_path(G, s, t, stats=two)
+        except nx.NetworkXNoPath:
+            pass
+    assert two.settled < one.settled
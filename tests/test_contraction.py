@@ -0,0 +1,32 @@
+import pytest
+
+from src.benchmark import campus_graph, workload
+from src.contraction import build_ch, ch_path
+from src.graph_model import compile_graph
+from src.pathfinding import SearchStats, dijkstra_path
+from tests.graphs import SEEDS, check_route, query_pairs, random_graph
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_ch_matches_networkx(seed):
+    G = random_graph(seed)
+    for s, t in query_pairs(G, seed):
+        check_route(G, s, t, "ch")
+
+
+def test_ch_is_built_once_per_compiled_graph():
+    G = random_graph(1)
+    ch = build_ch(G)
+    assert build_ch(G) is ch and compile_graph(G).aux["ch"] is ch
+    assert ch.n_shortcuts >= 0 and ch.nbytes > 0 and ch.build_seconds >= 0
+
+
+def test_ch_settles_fewer_nodes_than_dijkstra():
+    # кампус із generate_data: сходи й коридори дають глибоку ієрархію
+    G = campus_graph(1000)
+    build_ch(G)
+    ch_stats, dijkstra_stats = SearchStats(), SearchStats()
+    for s, t in workload(G, 30, seed=2):
+        assert ch_path(G, s, t, stats=ch_stats)[1] == pytest.approx(
+            dijkstra_path(G, s, t, stats=dijkstra_stats)[1], abs=1e-9)
+    assert ch_stats.settled * 5 < dijkstra_stats.settled
@@ -0,0 +1,92 @@
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+from src import snapshot
+from src.data_loader import iter_graph_items
+from src.graph_model import build_graph, build_graph_streaming, compile_graph, compile_items
+from src.snapshot import load_compiled, snapshot_path
+from tests.graphs import random_data
+
+
+def write_json(path, data, **kw):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **kw)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_stream_yields_every_item_with_digest_and_progress(tmp_path, indent):
+    path = tmp_path / "data.json"
+    data = random_data(1)
+    data["meta"] = {"skip": [1, {"a": "b"}], "s": "ключ \"у лапках\""}
+    write_json(path, data, indent=indent)
+
+    calls = []
+    h = hashlib.sha256()
+    items = list(iter_graph_items(path, lambda *a: calls.append(a), chunk_size=97, hasher=h))
+    assert [i for k, i in items if k == "node"] == data["nodes"]
+    assert [i for k, i in items if k == "edge"] == data["edges"]
+    # хеш рахується з тих самих байтів, що й розбір
+    assert h.hexdigest() == hashlib.sha256(path.read_bytes()).hexdigest()
+    # прогрес - після кожної порції, байти зростають до розміру файлу
+    done = [c[0] for c in calls]
+    assert done == sorted(done) and done[-1] == path.stat().st_size == calls[-1][1]
+    assert calls[-1][2] == len(data["nodes"])
+
+
+def test_edges_before_nodes(tmp_path):
+    path = tmp_path / "data.json"
+    data = random_data(2)
+    path.write_text(json.dumps({"edges": data["edges"], "nodes": data["nodes"]}), encoding="utf-8")
+    G = build_graph_streaming(iter_graph_items(path, chunk_size=64))
+    assert G.number_of_edges() == len(data["edges"])
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"nodes": [{"id": "a"}], "edges": [{"u": "a", "v": "b"}]}', "відсутніми вузлами"),
+    ('{"nodes": [{"label": "a"}]}', "без id"),
+    ('{"nodes": []} {}', "зайві дані"),
+])
+def test_malformed_input(tmp_path, text, message):
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        list(iter_graph_items(path))
+
+
+def test_compile_items_matches_build_graph(tmp_path):
+    path = tmp_path / "data.json"
+    data = random_data(3)
+    # повтори вузла й ребра: діють останні атрибути й вага, як у networkx
+    data["nodes"].append(dict(data["nodes"][0], label="інший"))
+    data["edges"].append(dict(data["edges"][0], weight=99.0))
+    write_json(path, data)
+
+    cg, nt = compile_items(iter_graph_items(path))
+    G = build_graph(data)
+    ref = compile_graph(G)
+    assert cg.ids == ref.ids and cg.n_edges == ref.n_edges
+    for u in G:
+        i = cg.idx(u)
+        lo, hi = cg.indptr[i], cg.indptr[i + 1]
+        got = dict(zip((cg.ids[j] for j in cg.indices[lo:hi].tolist()), cg.weights[lo:hi].tolist()))
+        assert got == {v: d["weight"] for v, d in G[u].items()}
+    assert nt.label[0] == "інший"
+    np.testing.assert_array_equal(cg.pos, ref.pos)
+
+
+def test_large_json_compiles_without_nx_graph(tmp_path, monkeypatch):
+    path = tmp_path / "data.json"
+    data = random_data(1)
+    write_json(path, data)
+    # поріг потокового читання нижче за розмір файлу; nx.Graph будувати не можна
+    monkeypatch.setattr(snapshot, "STREAM_THRESHOLD_BYTES", 100)
+    monkeypatch.setattr(snapshot, "build_graph_streaming", lambda items: pytest.fail("nx.Graph"))
+    monkeypatch.setattr(snapshot, "build_graph", lambda data: pytest.fail("nx.Graph"))
+    cg, digest = load_compiled(path)
+    assert digest == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert cg.ids == compile_graph(build_graph(data)).ids
+    # знімок записано - наступний запуск читає його
+    assert snapshot_path(path).exists()
@@ -0,0 +1,116 @@
+import json
+import math
+import random
+
+import networkx as nx
+import pytest
+
+from src import dynamic
+from src.graph_model import build_graph, compile_graph
+from src.pathfinding import SPT_CACHE
+from src.precompute import attach_table, compile_table, load_table
+from src.routing import ALGORITHMS, route
+from tests.graphs import SEEDS, check_route, expected, query_pairs, random_data, random_graph
+
+# Закриття й відкриття ребер латають скомпільований граф на місці; кешовані
+# дерева, таблиці ALT, надграф поверхів і таблиця всіх пар ремонтуються, і
+# відповіді мають збігатися з networkx на зміненому nx.Graph.
+
+
+@pytest.fixture
+def eager_trees(monkeypatch):
+    # дерева з першого запиту - щоб було що ремонтувати
+    monkeypatch.setattr(SPT_CACHE, "eager", True)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dynamic_repair_matches_networkx(seed, eager_trees):
+    G = random_graph(seed)
+    cg = compile_graph(G)
+    n_edges = cg.n_edges
+    pairs = query_pairs(G, seed, 25)
+    rnd = random.Random(seed)
+    # прогрів: кешовані дерева, опорні вузли ALT, ієрархія поверхів
+    for algo in ALGORITHMS:
+        for s, t in pairs[:5]:
+            try:
+                route(G, s, t, algo)
+            except nx.NetworkXNoPath:
+                pass
+
+    closed = [rnd.choice(sorted(G.edges)) for _ in range(6)]
+    node = rnd.choice(sorted(n for n in G if G.degree(n) > 2))
+    steps = [("close", u, v) for u, v in closed]
+    steps += [("weight",) + rnd.choice(sorted(G.edges)) for _ in range(3)]
+    steps += [("close_node", node), ("reopen_node", node)]
+    steps += [("reopen", u, v) for u, v in closed]
+
+    repaired = 0
+    for op, *args in steps:
+        if op == "close":
+            report = dynamic.close_edge(G, *args)
+        elif op == "reopen":
+            report = dynamic.reopen_edge(G, *args)
+        elif op == "weight":
+            report = dynamic.set_edge_weight(G, *args, rnd.uniform(0.5, 30.0))
+        elif op == "close_node":
+            report = dynamic.close_node(G, *args)
+        else:
+            report = dynamic.reopen_node(G, *args)
+        repaired += report.get("trees", 0)
+        # правки латають скомпільований граф на місці, а не збирають новий;
+        # закриті ребра лишаються в CSR з вагою inf
+        assert compile_graph(G) is cg
+        assert cg.n_edges == n_edges == cg.indptr[-1] // 2
+        for s, t in pairs:
+            for algo in ("dijkstra", "alt", "ch", "hier"):
+                check_route(G, s, t, algo)
+    assert not dynamic.closed_edges(G)
+    # відповіді Дейкстри йшли з відремонтованих дерев, а не з нових пошуків
+    assert repaired > 0
+
+
+def test_edge_reopens_when_all_reasons_cleared():
+    G = random_graph(1)
+    u, v = sorted(G.edges)[0]
+    dynamic.close_edge(G, u, v)
+    dynamic.close_node(G, u)
+    assert not G.has_edge(u, v)
+    # ребро закрите і саме, і разом із вузлом
+    assert dynamic.reopen_edge(G, u, v) == {"changes": 0}
+    assert not G.has_edge(u, v)
+    dynamic.reopen_node(G, u)
+    assert G.has_edge(u, v)
+    assert not dynamic.closed_edges(G)
+
+
+def test_weight_of_closed_edge_applies_on_reopen():
+    G = random_graph(1)
+    u, v = sorted(G.edges)[0]
+    dynamic.close_edge(G, u, v)
+    assert dynamic.set_edge_weight(G, u, v, 0.25) == {"changes": 0}
+    dynamic.reopen_edge(G, u, v)
+    assert G.edges[u, v]["weight"] == 0.25
+    assert route(G, u, v) == ([u, v], 0.25)
+
+
+def test_route_table_is_repaired(tmp_path):
+    json_path = tmp_path / "data.json"
+    data = random_data(2)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    compile_table(build_graph(data), json_path)
+    G = build_graph(data)
+    assert attach_table(G, load_table(json_path))
+
+    pairs = query_pairs(G, 2, 30)
+    s, t = next((s, t) for s, t in pairs if not math.isinf(expected(G, s, t)))
+    path, _ = route(G, s, t)
+    report = dynamic.close_edge(G, path[0], path[1])
+    assert report["table_rows"] > 0
+    assert compile_graph(G).table is not None
+    for a, b in pairs:
+        check_route(G, a, b, "dijkstra")
+    dynamic.reopen_edge(G, path[0], path[1])
+    for a, b in pairs:
+        check_route(G, a, b, "dijkstra")
@@ -0,0 +1,73 @@
+import random
+
+import networkx as nx
+import pytest
+
+from src import dynamic
+from src.benchmark import campus_graph
+from src.facilities import (
+    close_facility, facility_nodes, facility_table, nearest_facility, reopen_facility,
+)
+from src.graph_model import compile_graph
+from tests.graphs import path_length
+
+
+@pytest.fixture
+def campus():
+    return campus_graph(1000)
+
+
+def check_table(G, ftype):
+    # кожен вузол проти networkx: відстань до найближчого відкритого об'єкта,
+    # а шлях за вказівниками nxt веде до об'єкта тієї самої довжини
+    facilities = facility_nodes(G, ftype)
+    want = nx.multi_source_dijkstra_path_length(G, facilities, weight="weight")
+    cg = compile_graph(G)
+    table = facility_table(G, ftype)
+    for n in G:
+        if n not in want:
+            with pytest.raises(nx.NetworkXNoPath):
+                nearest_facility(G, n, ftype)
+            continue
+        f, path, d = nearest_facility(G, n, ftype)
+        assert d == pytest.approx(want[n], abs=1e-9)
+        assert f in facilities and path[0] == n and path[-1] == f
+        assert path_length(G, path) == pytest.approx(d, abs=1e-9)
+        assert table.fac[cg.idx(n)] == cg.idx(f)
+
+
+@pytest.mark.parametrize("ftype", ["exit", "toilet", "stair"])
+def test_table_matches_networkx(campus, ftype):
+    check_table(campus, ftype)
+
+
+def test_table_is_cached(campus):
+    table = facility_table(campus, "exit")
+    assert facility_table(campus, "exit") is table
+    with pytest.raises(KeyError):
+        facility_table(campus, "басейн")
+
+
+def test_close_and_reopen_facility(campus):
+    check_table(campus, "exit")
+    exits = facility_nodes(campus, "exit")
+    assert close_facility(campus, exits[0]) > 0
+    assert exits[0] not in facility_nodes(campus, "exit")
+    check_table(campus, "exit")
+    assert reopen_facility(campus, exits[0]) > 0
+    check_table(campus, "exit")
+
+
+def test_edge_closures_repair_tables(campus):
+    for ftype in ("exit", "toilet"):
+        facility_table(campus, ftype)
+    rnd = random.Random(5)
+    edges = rnd.sample(sorted(campus.edges), 20)
+    repaired = sum(dynamic.close_edge(campus, u, v).get("facility_nodes", 0) for u, v in edges)
+    assert repaired > 0
+    for ftype in ("exit", "toilet"):
+        check_table(campus, ftype)
+    for u, v in edges:
+        dynamic.reopen_edge(campus, u, v)
+    for ftype in ("exit", "toilet"):
+        check_table(campus, ftype)
@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.graph_model import build_graph, compile_graph, node_table, touch
+from src.pathfinding import dijkstra_path
+from tests.graphs import SEEDS, check_route, expected, query_pairs, random_graph
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dijkstra_matches_networkx(seed):
+    G = random_graph(seed)
+    for s, t in query_pairs(G, seed):
+        check_route(G, s, t, "dijkstra")
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dijkstra_path_on_compiled_graph(seed):
+    # пошук приймає і nx.Graph, і вже скомпільований граф
+    G = random_graph(seed)
+    cg = compile_graph(G)
+    for s, t in query_pairs(G, seed, 20):
+        want = expected(G, s, t)
+        if np.isinf(want):
+            with pytest.raises(nx.NetworkXNoPath):
+                dijkstra_path(cg, s, t)
+        else:
+            assert dijkstra_path(cg, s, t)[1] == pytest.approx(want, abs=1e-9)
+
+
+def test_csr_layout():
+    G = random_graph(1)
+    cg = compile_graph(G)
+    assert cg.n == G.number_of_nodes()
+    assert cg.n_edges == G.number_of_edges() == cg.indptr[-1] // 2
+    for u in G:
+        i = cg.idx(u)
+        lo, hi = cg.indptr[i], cg.indptr[i + 1]
+        got = {cg.ids[j]: w for j, w in zip(cg.indices[lo:hi].tolist(), cg.weights[lo:hi].tolist())}
+        assert got == {v: d["weight"] for v, d in G[u].items()}
+    with pytest.raises(nx.NodeNotFound):
+        cg.idx("немає")
+
+
+def test_compile_cache_follows_graph_version():
+    G = build_graph({"nodes": [{"id": "a"}, {"id": "b"}, {"id": "c"}],
+                     "edges": [{"u": "a", "v": "b", "weight": 2}, {"u": "b", "v": "c", "weight": 3}]})
+    cg, nt = compile_graph(G), node_table(G)
+    assert compile_graph(G) is cg and node_table(G) is nt
+
+    # пряма правка атрибутів не змінює версії - кеш лишається, доки не touch
+    G.edges["a", "b"]["weight"] = 10
+    assert compile_graph(G) is cg
+    touch(G)
+    fresh = compile_graph(G)
+    assert fresh is not cg and fresh.version != cg.version
+    assert dijkstra_path(G, "a", "c") == (["a", "b", "c"], 13.0)
+    assert node_table(G) is not nt
+
+    # нове ребро змінює кількість ребер - кеш перебудовується сам
+    G.add_edge("a", "c", weight=1)
+    assert compile_graph(G) is not fresh
+    assert dijkstra_path(G, "a", "c") == (["a", "c"], 1.0)
@@ -0,0 +1,51 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.graph_model import compile_graph
+from src.pathfinding import SearchStats, build_landmarks, prepare_heuristic
+from src.routing import route
+from tests.graphs import SEEDS, check_route, query_pairs, random_graph
+
+
+@pytest.mark.parametrize("algo", ["astar", "alt"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_astar_matches_networkx(seed, algo):
+    G = random_graph(seed)
+    for s, t in query_pairs(G, seed):
+        check_route(G, s, t, algo)
+
+
+def true_distances(G, cg, t):
+    d = nx.single_source_dijkstra_path_length(G, cg.ids[t], weight="weight")
+    return np.array([d.get(n, np.inf) for n in cg.ids])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_heuristics_are_admissible_and_consistent(seed):
+    G = random_graph(seed)
+    cg = compile_graph(G)
+    scale = prepare_heuristic(G)
+    # ваги випадкових ребер менші за евклідову довжину - множник мусить це врахувати
+    assert 0 < scale < 1
+    lm = build_landmarks(G)
+    src = np.repeat(np.arange(cg.n), np.diff(cg.indptr))
+    for t in range(0, cg.n, 7):
+        euclid = scale * np.hypot(*(cg.pos - cg.pos[t]).T)
+        for h in (euclid, lm.lower_bounds(t)):
+            assert h[t] == 0
+            assert np.all(h <= true_distances(G, cg, t) + 1e-9)
+            assert np.all(h[src] <= cg.weights + h[cg.indices] + 1e-9)
+
+
+def test_alt_settles_fewer_nodes_than_astar():
+    G = random_graph(3, n=300, m=600)
+    build_landmarks(G)
+    astar, alt = SearchStats(), SearchStats()
+    for s, t in query_pairs(G, 3, 30):
+        try:
+            route(G, s, t, "astar", astar)
+            route(G, s, t, "alt", alt)
+        except nx.NetworkXNoPath:
+            pass
+    assert alt.settled < astar.settled
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from src import dynamic
+from src.benchmark import campus_graph, workload
+from src.graph_model import compile_graph
+from src.hierarchy import build_hierarchy
+from tests.graphs import SEEDS, check_route, query_pairs, random_graph
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_hier_matches_networkx(seed):
+    G = random_graph(seed)
+    for s, t in query_pairs(G, seed):
+        check_route(G, s, t, "hier")
+
+
+def test_hier_on_generated_campus():
+    # справжня структура: поверхи корпусів, сходи й ліфти між ними, вуличні переходи
+    G = campus_graph(1000)
+    for s, t in workload(G, 40, seed=4):
+        check_route(G, s, t, "hier")
+
+
+def test_portals_are_cross_partition_nodes():
+    G = campus_graph(1000)
+    cg = compile_graph(G)
+    h = build_hierarchy(G)
+    assert build_hierarchy(G) is h
+    src = np.repeat(np.arange(cg.n), np.diff(cg.indptr))
+    cross = set(src[cg.part[src] != cg.part[cg.indices]].tolist())
+    assert {i for i, p in enumerate(h.portal) if p} == cross
+    assert h.n_portals == len(cross)
+
+
+def test_weight_change_rebuilds_only_its_floor():
+    G = campus_graph(1000)
+    build_hierarchy(G)
+    cg = compile_graph(G)
+    u, v = next((u, v) for u, v in G.edges
+                if cg.part[cg.idx(u)] == cg.part[cg.idx(v)])
+    report = dynamic.set_edge_weight(G, u, v, G.edges[u, v]["weight"] + 50)
+    assert report["partitions"] == 1
+    for s, t in workload(G, 20, seed=5):
+        check_route(G, s, t, "hier")
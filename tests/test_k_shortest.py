@@ -0,0 +1,56 @@
+import itertools
+import math
+
+import networkx as nx
+import pytest
+
+from src.pathfinding import k_shortest_paths
+from src.routing import alternatives, route
+from tests.graphs import SEEDS, expected, path_length, query_pairs, random_graph
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_k_shortest_matches_networkx(seed):
+    G = random_graph(seed)
+    k = 4
+    for s, t in query_pairs(G, seed, 15):
+        if math.isinf(expected(G, s, t)):
+            continue
+        found = k_shortest_paths(G, s, t, k)
+        want = [path_length(G, p) for p in itertools.islice(nx.shortest_simple_paths(G, s, t, "weight"), k)]
+        assert [d for _, d in found] == pytest.approx(want, abs=1e-9)
+        for path, dist in found:
+            assert path[0] == s and path[-1] == t
+            assert len(set(path)) == len(path)
+            assert path_length(G, path) == pytest.approx(dist, abs=1e-9)
+        assert len({tuple(p) for p, _ in found}) == len(found)
+
+
+def shared_share(G, path, other):
+    edges = {frozenset(e) for e in zip(other, other[1:])}
+    shared = sum(G.edges[a, b]["weight"] for a, b in zip(path, path[1:]) if frozenset((a, b)) in edges)
+    return shared / path_length(G, path)
+
+
+def test_overlap_filter():
+    G = random_graph(2)
+    for s, t in query_pairs(G, 2, 15):
+        if math.isinf(expected(G, s, t)):
+            continue
+        found = k_shortest_paths(G, s, t, 4, max_overlap=0.5)
+        assert found[0][1] == pytest.approx(expected(G, s, t), abs=1e-9)
+        # кожен наступний маршрут ділить із кожним попереднім не більше половини довжини
+        for i, (path, _) in enumerate(found):
+            for other, _ in found[:i]:
+                assert shared_share(G, path, other) <= 0.5 + 1e-9
+
+
+def test_alternatives_exclude_shown_route():
+    G = random_graph(1)
+    s, t = next((s, t) for s, t in query_pairs(G, 1) if not math.isinf(expected(G, s, t)))
+    path, _ = route(G, s, t)
+    alts = alternatives(G, s, t, path, 3)
+    assert len(alts) <= 2 and all(p != path for p, _ in alts)
+    assert [d for _, d in alts] == sorted(d for _, d in alts)
+    with pytest.raises(nx.NetworkXNoPath):
+        k_shortest_paths(G, s, "n59", 3)
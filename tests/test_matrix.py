@@ -0,0 +1,48 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.pathfinding import distance_matrix, iter_distance_matrix
+from tests.graphs import SEEDS, random_graph
+
+
+def reference_matrix(G, sources, targets):
+    rows = []
+    for s in sources:
+        d = nx.single_source_dijkstra_path_length(G, s, weight="weight")
+        rows.append([d.get(t, np.inf) for t in targets])
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matrix_matches_networkx(seed):
+    G = random_graph(seed)
+    ids = sorted(G.nodes)
+    sources, targets = ids[:15], ids[10:]
+    got = distance_matrix(G, sources, targets, chunk_size=4)
+    np.testing.assert_allclose(got, reference_matrix(G, sources, targets), rtol=0, atol=1e-9)
+
+
+def test_square_matrix_by_default():
+    G = random_graph(1)
+    ids = sorted(G.nodes)[:8]
+    got = distance_matrix(G, ids)
+    assert got.shape == (8, 8)
+    np.testing.assert_allclose(got, got.T, rtol=0, atol=1e-9)
+    assert np.all(np.diag(got) == 0)
+
+
+def test_process_pool_matches_single_process():
+    G = random_graph(2)
+    ids = sorted(G.nodes)
+    blocks = list(iter_distance_matrix(G, ids, ids[:20], workers=2, chunk_size=8))
+    # порції приходять по порядку, кожна не більша за chunk_size
+    assert [i for i, _ in blocks] == list(range(0, len(ids), 8))
+    assert all(len(b) <= 8 for _, b in blocks)
+    np.testing.assert_array_equal(np.vstack([b for _, b in blocks]), distance_matrix(G, ids, ids[:20]))
+
+
+def test_unknown_node():
+    G = random_graph(1)
+    with pytest.raises(nx.NodeNotFound):
+        distance_matrix(G, ["n0", "немає"])
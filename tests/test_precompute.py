@@ -0,0 +1,110 @@
+import json
+import math
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.graph_model import build_graph, compile_graph
+from src.pathfinding import SearchStats
+from src.precompute import attach_table, compile_table, load_table, table_paths
+from src.routing import route
+from tests.graphs import SEEDS, expected, path_length, query_pairs, random_data
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def campus(tmp_path):
+    json_path = tmp_path / "data.json"
+    data = random_data(1)
+    write_json(json_path, data)
+    return json_path, data
+
+
+def test_compile_and_load_table(campus):
+    json_path, data = campus
+    G = build_graph(data)
+    table = compile_table(G, json_path)
+    assert all(p.exists() for p in table_paths(json_path))
+
+    loaded = load_table(json_path)
+    assert loaded is not None
+    assert loaded.ids == table.ids == compile_graph(G).ids
+    assert loaded.digest == table.digest
+    np.testing.assert_array_equal(loaded.dist, table.dist)
+    np.testing.assert_array_equal(loaded.nxt, table.nxt)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fresh_table_matches_live_search(tmp_path, seed):
+    json_path = tmp_path / "data.json"
+    data = random_data(seed)
+    write_json(json_path, data)
+    compile_table(build_graph(data), json_path)
+
+    G = build_graph(data)
+    assert attach_table(G, load_table(json_path))
+    live = build_graph(data)
+    for s, t in query_pairs(G, seed):
+        want = expected(live, s, t)
+        if math.isinf(want):
+            with pytest.raises(nx.NetworkXNoPath):
+                route(G, s, t)
+            continue
+        stats = SearchStats()
+        path, dist = route(G, s, t, stats=stats)
+        # відповідь із таблиці - без жодного кроку пошуку
+        assert stats.settled == 0
+        assert dist == pytest.approx(want, abs=1e-9)
+        assert path[0] == s and path[-1] == t
+        assert path_length(live, path) == pytest.approx(want, abs=1e-9)
+
+
+def test_next_hop_walk(campus):
+    json_path, data = campus
+    G = build_graph(data)
+    table = compile_table(G, json_path)
+    for s, t in query_pairs(G, 1):
+        if math.isinf(expected(G, s, t)):
+            continue
+        path, dist = table.route(s, t)
+        i, t_i = table.index[s], table.index[t]
+        # кожен крок - сусід за рядком next-hop цілі t, а відстань до t спадає на вагу ребра
+        for a, b in zip(path, path[1:]):
+            assert table.ids[table.nxt[t_i, table.index[a]]] == b
+            assert table.dist[t_i, table.index[a]] == pytest.approx(
+                G.edges[a, b]["weight"] + table.dist[t_i, table.index[b]], abs=1e-9)
+        assert dist == table.dist[t_i, i]
+        assert path[0] == s and path[-1] == t
+    with pytest.raises(nx.NodeNotFound):
+        table.route("немає", t)
+
+
+def test_edited_json_makes_table_stale(campus):
+    json_path, data = campus
+    compile_table(build_graph(data), json_path)
+
+    # коротке ребро між двома далекими вузлами: стара таблиця дала б довший шлях
+    G = build_graph(data)
+    s, t = max(((u, v) for u, v in query_pairs(G, 7) if not math.isinf(expected(G, u, v))),
+               key=lambda p: expected(G, *p))
+    data["edges"].append({"u": s, "v": t, "weight": 0.01})
+    write_json(json_path, data)
+
+    assert load_table(json_path) is None
+    G = build_graph(data)
+    assert not attach_table(G, load_table(json_path))
+    assert compile_graph(G).table is None
+    # маршрутизація без таблиці - живий пошук по новому графу
+    assert route(G, s, t) == ([s, t], 0.01)
+
+
+def test_table_for_other_nodes_is_not_attached(campus):
+    json_path, data = campus
+    table = compile_table(build_graph(data), json_path)
+    data["nodes"].append({"id": "новий", "pos": [0, 0]})
+    assert not attach_table(build_graph(data), table)
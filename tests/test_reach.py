@@ -0,0 +1,66 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src import pathfinding
+from src.graph_model import compile_graph
+from src.pathfinding import SPTCache, SearchStats, cached_path, reachable, reachable_many
+from tests.graphs import SEEDS, random_graph
+
+
+def as_dict(G, result):
+    cg = compile_graph(G)
+    idx, d = result
+    return {cg.ids[i]: x for i, x in zip(idx.tolist(), d.tolist())}
+
+
+@pytest.mark.parametrize("cutoff", [0.0, 5.0, 20.0, 1e9])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_reachable_matches_networkx(seed, cutoff):
+    G = random_graph(seed)
+    stats = SearchStats()
+    res = reachable(G, "n0", cutoff, stats)
+    want = nx.single_source_dijkstra_path_length(G, "n0", cutoff=cutoff, weight="weight")
+    assert as_dict(G, res) == pytest.approx(want, abs=1e-9)
+    assert np.all(np.diff(res[1]) >= 0)
+    # межа не пускає в чергу дальші вузли: визначено рівно стільки, скільки знайдено
+    assert stats.settled == len(want)
+
+
+def test_multi_source():
+    G = random_graph(2)
+    sources = ["n0", "n10", "n20"]
+    res = reachable(G, sources, 8.0)
+    want = nx.multi_source_dijkstra_path_length(G, sources, cutoff=8.0, weight="weight")
+    assert as_dict(G, res) == pytest.approx(want, abs=1e-9)
+
+
+def test_cached_tree_gives_same_answer(monkeypatch):
+    G = random_graph(1)
+    bounded = reachable(G, "n3", 15.0)
+    monkeypatch.setattr(pathfinding, "SPT_CACHE", SPTCache(eager=True))
+    cached_path(G, "n3", "n4")
+    stats = SearchStats()
+    from_tree = reachable(G, "n3", 15.0, stats)
+    assert stats.settled == 0
+    assert as_dict(G, from_tree) == pytest.approx(as_dict(G, bounded), abs=1e-9)
+
+
+def test_reachable_many_shares_searches():
+    G = random_graph(3)
+    queries = [("n1", 5.0), ("n1", 12.0), (["n2", "n8"], 6.0), ("n1", 0.0)]
+    stats = SearchStats()
+    got = reachable_many(G, queries, stats)
+    for (sources, cutoff), res in zip(queries, got):
+        single = reachable(G, sources, cutoff)
+        assert as_dict(G, res) == pytest.approx(as_dict(G, single), abs=1e-9)
+    # два різні набори джерел - два пошуки
+    assert stats.searches == 2
+
+
+def test_errors():
+    G = random_graph(1)
+    with pytest.raises(ValueError):
+        reachable(G, [], 5.0)
+    with pytest.raises(nx.NodeNotFound):
+        reachable(G, "немає", 5.0)
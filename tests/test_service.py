@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pytest
+
+from src.service import RouteService
+from tests.graphs import expected, random_graph
+
+
+async def request(port, method, target, body=None, headers=""):
+    # один HTTP/1.1-запит на окремому з'єднанні -> (статус, JSON)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    length = "" if "Content-Length" in headers else f"Content-Length: {len(data)}\r\n"
+    writer.write(f"{method} {target} HTTP/1.1\r\nConnection: close\r\n{length}{headers}\r\n".encode() + data)
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def run_with_server(G, scenario):
+    async def main():
+        service = RouteService(G, workers=0)
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(service, port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    return asyncio.run(main())
+
+
+def test_route_matrix_and_nearest():
+    G = random_graph(1)
+
+    async def scenario(service, port):
+        status, body = await request(port, "GET", "/route?start=n0&end=n9&algo=ALT")
+        assert status == 200 and body["algo"] == "alt"
+        assert body["dist"] == pytest.approx(expected(G, "n0", "n9"))
+        assert body["path"][0] == "n0" and body["path"][-1] == "n9"
+
+        status, body = await request(port, "POST", "/matrix", {"sources": ["n0", "n1"], "targets": ["n2", "n59"]})
+        assert status == 200
+        assert body["dist"][0][0] == pytest.approx(expected(G, "n0", "n2"))
+        # n59 ізольований - недосяжне стає null
+        assert body["dist"][1][1] is None
+
+        x, y = G.nodes["n3"]["pos"]
+        status, body = await request(port, "GET", f"/nearest?x={x}&y={y}&floor={G.nodes['n3']['floor']}")
+        assert status == 200 and body["nodes"][0]["id"] == "n3"
+
+        status, body = await request(port, "GET", "/health")
+        assert status == 200 and body["nodes"] == G.number_of_nodes()
+    run_with_server(G, scenario)
+
+
+@pytest.mark.parametrize("method, target, body, headers, status", [
+    ("GET", "/route?start=n0", None, "", 400),
+    ("POST", "/route", {"start": ["n0"], "end": "n1"}, "", 400),
+    ("POST", "/route", {"start": "n0", "end": "n1", "algo": 5}, "", 400),
+    ("GET", "/route?start=n0&end=n1&algo=bogus", None, "", 400),
+    ("POST", "/route", b"{not json", "", 400),
+    ("POST", "/route", b"[1, 2]", "", 400),
+    ("POST", "/matrix", {"sources": [{"id": "n0"}]}, "", 400),
+    ("POST", "/matrix", {"sources": "n0", "targets": 3}, "", 400),
+    ("GET", "/route?start=n0&end=n1", None, "Content-Length: -5\r\n", 400),
+    ("GET", "/nearest?x=nan&y=1", None, "", 400),
+    ("GET", "/route?start=n0&end=nope", None, "", 404),
+    ("GET", "/route?start=n0&end=n59", None, "", 422),
+    ("GET", "/missing", None, "", 404),
+    ("DELETE", "/route", None, "", 405),
+])
+def test_bad_requests_get_client_errors(method, target, body, headers, status):
+    G = random_graph(1)
+
+    async def scenario(service, port):
+        got, payload = await request(port, method, target, body, headers)
+        assert got == status and "error" in payload
+        # сервер живий і після помилки
+        assert (await request(port, "GET", "/health"))[0] == 200
+    run_with_server(G, scenario)
+
+
+def test_identical_requests_are_coalesced():
+    G = random_graph(2)
+
+    async def scenario(service, port):
+        results = await asyncio.gather(*(service.route({"start": "n1", "end": "n7"}) for _ in range(5)))
+        assert service.coalesced == 4
+        assert all(r == results[0] for r in results)
+        assert not service.inflight
+        assert results[0]["dist"] == pytest.approx(expected(G, "n1", "n7"))
+    run_with_server(G, scenario)
+
+
+def test_keep_alive_serves_several_requests():
+    G = random_graph(1)
+
+    async def scenario(service, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for end in ("n2", "n3"):
+            writer.write(f"GET /route?start=n0&end={end} HTTP/1.1\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(next(h for h in head.split(b"\r\n") if h.lower().startswith(b"content-length"))
+                         .split(b":")[1])
+            body = json.loads(await reader.readexactly(length))
+            assert b"keep-alive" in head and body["end"] == end
+        writer.close()
+    run_with_server(G, scenario)
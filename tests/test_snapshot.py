@@ -0,0 +1,126 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from src import dynamic, snapshot
+from src.graph_model import build_graph, compile_graph
+from src.snapshot import ALIGN, MAGIC, Snapshot, load_compiled, load_graph, load_snapshot, snapshot_path
+from tests.graphs import random_data
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def campus(tmp_path):
+    json_path = tmp_path / "data.json"
+    data = random_data(1)
+    write_json(json_path, data)
+    return json_path, data
+
+
+def assert_same_graph(G, H):
+    assert list(G.nodes) == list(H.nodes)
+    for n in G:
+        assert dict(G.nodes[n]) == dict(H.nodes[n])
+    assert {frozenset(e[:2]): e[2] for e in G.edges(data="weight")} == \
+           {frozenset(e[:2]): e[2] for e in H.edges(data="weight")}
+
+
+def test_snapshot_roundtrip(campus, monkeypatch):
+    json_path, data = campus
+    G = load_graph(json_path)
+    assert snapshot_path(json_path).exists()
+
+    # другий запуск читає знімок, а не JSON
+    monkeypatch.setattr(snapshot, "build_graph", lambda data: pytest.fail("JSON прочитано вдруге"))
+    H = load_graph(json_path)
+    assert_same_graph(H, build_graph(data))
+    assert H.graph["sha256"] == G.graph["sha256"]
+
+    # скомпільований граф і атрибути підкладено в кеш - compile_graph нічого не будує
+    cg, ref = compile_graph(H), compile_graph(build_graph(data))
+    assert compile_graph(H) is cg
+    assert cg.ids == ref.ids and cg.n_edges == ref.n_edges
+    for name in ("indptr", "indices", "weights", "pos", "part"):
+        np.testing.assert_array_equal(getattr(cg, name), getattr(ref, name))
+
+
+def test_load_compiled_matches_graph(campus):
+    json_path, data = campus
+    load_graph(json_path)
+    cg, digest = load_compiled(json_path)
+    ref = compile_graph(build_graph(data))
+    assert cg.ids == ref.ids
+    np.testing.assert_array_equal(cg.weights, ref.weights)
+    assert digest == load_snapshot(json_path).header["source"]["sha256"]
+
+
+def test_edited_json_makes_snapshot_stale(campus):
+    json_path, data = campus
+    load_graph(json_path)
+    data["edges"][0]["weight"] += 100.0
+    write_json(json_path, data)
+    assert load_snapshot(json_path) is None
+    G = load_graph(json_path)
+    u, v = data["edges"][0]["u"], data["edges"][0]["v"]
+    assert G.edges[u, v]["weight"] == data["edges"][0]["weight"]
+    # знімок перезаписано з новим вмістом
+    assert load_snapshot(json_path) is not None
+
+
+def test_same_size_edit_is_caught_by_hash(campus):
+    json_path, _ = campus
+    load_graph(json_path)
+    raw = json_path.read_bytes()
+    i = raw.index(b'"weight": ') + len(b'"weight": ')
+    digit = b"1" if raw[i:i + 1] != b"1" else b"2"
+    json_path.write_bytes(raw[:i] + digit + raw[i + 1:])
+    assert load_snapshot(json_path) is None
+
+
+def drop_array(path, name):
+    # переписує знімок без одного масиву - як файл старішої версії формату
+    snap = Snapshot(path)
+    header = dict(snap.header, arrays={})
+    arrays = {k: a for k, a in snap.arrays.items() if k != name}
+    offset = 0
+    for k, a in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        header["arrays"][k] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes
+    head = json.dumps(header).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(head)) // ALIGN) * ALIGN
+    blobs = {k: a.tobytes() for k, a in arrays.items()}
+    del snap
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(head)) + head)
+        for k, b in blobs.items():
+            f.seek(data_start + header["arrays"][k]["offset"])
+            f.write(b)
+
+
+def test_snapshot_without_required_array_is_stale(campus):
+    json_path, data = campus
+    load_graph(json_path)
+    drop_array(snapshot_path(json_path), "building")
+    assert load_snapshot(json_path) is None
+    G = load_graph(json_path)
+    assert_same_graph(G, build_graph(data))
+    assert "building" in load_snapshot(json_path).arrays
+
+
+def test_closures_do_not_touch_snapshot_file(campus):
+    # масиви знімка відкрито copy-on-write: ремонт на місці не пише у файл
+    json_path, _ = campus
+    load_graph(json_path)
+    before = snapshot_path(json_path).read_bytes()
+    G = load_graph(json_path)
+    u, v = next(iter(G.edges))
+    dynamic.close_edge(G, u, v)
+    assert compile_graph(G).weights.max() == np.inf
+    assert snapshot_path(json_path).read_bytes() == before
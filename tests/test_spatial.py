@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from src import spatial
+from src.graph_model import compile_graph, node_table
+from src.routing import route
+from src.spatial import nearest_node, route_from_point, spatial_index
+from tests.graphs import random_graph
+
+
+def brute(G, point, floor=None):
+    # (відстані за зростанням, id) перебором усіх вузлів поверху
+    cg, nt = compile_graph(G), node_table(G)
+    rows = np.arange(cg.n) if floor is None else np.array([cg.idx(n) for n in nt.ids_on(floor)])
+    d = np.hypot(*(cg.pos[rows] - point).T)
+    order = np.argsort(d, kind="stable")
+    return d[order], [cg.ids[i] for i in rows[order]]
+
+
+def points(seed, count=40):
+    # і всередині області координат, і далеко поза нею
+    return np.random.default_rng(seed).uniform(-30, 80, size=(count, 2))
+
+
+@pytest.mark.parametrize("floor", [None, 1, 2, 3])
+def test_nearest_matches_brute_force(floor):
+    G = random_graph(1, n=300, m=400)
+    idx = spatial_index(G)
+    for p in points(floor or 0):
+        want_d, want_ids = brute(G, p, floor)
+        got = idx.nearest(p, floor, k=5)
+        assert [d for _, d in got] == pytest.approx(want_d[:5].tolist(), abs=1e-9)
+        assert got[0][0] == want_ids[0] == nearest_node(G, p, floor)
+
+
+def test_within_radius():
+    G = random_graph(2, n=300, m=400)
+    idx = spatial_index(G)
+    for p in points(5):
+        want_d, want_ids = brute(G, p, 2)
+        got = idx.within(p, 7.5, floor=2)
+        inside = want_d <= 7.5
+        assert sorted(n for n, _ in got) == sorted(np.array(want_ids)[inside].tolist())
+        assert [d for _, d in got] == sorted(d for _, d in got)
+
+
+@pytest.mark.parametrize("brute_max", [spatial.BRUTE_MAX, 0])
+def test_nearest_many_matches_single_queries(monkeypatch, brute_max):
+    # обидва шляхи пакетного запиту: векторний перебір і сітка по точці
+    monkeypatch.setattr(spatial, "BRUTE_MAX", brute_max)
+    G = random_graph(3, n=300, m=400)
+    idx = spatial_index(G)
+    pts = points(7)
+    rows, dist = idx.nearest_many(pts, floor=1, k=3)
+    assert rows.shape == dist.shape == (len(pts), 3)
+    for p, r, d in zip(pts, rows, dist):
+        want = idx.nearest(p, 1, k=3)
+        assert d.tolist() == pytest.approx([x for _, x in want], abs=1e-9)
+        assert idx.ids[r[0]] == want[0][0]
+
+
+def test_index_is_cached_and_unknown_floor():
+    G = random_graph(1)
+    assert spatial_index(G) is spatial_index(G)
+    with pytest.raises(KeyError):
+        spatial_index(G).nearest((0, 0), floor=99)
+
+
+def test_route_from_point():
+    G = random_graph(1)
+    cg = compile_graph(G)
+    start = cg.ids[5]
+    p = cg.pos[5] + 0.01
+    end = next(n for n in G.neighbors(start))
+    assert route_from_point(G, p, end, floor=G.nodes[start]["floor"]) == route(G, start, end)
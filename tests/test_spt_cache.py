@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src import pathfinding
+from src.graph_model import compile_graph
+from src.pathfinding import SPTCache, cached_path
+from tests.graphs import expected, random_graph
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SPTCache(max_entries=4)
+    monkeypatch.setattr(pathfinding, "SPT_CACHE", cache)
+    return cache
+
+
+def test_tree_is_built_for_repeated_start(cache):
+    G = random_graph(1)
+    # перший запит від n0 - пошук із раннім виходом, без дерева
+    assert cached_path(G, "n0", "n5")[1] == pytest.approx(expected(G, "n0", "n5"))
+    assert len(cache) == 0
+    # другий від того ж start будує дерево, третій іде з кешу
+    cached_path(G, "n0", "n7")
+    assert len(cache) == 1
+    assert cached_path(G, "n0", "n9")[1] == pytest.approx(expected(G, "n0", "n9"))
+    assert cache.stats()["hits"] == 1
+
+
+def test_eager_builds_tree_on_first_query(cache):
+    G = random_graph(1)
+    cache.configure(eager=True)
+    cached_path(G, "n0", "n5")
+    assert len(cache) == 1
+
+
+def test_lru_eviction(cache):
+    G = random_graph(2)
+    cache.configure(eager=True)
+    for i in range(6):
+        cached_path(G, f"n{i}", "n10")
+    assert len(cache) == 4 and cache.stats()["evictions"] == 2
+    cache.configure(max_entries=2)
+    assert len(cache) == 2
+
+
+def test_put_resets_on_new_version(cache):
+    cg = compile_graph(random_graph(1))
+    tree = (np.zeros(cg.n), np.full(cg.n, -1))
+    cache.put(cg.version, 0, "dijkstra", *tree)
+    cache.put(cg.version + 1, 1, "dijkstra", *tree)
+    # дерево старої версії не лишається поруч із новою
+    assert len(cache) == 1
+    assert cache.get(cg.version + 1, 1, "dijkstra") is not None
+    assert cache.get(cg.version, 0, "dijkstra") is None
@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import networkx as nx
+import pytest
+
+from src import tour
+from src.benchmark import campus_graph
+from src.tour import plan_tour
+from tests.graphs import path_length
+
+
+@pytest.fixture(scope="module")
+def campus():
+    return campus_graph(1000)
+
+
+def stops(G, count, seed):
+    return random.Random(seed).sample(sorted(G.nodes), count)
+
+
+def brute_force(G, points, start=None, end=None):
+    # найкоротший порядок перебором перестановок за відстанями networkx
+    d = {a: nx.single_source_dijkstra_path_length(G, a, weight="weight") for a in points}
+    closed = start is not None and start == end
+    middle = [p for p in points if p not in (start, end)]
+    best = float("inf")
+    for perm in itertools.permutations(middle):
+        order = ([start] if start is not None else []) + list(perm)
+        if end is not None and not closed:
+            order.append(end)
+        if closed:
+            order.append(start)
+        best = min(best, sum(d[a][b] for a, b in zip(order, order[1:])))
+    return best
+
+
+def check_tour(G, t, points):
+    assert set(t.order) == set(points)
+    assert t.path[0] == t.order[0] and t.path[-1] == t.order[-1]
+    assert all(G.has_edge(a, b) for a, b in zip(t.path, t.path[1:]))
+    assert path_length(G, t.path) == pytest.approx(t.length, abs=1e-9)
+    assert sum(t.legs) == pytest.approx(t.length, abs=1e-9)
+
+
+@pytest.mark.parametrize("mode", ["open", "start", "start_end", "closed"])
+def test_exact_order_matches_brute_force(campus, mode):
+    points = stops(campus, 7, seed=len(mode))
+    start = points[0] if mode != "open" else None
+    end = {"start_end": points[-1], "closed": start}.get(mode)
+    t = plan_tour(campus, points, start, end)
+    assert t.method == "exact"
+    check_tour(campus, t, points)
+    assert t.length == pytest.approx(brute_force(campus, points, start, end), abs=1e-9)
+    if start is not None:
+        assert t.order[0] == start
+    if mode == "closed":
+        assert t.order[-1] == start
+    elif end is not None:
+        assert t.order[-1] == end
+
+
+def test_heuristic_close_to_exact(campus, monkeypatch):
+    points = stops(campus, 11, seed=3)
+    exact = plan_tour(campus, points, points[0])
+    monkeypatch.setattr(tour, "EXACT_MAX", 0)
+    approx = plan_tour(campus, points, points[0])
+    assert approx.method == "heuristic" and approx.order[0] == points[0]
+    check_tour(campus, approx, points)
+    assert exact.length <= approx.length <= exact.length * 1.1
+
+
+def test_many_stops_use_heuristic(campus):
+    points = stops(campus, 30, seed=4)
+    t = plan_tour(campus, points)
+    assert t.method == "heuristic"
+    check_tour(campus, t, points)
+
+
+def test_errors(campus):
+    with pytest.raises(nx.NodeNotFound):
+        plan_tour(campus, ["немає"])
+    with pytest.raises(ValueError):
+        plan_tour(campus, [])
+    G = campus.copy()
+    G.add_node("острів", pos=(0, 0), floor=1)
+    with pytest.raises(nx.NetworkXNoPath):
+        plan_tour(G, stops(campus, 3, seed=1) + ["острів"])